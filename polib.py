@@ -11,20 +11,31 @@ modify entries, comments or metadata, etc. or create new po files from scratch.
 """
 
 import array
+import binascii
+import bisect
 import codecs
+import gc
+import gettext
+import hashlib
 import io
+import marshal
+import mmap
+import operator
 import os
 import re
 import struct
 import sys
 import textwrap
-
+import time
+import weakref
 
 __author__ = "David Jean Louis <izimobil@gmail.com>"
 __version__ = "2.0.0"
 __all__ = [
     "pofile",
+    "iter_pofile",
     "POFile",
+    "ColumnarPOFile",
     "POEntry",
     "mofile",
     "MOFile",
@@ -33,6 +44,9 @@ __all__ = [
     "escape",
     "unescape",
     "detect_encoding",
+    "read_metadata",
+    "mo_lookup",
+    "compile_tree",
     "POParseError",
     "MOParseError",
 ]
@@ -47,21 +61,38 @@ def _pofile_or_mofile(f, type, **kwargs):
     Internal function used by :func:`polib.pofile` and :func:`polib.mofile` to
     honor the DRY concept.
     """
-    # get the file encoding
-    enc = kwargs.get("encoding")
-    if enc is None:
-        enc = detect_encoding(f)
-
-    # parse the file
-    kls = type == "pofile" and _POFileParser or _MOFileParser
+    # parse the file, the parsers detect the encoding if it is not given
+    if type == "mofile":
+        kls = _MMapMOFileParser if kwargs.get("mmap") else _MOFileParser
+    elif kwargs.get("lazy"):
+        kls = _LazyPOFileParser
+    elif kwargs.get("workers", 1) > 1:
+        kls = _ParallelPOFileParser
+    else:
+        kls = _POFileParser
+    cache = kwargs.get("cache")
+    lazy = kwargs.get("lazy") or kwargs.get("mmap")
+    if cache is not None and not lazy and _is_filepath(f):
+        cache = _ParseCache(cache, f, type, **kwargs)
+        instance = cache.load(kwargs.get("klass"))
+        if instance is not None:
+            instance.wrapwidth = kwargs.get("wrapwidth", 78)
+            return instance
+    else:
+        cache = None
     parser = kls(
         f,
-        encoding=enc,
+        encoding=kwargs.get("encoding"),
         check_for_duplicates=kwargs.get("check_for_duplicates", False),
         klass=kwargs.get("klass"),
+        workers=kwargs.get("workers", 1),
+        fields=kwargs.get("fields"),
+        skip=kwargs.get("skip"),
     )
     instance = parser.parse()
     instance.wrapwidth = kwargs.get("wrapwidth", 78)
+    if cache is not None:
+        cache.save(instance)
     return instance
 
 
@@ -81,6 +112,101 @@ def _is_filepath(filename_or_contents):
         return False
 
 
+# the size of the blocks read by _iter_lines(), the charset of po files is
+# looked for in the first block only
+_READ_SIZE = 1 << 16
+
+# the size of the blocks written by _BaseFile.write(), the rendered entries are
+# buffered until they reach it
+_WRITE_SIZE = 1 << 16
+
+# matches the charset of the Content-Type header
+_CHARSET_RE = re.compile(r'"?Content-Type:.+? charset=([\w_\-:\.]+)')
+_CHARSET_BYTES_RE = re.compile(_CHARSET_RE.pattern.encode("latin-1"))
+
+
+# multibyte encodings where bytes of non ascii characters can be ascii bytes
+# (e.g. a backslash or a double quote)
+_ASCII_UNSAFE_ENCODINGS = {
+    "big5",
+    "big5hkscs",
+    "cp932",
+    "cp949",
+    "cp950",
+    "gb18030",
+    "gbk",
+    "hz",
+    "johab",
+    "shift_jis",
+    "shift_jis_2004",
+    "shift_jisx0213",
+    "utf-7",
+}
+
+
+def _is_ascii_compatible(encoding):
+    """
+    Returns True if the po syntax can be parsed on the bytes encoded with
+    ``encoding``, that is if ascii characters are encoded as single ascii
+    bytes and other characters never contain ascii bytes.
+    """
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    if name in _ASCII_UNSAFE_ENCODINGS or name.startswith("iso2022"):
+        return False
+    try:
+        return '#~| msgid[0]"\\\n'.encode(name) == b'#~| msgid[0]"\\\n'
+    except UnicodeError:
+        return False
+
+
+def _iter_lines(fhandle, head, encoding):
+    """
+    Generator that yields the lines of the file ``fhandle``, opened in binary
+    mode, as bytes. ``head`` is the beginning of the file that has already
+    been read. Lines are split like in a file opened in text mode, files in
+    encodings that are not ascii compatible are transcoded to utf-8.
+    """
+    if not _is_ascii_compatible(encoding):
+        fhandle.seek(0)
+        with io.TextIOWrapper(fhandle, encoding=encoding) as text:
+            for line in text:
+                yield line.encode("utf-8")
+        return
+    rest = b""
+    block = head
+    while block:
+        lines = (rest + block).splitlines(True)
+        # the last line may continue in the next block, even if it ends with
+        # a carriage return
+        rest = lines.pop()
+        yield from lines
+        block = fhandle.read(_READ_SIZE)
+    if rest:
+        yield rest
+
+
+def _strip_line(line, encoding):
+    """
+    Strip the line ``line`` (bytes) like ``str.strip()`` strips the decoded
+    line, that is including the whitespace that is not ascii.
+
+    Quoted strings are sliced out of the lines as bytes, so the last
+    character of lines that are not comments is replaced by an ascii one when
+    it is not ascii: it is never part of the string anyway.
+    """
+    text = line.decode(encoding).strip()
+    if text[-1:] > "\x7f":
+        body = text
+        if text[:2] == "#~" and text[2:3].isspace():
+            body = text[3:].lstrip()
+        if body[:1] != "#" or body[:2] == "#|":
+            text = text[:-1] + "?"
+    return text.encode(encoding)
+
+
 def pofile(pofile, **kwargs):
     """
     Convenience function that parses the po or pot file ``pofile`` and returns
@@ -97,7 +223,8 @@ def pofile(pofile, **kwargs):
 
     ``encoding``
         string, the encoding to use (e.g. "utf-8") (default: ``None``, the
-        encoding will be auto-detected).
+        encoding will be auto-detected from the charset declared in the
+        header, that is looked for in the first 64 KiB of the file).
 
     ``check_for_duplicates``
         whether to check for duplicate entries when adding entries to the
@@ -106,11 +233,84 @@ def pofile(pofile, **kwargs):
     ``klass``
         class which is used to instantiate the return value (optional,
         default: ``None``, the return value with be a :class:`~polib.POFile`
-        instance).
+        instance). Very large catalogs can be loaded in a
+        :class:`~polib.ColumnarPOFile` to use less memory.
+
+    ``lazy``
+        whether to parse the entries only when they are used (optional,
+        default: ``False``). The file is only scanned to find where each entry
+        starts and ends and its msgctxt and msgid, so that looking up a few
+        entries of a large catalog is much faster, syntax errors are raised
+        when the faulty entry is first used.
+
+    ``workers``
+        integer, the number of processes used to parse the file (optional,
+        default: ``1``). When greater than one, the file is split between
+        entries and the parts are parsed in parallel, this is only worth it
+        for very large files.
+
+    ``fields``
+        iterable, the names of the entry fields to parse (optional, default:
+        ``None``, all the fields are parsed). The ``occurrences``,
+        ``comment``, ``tcomment``, ``flags``, ``previous_msgctxt``,
+        ``previous_msgid`` and ``previous_msgid_plural`` fields that are not
+        listed are left empty: their lines are still checked but not
+        handled, which makes loading catalogs for lookups faster and lighter.
+        The other fields are always parsed.
+
+    ``skip``
+        iterable, the names of the entry fields to skip, the opposite of
+        ``fields`` (optional).
+
+    ``cache``
+        string or pathlike-object, the directory where the parsed file is
+        cached (optional, default: ``None``, no cache). When the file has the
+        same path, size and modification time as when it was cached, it is
+        loaded from the cache instead of being parsed, an outdated or
+        corrupted cache is ignored and replaced. The cache is not used by the
+        lazy mode.
     """
     return _pofile_or_mofile(pofile, "pofile", **kwargs)
 
 
+def iter_pofile(pofile, **kwargs):
+    """
+    Convenience function that parses the po or pot file ``pofile`` like
+    :func:`~polib.pofile` does, but returns a generator instead of building a
+    :class:`~polib.POFile` instance holding all the entries, so that memory
+    usage does not depend on the size of the file.
+
+    The first item yielded is an empty :class:`~polib.POFile` instance that
+    holds the file header, metadata and encoding, it is followed by the
+    :class:`~polib.POEntry` instances of the file, in order, each one being
+    yielded as soon as it has been parsed.
+
+    Arguments:
+
+    ``pofile``
+        string, full or relative path to the po/pot file or its content (data).
+
+    ``wrapwidth``
+        integer, the wrap width, only useful when the ``-w`` option was passed
+        to xgettext (optional, default: ``78``).
+
+    ``encoding``
+        string, the encoding to use (e.g. "utf-8") (default: ``None``, the
+        encoding will be auto-detected from the charset declared in the
+        header, that is looked for in the first 64 KiB of the file).
+
+    ``klass``
+        class which is used to instantiate the first yielded value (optional,
+        default: ``None``, the value with be a :class:`~polib.POFile`
+        instance).
+    """
+    parser = _POFileParser(
+        pofile, encoding=kwargs.get("encoding"), klass=kwargs.get("klass")
+    )
+    parser.instance.wrapwidth = kwargs.get("wrapwidth", 78)
+    return parser.iterparse()
+
+
 def mofile(mofile, **kwargs):
     """
     Convenience function that parses the mo file ``mofile`` and returns a
@@ -138,6 +338,18 @@ def mofile(mofile, **kwargs):
         class which is used to instantiate the return value (optional,
         default: ``None``, the return value with be a :class:`~polib.POFile`
         instance).
+
+    ``cache``
+        string or pathlike-object, the directory where the parsed file is
+        cached, see :func:`~polib.pofile` (optional). The cache is not used
+        by the ``mmap`` mode.
+
+    ``mmap``
+        whether to map the file in memory instead of reading it (optional,
+        default: ``False``). The entries reference their strings in the
+        mapped file and are only decoded when they are first used, which
+        makes loading large files faster and lighter when only some of their
+        entries are used.
     """
     return _pofile_or_mofile(mofile, "mofile", **kwargs)
 
@@ -158,10 +370,6 @@ def detect_encoding(file, binary_mode=False):
     ``binary_mode``
         boolean, deprecated, has no effect.
     """
-    PATTERN = r'"?Content-Type:.+? charset=([\w_\-:\.]+)'
-    rxt = re.compile(PATTERN)
-    rxb = re.compile(PATTERN.encode("latin-1"))
-
     if binary_mode:
         from warnings import warn
 
@@ -172,985 +380,3573 @@ def detect_encoding(file, binary_mode=False):
             2,
         )
 
-    def charset_exists(charset):
-        """Check whether ``charset`` is valid or not."""
-        try:
-            codecs.lookup(charset)
-        except LookupError:
-            return False
-        return True
-
     if not _is_filepath(file):
-        match = rxt.search(file)
+        if isinstance(file, bytes):
+            match = _CHARSET_BYTES_RE.search(file)
+        else:
+            match = _CHARSET_RE.search(file)
         if match:
             enc = match.group(1).strip()
-            if charset_exists(enc):
+            if isinstance(enc, bytes):
+                enc = enc.decode("utf-8")
+            if _charset_exists(enc):
                 return enc
     else:
         with open(file, "rb") as f:
             for l in f:
-                match = rxb.search(l)
+                match = _CHARSET_BYTES_RE.search(l)
                 if match:
                     enc = match.group(1).strip().decode("utf-8")
-                    if charset_exists(enc):
+                    if _charset_exists(enc):
                         return enc
     return default_encoding
 
 
-def escape(st):
-    """
-    Escapes the characters ``\\\\``, ``\\t``, ``\\n``, ``\\r`` and ``"`` in
-    the given string ``st`` and returns it.
+def read_metadata(file, **kwargs):
     """
-    return (
-        st.replace("\\", r"\\")
-        .replace("\t", r"\t")
-        .replace("\r", r"\r")
-        .replace("\n", r"\n")
-        .replace('"', r"\"")
-    )
+    Returns the metadata dict of the po, pot or mo file ``file``, as the
+    ``metadata`` attribute of the :class:`~polib.POFile` or
+    :class:`~polib.MOFile` instance built by :func:`~polib.pofile` or
+    :func:`~polib.mofile` would be, but without parsing the entries: only
+    the header entry (the first entry of po files) is read, so the time
+    taken does not depend on the size of the file. Po files whose first
+    entry is not the header are fully parsed.
+
+    Arguments:
 
+    ``file``
+        string or pathlike-object, full or relative path to the po/pot/mo
+        file.
 
-def unescape(st):
+    ``encoding``
+        string, the encoding to use (e.g. "utf-8") (default: ``None``, the
+        encoding will be auto-detected).
+    """
+    encoding = kwargs.get("encoding")
+    with open(file, "rb") as fhandle:
+        magic = fhandle.read(4)
+        if len(magic) == 4 and struct.unpack("<I", magic)[0] in (
+            MOFile.MAGIC,
+            MOFile.MAGIC_SWAPPED,
+        ):
+            return _read_mo_metadata(fhandle, magic, encoding)
+    # the header of po files is normally the first entry, the parser is
+    # stopped as soon as it is complete, the optional fields are not needed
+    # except the flags
+    skip = [f for f in _PO_OPTIONAL_FIELDS if f != "flags"]
+    parser = _POFileParser(file, encoding=encoding, skip=skip)
+    entries = parser.iter_entries()
+    try:
+        first = next(entries, None)
+    finally:
+        entries.close()
+    if first is None:
+        return parser.instance.metadata
+    if first.msgid == "" and not first.obsolete and not first.msgctxt:
+        parser._set_metadata(first)
+        return parser.instance.metadata
+    # the header is elsewhere (or missing), parse the whole file
+    return _POFileParser(file, encoding=encoding, skip=skip).parse().metadata
+
+
+def _read_mo_metadata(fhandle, magic, encoding=None):
     """
-    Unescapes the characters ``\\\\``, ``\\t``, ``\\n``, ``\\r`` and ``"`` in
-    the given string ``st`` and returns it.
+    Reads the metadata of the mo file ``fhandle``, positioned after the
+    ``magic`` number, from the first msgid/msgstr pair of its tables.
     """
+    ii = "<II" if struct.unpack("<I", magic)[0] == MOFile.MAGIC else ">II"
+    version, numofstrings = struct.unpack(ii, fhandle.read(8))
+    if version >> 16 not in (0, 1):
+        raise MOParseError("unexpected major revision number")
+    if not numofstrings:
+        return {}
+    msgids_hash_offset, msgstrs_hash_offset = struct.unpack(ii, fhandle.read(8))
+    fhandle.seek(msgids_hash_offset)
+    msgid_length = struct.unpack(ii, fhandle.read(8))[0]
+    if msgid_length:  # the msgid of the metadata is the empty string
+        return {}
+    fhandle.seek(msgstrs_hash_offset)
+    length, offset = struct.unpack(ii, fhandle.read(8))
+    fhandle.seek(offset)
+    msgstr = fhandle.read(length)
+    if encoding is None:
+        encoding = _find_charset(msgstr) or default_encoding
+    return _parse_mo_metadata(msgstr, encoding)
+
+
+def _parse_mo_metadata(msgstr, encoding):
+    """
+    Returns the metadata dict of the given msgstr of the metadata entry of a
+    mo file.
+    """
+    metadata = {}
+    for line in msgstr.split(b"\n"):
+        tokens = line.split(b":", 1)
+        if tokens[0] != b"":
+            try:
+                k = tokens[0].decode(encoding)
+                v = tokens[1].decode(encoding)
+                metadata[k] = v.strip()
+            except IndexError:
+                metadata[k] = ""
+    return metadata
 
-    def unescape_repl(m):
-        m = m.group(1)
-        if m == "n":
-            return "\n"
-        if m == "t":
-            return "\t"
-        if m == "r":
-            return "\r"
-        if m == "\\":
-            return "\\"
-        return m  # handles escaped double quote
 
-    return re.sub(r'\\(\\|n|t|r|")', unescape_repl, st)
+def mo_lookup(mofile, msgid, msgctxt=None, n=None, **kwargs):
+    """
+    Returns the translation of ``msgid`` in the mo file ``mofile``, or
+    ``None`` if it is not translated, without loading the file: the msgid is
+    looked up with the hash table of the file, or by a binary search of its
+    sorted msgids if it has no hash table, and only the strings compared and
+    the translation are read.
 
+    Arguments:
 
-def natural_sort(lst):
-    """
-    Sort naturally the given list.
-    Credits: http://stackoverflow.com/a/4836734
-    """
+    ``mofile``
+        string or pathlike-object, full or relative path to the mo file, or
+        its contents as a bytes-like object.
 
-    def convert(text):
-        return int(text) if text.isdigit() else text.lower()
+    ``msgid``
+        string, the msgid to translate.
 
-    def alphanum_key(key):
-        return [convert(c) for c in re.split("([0-9]+)", key)]
+    ``msgctxt``
+        string, the context of the msgid (optional).
 
-    return sorted(lst, key=alphanum_key)
+    ``n``
+        integer, the number used to choose the plural form of the
+        translation with the ``Plural-Forms`` of the file (optional, default:
+        ``None``, the first form is returned).
 
+    ``encoding``
+        string, the encoding of the file (default: ``None``, the charset of
+        the file is used).
+    """
+    encoding = kwargs.get("encoding")
+    if isinstance(mofile, (bytes, bytearray, memoryview, mmap.mmap)):
+        return _mo_lookup(mofile, msgid, msgctxt, n, encoding)
+    with open(mofile, "rb") as fhandle:
+        if not os.fstat(fhandle.fileno()).st_size:
+            raise MOParseError("magic number is incorrect")
+        with mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _mo_lookup(data, msgid, msgctxt, n, encoding)
 
-class POParseError(ValueError):
+
+def _mo_lookup(data, msgid, msgctxt, n, encoding):
     """
-    Subclass of ``ValueError`` with the following additional properties:
-    msg: The unformatted error message
-    fpath: The path of the file being parsed
-    lineno: The index of the line in doc where parsing failed
+    Does the lookup of :func:`~polib.mo_lookup` in ``data``, a bytes-like
+    object holding a mo file.
+    """
+    if len(data) < 28:
+        raise MOParseError("magic number is incorrect")
+    magic_number = struct.unpack_from("<I", data)[0]
+    if magic_number == MOFile.MAGIC:
+        order = "<"
+    elif magic_number == MOFile.MAGIC_SWAPPED:
+        order = ">"
+    else:
+        raise MOParseError("magic number is incorrect")
+    (
+        version,
+        numofstrings,
+        msgids_offset,
+        msgstrs_offset,
+        hash_size,
+        hash_offset,
+    ) = struct.unpack_from(order + "6I", data, 4)
+    if version >> 16 not in (0, 1):
+        raise MOParseError("unexpected major revision number")
+
+    def string(table_offset, index):
+        length, offset = struct.unpack_from(
+            order + "2I", data, table_offset + 8 * index
+        )
+        return bytes(data[offset : offset + length])
+
+    def find(key):
+        # returns the index of the msgid ``key`` in the tables, or None
+        if hash_size > 2:
+            # like gettext, see _mo_hash_table()
+            hval = _hashpjw(key)
+            idx = hval % hash_size
+            incr = 1 + hval % (hash_size - 2)
+            for i in range(hash_size):
+                index = struct.unpack_from(order + "I", data, hash_offset + 4 * idx)[0]
+                if not index:
+                    break
+                index -= 1
+                if (
+                    index < numofstrings
+                    and string(msgids_offset, index).split(b"\0", 1)[0] == key
+                ):
+                    return index
+                if idx >= hash_size - incr:
+                    idx -= hash_size - incr
+                else:
+                    idx += incr
+            return None
+        lo, hi = 0, numofstrings
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = string(msgids_offset, mid).split(b"\0", 1)[0]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    plural = None
+    if encoding is None or n is not None:
+        index = find(b"")
+        metadata = string(msgstrs_offset, index) if index is not None else b""
+        if encoding is None:
+            encoding = _find_charset(metadata) or default_encoding
+        if n is not None:
+            # "nplurals=2; plural=(n != 1);", parsed like gettext does
+            plural_forms = _parse_mo_metadata(metadata, encoding).get("Plural-Forms")
+            expression = "n != 1"
+            for part in (plural_forms or "").split(";"):
+                part = part.strip()
+                if part.startswith("plural="):
+                    expression = part[len("plural=") :]
+            plural = gettext.c2py(expression)
+    key = msgid.encode(encoding)
+    if msgctxt is not None:
+        key = msgctxt.encode(encoding) + b"\x04" + key
+    index = find(key)
+    if index is None:
+        return None
+    forms = string(msgstrs_offset, index).split(b"\0")
+    form = 0
+    if plural is not None and len(forms) > 1:
+        form = plural(n)
+        if form >= len(forms):
+            return None
+    return forms[form].decode(encoding)
+
+
+def compile_tree(src_root, dst_root=None, **kwargs):
     """
+    Compiles the po files found in the directory ``src_root`` (and its
+    subdirectories) to mo files in ``dst_root``, in the same relative
+    directories, and returns the list of the results, one for each po file,
+    as tuples of the path of the po file, the path of the mo file, the
+    status (``"compiled"``, ``"skipped"`` or ``"failed"``), the time taken in
+    seconds and the error message of failures (or ``None``).
+
+    A po file is skipped when its mo file is newer than it, or when its
+    contents did not change since it was last compiled: the fingerprints of
+    the compiled files are stored in a ``.polib-fingerprints`` file in
+    ``dst_root``. A file that fails to compile does not stop the others.
 
-    def __init__(self, msg, fpath, lineno):
-        ValueError.__init__(self, f"{msg}: {fpath}(line {lineno})")
-        self.msg = msg
-        self.fpath = fpath
-        self.lineno = lineno
+    Arguments:
 
-    def __reduce__(self):
-        return self.__class__, (self.msg, self.fpath, self.lineno)
+    ``src_root``
+        string or pathlike-object, the directory of the po files.
 
+    ``dst_root``
+        string or pathlike-object, the directory where the mo files are
+        written (optional, default: ``None``, the mo files are written next
+        to the po files).
 
-class MOParseError(ValueError):
-    pass
+    ``workers``
+        integer, the number of processes used to compile the files
+        (optional, default: ``1``).
+
+    ``force``
+        whether to compile all the files (optional, default: ``False``).
+    """
+    workers = kwargs.get("workers", 1)
+    force = kwargs.get("force", False)
+    src_root = os.fspath(src_root)
+    dst_root = src_root if dst_root is None else os.fspath(dst_root)
+    manifest = os.path.join(dst_root, ".polib-fingerprints")
+    fingerprints = {}
+    if not force:
+        try:
+            with open(manifest, encoding="utf-8") as fhandle:
+                for line in fhandle:
+                    fingerprint, _, relpath = line.rstrip("\n").partition(" ")
+                    fingerprints[relpath] = fingerprint
+        except (OSError, ValueError):
+            pass
+
+    results, tasks = [], []
+    for dirpath, dirnames, filenames in os.walk(src_root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(".po"):
+                continue
+            src = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(src, src_root)
+            dst = os.path.join(dst_root, relpath[:-3] + ".mo")
+            if not force:
+                try:
+                    if os.stat(dst).st_mtime_ns >= os.stat(src).st_mtime_ns:
+                        results.append([src, dst, "skipped", 0.0, None])
+                        continue
+                except OSError:
+                    pass
+            results.append(None)
+            tasks.append((len(results) - 1, src, dst, fingerprints.get(relpath)))
+
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_compile_po_file, tasks, chunksize=chunksize))
+    else:
+        outputs = [_compile_po_file(task) for task in tasks]
+
+    for (index, src, dst, _), (status, elapsed, error, fingerprint) in zip(
+        tasks, outputs
+    ):
+        results[index] = [src, dst, status, elapsed, error]
+        relpath = os.path.relpath(src, src_root)
+        if fingerprint is None:
+            fingerprints.pop(relpath, None)
+        else:
+            fingerprints[relpath] = fingerprint
+    if tasks:
+        try:
+            os.makedirs(dst_root, exist_ok=True)
+            with open(manifest, "w", encoding="utf-8") as fhandle:
+                for relpath in sorted(fingerprints):
+                    fhandle.write("%s %s\n" % (fingerprints[relpath], relpath))
+        except OSError:
+            pass
+    return [tuple(result) for result in results]
 
 
-class _BaseFile(list):
+def _compile_po_file(task):
     """
-    Common base class for the :class:`~polib.POFile` and :class:`~polib.MOFile`
-    classes. This class should **not** be instantiated directly.
+    Compiles a po file for :func:`~polib.compile_tree`, ``task`` is the tuple
+    of the index of the file, the path of the po file, the path of the mo file
+    and the fingerprint of the po file when it was last compiled. Returns the
+    status, the time taken, the error message and the new fingerprint.
+    """
+    index, src, dst, previous = task
+    start = time.perf_counter()
+    try:
+        with open(src, "rb") as fhandle:
+            data = fhandle.read()
+        # the output depends on the polib version too
+        fingerprint = hashlib.sha1(__version__.encode("ascii") + data).hexdigest()
+        if fingerprint == previous and os.path.exists(dst):
+            # mark the mo file as up to date
+            os.utime(dst)
+            return "skipped", time.perf_counter() - start, None, fingerprint
+        po = pofile(src)
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        tmppath = "%s.%d.tmp" % (dst, os.getpid())
+        try:
+            with open(tmppath, "wb") as fhandle:
+                po.write_binary(fhandle)
+            os.replace(tmppath, dst)
+        finally:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+    except Exception as exc:
+        error = "%s: %s" % (type(exc).__name__, exc)
+        return "failed", time.perf_counter() - start, error, None
+    return "compiled", time.perf_counter() - start, None, fingerprint
+
+
+def _mo_entry_kwargs(msgid, msgstr, encoding):
+    """
+    Returns the keyword arguments of the :class:`~polib.MOEntry` of the given
+    msgid and msgstr (bytes) of a mo file.
     """
+    kwargs = {}
+    # test if we have a plural entry
+    msgid_tokens = msgid.split(b"\0")
+    if len(msgid_tokens) > 1:
+        msgid = msgid_tokens[0]
+        if msgid_tokens[1]:
+            kwargs["msgid_plural"] = msgid_tokens[1].decode(encoding)
+        kwargs["msgstr_plural"] = {
+            k: v.decode(encoding) for k, v in enumerate(msgstr.split(b"\0"))
+        }
+    elif msgstr:
+        kwargs["msgstr"] = msgstr.decode(encoding)
+    msgctxt_msgid = msgid.split(b"\x04")
+    if len(msgctxt_msgid) > 1:
+        kwargs["msgctxt"] = msgctxt_msgid[0].decode(encoding)
+        kwargs["msgid"] = msgctxt_msgid[1].decode(encoding)
+    else:
+        kwargs["msgid"] = msgid.decode(encoding)
+    return kwargs
 
-    def __init__(self, *args, **kwargs):
-        """
-        Constructor, accepts the following keyword arguments:
 
-        ``pofile``
-            string, the path to the po or mo file, or its contents as bytes.
+def _hashpjw(data):
+    """
+    Returns the hash of ``data`` (bytes) used by the hash table of mo files,
+    the 32 bits hashpjw function of GNU gettext.
+    """
+    hval = 0
+    for byte in data:
+        hval = ((hval << 4) + byte) & 0xFFFFFFFF
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
 
-        ``wrapwidth``
-            integer, the wrap width, only useful when the ``-w`` option was
-            passed to xgettext (optional, default: ``78``).
 
-        ``encoding``
-            string, the encoding to use, defaults to the ``default_encoding``
-            global variable (optional).
+def _next_prime(seed):
+    """
+    Returns the smallest odd number greater than or equal to ``seed`` that is
+    prime according to GNU gettext (which does not consider 3 a prime
+    number, the resulting hash table sizes are those of msgfmt).
+    """
+    seed |= 1
+    while True:
+        divn, square = 3, 9
+        while square < seed and seed % divn != 0:
+            divn += 1
+            square += 4 * divn
+            divn += 1
+        if seed % divn != 0:
+            return seed
+        seed += 2
+
+
+def _mo_hash_table(keys):
+    """
+    Returns the hash table of a mo file whose msgids (bytes, with their
+    msgctxt but without their msgid_plural) are ``keys``, as a list of
+    integers: the table is made of the index of the keys plus one (zero
+    being an empty slot) and uses open addressing with double hashing, like
+    msgfmt does, so that gettext looks up the msgids in constant time.
+    """
+    size = _next_prime(len(keys) * 4 // 3)
+    if size <= 2:
+        size = 3
+    table = [0] * size
+    for index, key in enumerate(keys):
+        hval = _hashpjw(key)
+        idx = hval % size
+        if table[idx]:
+            # collision, use the second hash function
+            incr = 1 + hval % (size - 2)
+            while table[idx]:
+                if idx >= size - incr:
+                    idx -= size - incr
+                else:
+                    idx += incr
+        table[idx] = index + 1
+    return table
 
-        ``check_for_duplicates``
-            whether to check for duplicate entries when adding entries to the
-            file, (optional, default: ``False``).
-        """
-        list.__init__(self)
-        # the opened file handle
-        pofile = kwargs.get("pofile", None)
-        if pofile and _is_filepath(pofile):
-            self.fpath = pofile
-        else:
-            self.fpath = kwargs.get("fpath")
-        # the width at which lines should be wrapped
-        self.wrapwidth = kwargs.get("wrapwidth", 78)
-        # the file encoding
-        self.encoding = kwargs.get("encoding", default_encoding)
-        # whether to check for duplicate entries or not
-        self.check_for_duplicates = kwargs.get("check_for_duplicates", False)
-        # header
-        self.header = ""
-        # both po and mo files have metadata
-        self.metadata = {}
-        self.metadata_is_fuzzy = 0
 
-    def __str__(self):
-        """
-        Returns the string representation of the file.
-        """
-        ret = []
-        entries = [self.metadata_as_entry()] + [e for e in self if not e.obsolete]
-        for entry in entries:
-            ret.append(entry.__str__(self.wrapwidth))
-        for entry in self.obsolete_entries():
-            ret.append(entry.__str__(self.wrapwidth))
-        ret = "\n".join(ret)
-        return ret
+def _charset_exists(charset):
+    """
+    Check whether ``charset`` is valid or not.
+    """
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return False
+    return True
 
-    def __contains__(self, entry):
-        """
-        Overridden ``list`` method to implement the membership test (``in`` and
-        ``not in``).
-        The method considers that an entry is in the file if it finds an entry
-        that has the same msgid (the test is **case sensitive**) and the same
-        msgctxt (or none for both entries).
 
-        Argument:
+def _is_binary_stream(fileobj):
+    """
+    Returns whether ``fileobj`` is a file-like object opened in binary mode,
+    other objects are considered as text streams.
+    """
+    if isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    if isinstance(
+        fileobj, (io.TextIOBase, codecs.StreamWriter, codecs.StreamReaderWriter)
+    ):
+        # the codecs streams give the mode of the binary stream they wrap
+        return False
+    mode = getattr(fileobj, "mode", "")
+    return isinstance(mode, str) and "b" in mode
 
-        ``entry``
-            an instance of :class:`~polib._BaseEntry`.
-        """
-        return self.find(entry.msgid, by="msgid", msgctxt=entry.msgctxt) is not None
 
-    def __eq__(self, other):
-        return str(self) == str(other)
+def _find_charset(data):
+    """
+    Returns the first valid charset declared in ``data`` (bytes), or ``None``
+    if there is none, like :func:`~polib.detect_encoding` does for files.
+    """
+    for match in _CHARSET_BYTES_RE.finditer(data):
+        enc = match.group(1).strip().decode("utf-8")
+        if _charset_exists(enc):
+            return enc
+    return None
+
+
+# the characters escaped by escape() and the escape sequences understood by
+# unescape(), those of the C language like GNU gettext (the backslash must be
+# escaped first)
+_ESCAPES = {
+    "\\": "\\\\",
+    '"': '\\"',
+    "\a": "\\a",
+    "\b": "\\b",
+    "\f": "\\f",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+    "\v": "\\v",
+}
+_UNESCAPES = {v: k for k, v in _ESCAPES.items()}
+_UNESCAPE_RE = re.compile(
+    r'\\(?:[\\"abfnrtv]|(?:[0-7]{1,3}|x[0-9A-Fa-f]+)(?:\\(?:[0-7]{1,3}|x[0-9A-Fa-f]+))*)'
+)
+_NUMERIC_ESCAPE_RE = re.compile(r"\\(?:x([0-9A-Fa-f]+)|([0-7]{1,3}))")
+# the functions replacing the escape sequences, by encoding
+_UNESCAPE_REPLS = {}
 
-    def append(self, entry):
-        """
-        Overridden method that checks for duplicate entries. If a user tries to
-        add an entry that is already in the file, a ``ValueError`` exception
-        will be raised.
 
-        Argument:
+def escape(st):
+    """
+    Escapes the characters ``\\\\``, ``"`` and the control characters that
+    have a C escape sequence (``\\a``, ``\\b``, ``\\f``, ``\\n``,
+    ``\\r``, ``\\t`` and ``\\v``) in the given string ``st`` and returns it.
+    """
+    # chained str.replace() calls are faster than str.translate() or a regex
+    # substitution, the control characters are the only non printable
+    # characters that are escaped
+    if st.isprintable():
+        if "\\" not in st and '"' not in st:
+            return st
+        return st.replace("\\", r"\\").replace('"', r"\"")
+    for char, seq in _ESCAPES.items():
+        st = st.replace(char, seq)
+    return st
+
+
+def _unescape_repl(encoding):
+    """
+    Returns the function replacing an escape sequence or a run of numeric
+    escape sequences matched by ``_UNESCAPE_RE`` by its characters, the
+    numeric escapes being decoded with ``encoding``.
+    """
+    repl = _UNESCAPE_REPLS.get(encoding)
+    if repl is not None:
+        return repl
+
+    def repl(match):
+        seq = match.group()
+        char = _UNESCAPES.get(seq)
+        if char is not None:
+            return char
+        codes = [
+            int(hexa, 16) if hexa else int(octal, 8)
+            for hexa, octal in _NUMERIC_ESCAPE_RE.findall(seq)
+        ]
+        if max(codes) < 0x80:
+            return "".join(map(chr, codes))
+        try:
+            # the escapes of a run are the bytes of characters in the
+            # encoding of the file, like in gettext
+            return bytes(codes).decode(encoding)
+        except ValueError:
+            # a code above 255 or an invalid byte sequence
+            return seq
 
-        ``entry``
-            an instance of :class:`~polib._BaseEntry`.
-        """
-        # check_for_duplicates may not be defined (yet) when unpickling.
-        # But if pickling, we never want to check for duplicates anyway.
-        if getattr(self, "check_for_duplicates", False) and entry in self:
-            raise ValueError('Entry "%s" already exists' % entry.msgid)
-        super().append(entry)
+    _UNESCAPE_REPLS[encoding] = repl
+    return repl
 
-    def insert(self, index, entry):
-        """
-        Overridden method that checks for duplicates entries. If a user tries to
-        add an entry that is already in the file, a ``ValueError`` exception
-        will be raised.
 
-        Arguments:
+def unescape(st, encoding=None):
+    """
+    Unescapes the C escape sequences in the given string ``st`` and returns
+    it: ``\\\\``, ``\\"``, ``\\a``, ``\\b``, ``\\f``, ``\\n``,
+    ``\\r``, ``\\t``, ``\\v``, and the octal (``\\ooo``) and hexadecimal
+    (``\\xhh``) escapes. Like in gettext, the numeric escapes are bytes: a
+    run of them is decoded with ``encoding`` (the ``default_encoding`` global
+    variable if it is not given) and left as is if the bytes are not valid in
+    this encoding. Other backslashes are left as is.
+    """
+    if "\\" not in st:
+        return st
+    if encoding is None:
+        encoding = default_encoding
+    return _UNESCAPE_RE.sub(_unescape_repl(encoding), st)
 
-        ``index``
-            index at which the entry should be inserted.
 
-        ``entry``
-            an instance of :class:`~polib._BaseEntry`.
-        """
-        if self.check_for_duplicates and entry in self:
-            raise ValueError('Entry "%s" already exists' % entry.msgid)
-        super().insert(index, entry)
+# the regular expression used by textwrap to split texts in chunks, words are
+# split after some of their hyphens
+_WRAP_WORDSEP_RE = textwrap.TextWrapper.wordsep_re
 
-    def metadata_as_entry(self):
-        """
-        Returns the file metadata as a :class:`~polib.POFile` instance.
-        """
-        e = POEntry(msgid="")
-        mdata = self.ordered_metadata()
-        if mdata:
-            # Strip whitespace off each line in a multi-line entry
-            strs = [f"{name}: {value}" for name, value in mdata]
-            e.msgstr = "\n".join(strs) + "\n"
-        if self.metadata_is_fuzzy:
-            e.flags.append("fuzzy")
-        return e
+# matches a run of spaces
+_WRAP_SPACES_RE = re.compile(" +")
 
-    def save(self, fpath=None, repr_method="__str__"):
-        """
-        Saves the po file to ``fpath``.
-        If it is an existing file and no ``fpath`` is provided, then the
-        existing file is rewritten with the modified data.
 
-        Keyword arguments:
+def _wrap(text, width, indent="", drop_whitespace=True, break_on_hyphens=True):
+    """
+    Wraps ``text`` in lines of at most ``width`` characters, including the
+    ``indent`` prefixed to each line, and returns the list of lines.
+    The lines are the ones returned by ``textwrap.wrap()`` with the same
+    arguments and ``break_long_words=False``, but instead of splitting the
+    whole text in chunks and adding them to the lines one by one, the end of
+    each line is looked for around its last possible character.
+    """
+    if width <= 0 or not text.isprintable():
+        # textwrap replaces tabs and the other whitespace characters by spaces
+        # and raises ValueError for invalid widths
+        return textwrap.wrap(
+            text,
+            width,
+            initial_indent=indent,
+            subsequent_indent=indent,
+            drop_whitespace=drop_whitespace,
+            break_long_words=False,
+            break_on_hyphens=break_on_hyphens,
+        )
+    # the only whitespace of printable texts is the space
+    hyphens = break_on_hyphens and "-" in text
+    length = len(text)
+    width -= len(indent)
+    lines = []
+    start = 0
+    while start < length:
+        if drop_whitespace and lines and text[start] == " ":
+            # the spaces at the beginning of a line are dropped, except on the
+            # first one
+            start = _WRAP_SPACES_RE.match(text, start).end()
+            if start == length:
+                break
+        end = _wrap_end(text, start, start + width, hyphens)
+        stop = end
+        if drop_whitespace and text[end - 1] == " ":
+            # so are the spaces at the end of a line
+            stop = start + len(text[start:end].rstrip(" "))
+        if stop > start:
+            lines.append(indent + text[start:stop])
+        start = end
+    return lines
+
+
+def _wrap_end(text, start, limit, hyphens):
+    """
+    Returns the end of the line of ``text`` starting at ``start``: the last
+    chunk boundary (the beginning or the end of a word or a hyphen after which
+    textwrap splits it) up to ``limit``, or the end of the chunk at ``start``
+    if it does not fit.
+    """
+    length = len(text)
+    if limit >= length:
+        return length
+    if limit <= start:
+        if text[start] == " ":
+            return _WRAP_SPACES_RE.match(text, start).end()
+        pos = start
+    else:
+        space = text[limit - 1] == " "
+        if space != (text[limit] == " "):
+            return limit
+        if space:
+            # the line ends before the spaces around the limit
+            end = start + len(text[start:limit].rstrip(" "))
+            if end > start:
+                return end
+            return _WRAP_SPACES_RE.match(text, start).end()
+        pos = limit
+    # the line ends in the word around pos, the chunks of a word are the same
+    # whether it is split alone or with the whole text
+    word_start = text.rfind(" ", 0, pos) + 1
+    word_end = text.find(" ", pos)
+    if word_end < 0:
+        word_end = length
+    if hyphens and text.find("-", word_start, word_end) >= 0:
+        bounds = [word_start]
+        for chunk in _WRAP_WORDSEP_RE.split(text[word_start:word_end]):
+            if chunk:
+                bounds.append(bounds[-1] + len(chunk))
+    else:
+        bounds = [word_start, word_end]
+    if limit > start:
+        end = bounds[bisect.bisect_right(bounds, limit) - 1]
+        if end > start:
+            return end
+    return bounds[bisect.bisect_right(bounds, start)]
 
-        ``fpath``
-            string, full or relative path to the file.
 
-        ``repr_method``
-            string, the method to use for output.
-        """
-        if self.fpath is None and fpath is None:
-            raise TypeError("You must provide a file path to the save() method")
-        contents = getattr(self, repr_method)()
-        if fpath is None:
-            fpath = self.fpath
-        if repr_method == "to_binary":
-            fhandle = open(fpath, "wb")
-        else:
-            fhandle = open(fpath, "w", encoding=self.encoding)
-            if not isinstance(contents, str):
-                contents = contents.decode(self.encoding)
-        fhandle.write(contents)
-        fhandle.close()
-        # set the file path if not set
-        if self.fpath is None and fpath:
-            self.fpath = fpath
+def natural_sort(lst):
+    """
+    Sort naturally the given list.
+    Credits: http://stackoverflow.com/a/4836734
+    """
 
-    def find(self, st, by="msgid", include_obsolete_entries=False, msgctxt=False):
-        """
-        Find the entry which msgid (or property identified by the ``by``
-        argument) matches the string ``st``.
+    def convert(text):
+        return int(text) if text.isdigit() else text.lower()
 
-        Keyword arguments:
+    def alphanum_key(key):
+        return [convert(c) for c in re.split("([0-9]+)", key)]
 
-        ``st``
-            string, the string to search for.
+    return sorted(lst, key=alphanum_key)
 
-        ``by``
-            string, the property to use for comparison (default: ``msgid``).
 
-        ``include_obsolete_entries``
-            boolean, whether to also search in entries that are obsolete.
+def _index_keys(entry, by):
+    """
+    Returns the keys under which ``entry`` is indexed by its property ``by``:
+    the items of the property if it is a list, its value otherwise.
+    """
+    value = getattr(entry, by)
+    if isinstance(value, list):
+        # an entry is indexed once per distinct item
+        return dict.fromkeys(value)
+    return (value,)
 
-        ``msgctxt``
-            string, allows specifying a specific message context for the
-            search.
-        """
-        if include_obsolete_entries:
-            entries = self[:]
+
+def _index_entry(index, by, entry):
+    """
+    Adds ``entry`` to ``index``, the index of the property ``by``.
+    """
+    for key in _index_keys(entry, by):
+        entries = index.get(key)
+        if entries is None:
+            index[key] = [entry]
         else:
-            entries = [e for e in self if not e.obsolete]
-        matches = []
-        for e in entries:
-            if getattr(e, by) == st:
-                if msgctxt is not False and e.msgctxt != msgctxt:
-                    continue
-                matches.append(e)
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) > 1:
-            if not msgctxt:
-                # find the entry with no msgctx
-                e = None
-                for m in matches:
-                    if not m.msgctxt:
-                        e = m
-                if e:
-                    return e
-                # fallback to the first entry found
-                return matches[0]
-        return None
+            entries.append(entry)
 
-    def ordered_metadata(self):
-        """
-        Convenience method that returns an ordered version of the metadata
-        dictionary. The return value is list of tuples (metadata name,
-        metadata_value).
-        """
-        # copy the dict first
-        metadata = self.metadata.copy()
-        data_order = [
-            "Project-Id-Version",
-            "Report-Msgid-Bugs-To",
-            "POT-Creation-Date",
-            "PO-Revision-Date",
-            "Last-Translator",
-            "Language-Team",
-            "Language",
-            "MIME-Version",
-            "Content-Type",
-            "Content-Transfer-Encoding",
-            "Plural-Forms",
-        ]
-        ordered_data = []
-        for data in data_order:
-            try:
-                value = metadata.pop(data)
-                ordered_data.append((data, value))
-            except KeyError:
-                pass
-        # the rest of the metadata will be alphabetically ordered since there
-        # are no specs for this AFAIK
-        for data in natural_sort(metadata.keys()):
-            value = metadata[data]
-            ordered_data.append((data, value))
-        return ordered_data
 
-    def to_binary(self):
-        """
-        Return the binary representation of the file.
-        """
-        offsets = []
-        entries = self.translated_entries()
+def _move_in_index(index, entry, old, new):
+    """
+    Moves ``entry`` from the key ``old`` to the key ``new`` of ``index``,
+    returns ``False`` if the index must be built again instead: the order of
+    the entries already having the key ``new`` is not known.
+    """
+    if isinstance(new, (list, dict)):
+        # the keys are the items of the container, its old items are unknown
+        return False
+    if old == new:
+        return True
+    try:
+        entries = index.get(old, ())
+        if new in index:
+            return False
+    except TypeError:
+        # unhashable value
+        return False
+    positions = [i for i, e in enumerate(entries) if e is entry]
+    if len(positions) != 1:
+        # not in the index (a copy of an indexed entry), or in the file twice
+        return not positions
+    del entries[positions[0]]
+    if not entries:
+        del index[old]
+    index[new] = [entry]
+    return True
+
+
+class _FileToken:
+    """
+    Links the entries to the file whose caches hold them, the entries call
+    the file back through it when they change. The file takes a new token
+    when entries are removed from it: the removed entries keep the old one,
+    that no longer leads to the file.
+    """
 
-        # add metadata entry
-        entries.sort(key=lambda o: o.msgid_with_context.encode("utf-8"))
-        mentry = self.metadata_as_entry()
-        entries = [mentry] + entries
-        entries_len = len(entries)
-        ids, strs = b"", b""
-        for e in entries:
-            # For each string, we need size and file offset.  Each string is
-            # NUL terminated; the NUL does not count into the size.
-            msgid = b""
-            if e.msgctxt:
-                # Contexts are stored by storing the concatenation of the
-                # context, a <EOT> byte, and the original string
-                msgid = self._encode(e.msgctxt + "\4")
-            if e.msgid_plural:
-                msgstr = []
-                for index in sorted(e.msgstr_plural.keys()):
-                    msgstr.append(e.msgstr_plural[index])
-                msgid += self._encode(e.msgid + "\0" + e.msgid_plural)
-                msgstr = self._encode("\0".join(msgstr))
-            else:
-                msgid += self._encode(e.msgid)
-                msgstr = self._encode(e.msgstr)
-            offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
-            ids += msgid + b"\0"
-            strs += msgstr + b"\0"
-
-        # The header is 7 32-bit unsigned integers.
-        keystart = 7 * 4 + 16 * entries_len
-        # and the values start after the keys
-        valuestart = keystart + len(ids)
-        koffsets = []
-        voffsets = []
-        # The string table first has the list of keys, then the list of values.
-        # Each entry has first the size of the string, then the file offset.
-        for o1, l1, o2, l2 in offsets:
-            koffsets += [l1, o1 + keystart]
-            voffsets += [l2, o2 + valuestart]
-        offsets = koffsets + voffsets
-
-        output = struct.pack(
-            "Iiiiiii",
-            # Magic number
-            MOFile.MAGIC,
-            # Version
-            0,
-            # number of entries
-            entries_len,
-            # start of key index
-            7 * 4,
-            # start of value index
-            7 * 4 + entries_len * 8,
-            # size and offset of hash table, we don't use hash tables
-            0,
-            keystart,
-        )
-        output += array.array("i", offsets).tobytes()
-        output += ids
-        output += strs
-        return output
+    __slots__ = ("file",)
 
-    def _encode(self, mixed):
+    def __init__(self, file):
+        self.file = weakref.ref(file)
+
+    def owner(self):
         """
-        Encodes the given ``mixed`` argument with the file encoding if and
-        only if it's an unicode string and returns the encoded string.
+        Returns the file if the token is still its current one, else ``None``.
         """
-        if isinstance(mixed, str):
-            mixed = mixed.encode(self.encoding)
-        return mixed
+        file = self.file()
+        if file is not None and file.__dict__.get("_token") is self:
+            return file
+        return None
 
 
-class POFile(_BaseFile):
+def _own(entry, token):
     """
-    Po (or Pot) file reader/writer.
-    This class inherits the :class:`~polib._BaseFile` class and, by extension,
-    the python ``list`` type.
+    Records that the caches of the file of ``token`` hold ``entry``.
     """
+    owners = entry._owners
+    if owners is None or owners is token:
+        entry._owners = token
+    elif type(owners) is tuple:
+        if token not in owners:
+            # forget the files the entry was removed from
+            entry._owners = tuple(t for t in owners if t.owner() is not None) + (token,)
+    elif owners.owner() is None:
+        entry._owners = token
+    else:
+        # the entry is in several files
+        entry._owners = (owners, token)
 
-    def __str__(self):
-        """
-        Returns the string representation of the po file.
-        """
-        ret, headers = "", self.header.split("\n")
-        for header in headers:
-            if not len(header):
-                ret += "#\n"
-            elif header[:1] in [",", ":"]:
-                ret += "#%s\n" % header
-            else:
-                ret += "# %s\n" % header
 
-        if not isinstance(ret, str):
-            ret = ret.decode(self.encoding)
+def _entry_changed(entry, name, old):
+    """
+    Tells the files holding ``entry`` in their caches that its property
+    ``name`` was changed from ``old``.
+    """
+    owners = entry._owners
+    if type(owners) is not tuple:
+        owners = (owners,)
+    for token in owners:
+        file = token.owner()
+        if file is not None:
+            file._entry_changed(entry, name, old)
 
-        return ret + _BaseFile.__str__(self)
 
-    def save_as_mofile(self, fpath):
-        """
-        Saves the binary representation of the file to given ``fpath``.
+# the properties of the entries that change their status
+_STATUS_FIELDS = frozenset(("msgstr", "msgstr_plural", "flags", "obsolete"))
 
-        Keyword argument:
 
-        ``fpath``
-            string, full or relative path to the mo file.
-        """
-        _BaseFile.save(self, fpath, "to_binary")
+def _add_entry_status(status, entry):
+    """
+    Adds ``entry`` to the translated, untranslated, fuzzy and obsolete entries
+    of ``status``, dicts mapping the ids of the entries to the entries.
+    """
+    translated, untranslated, fuzzy, obsolete = status
+    key = id(entry)
+    if entry.translated():
+        translated[key] = entry
+    elif not entry.obsolete and not entry.fuzzy:
+        untranslated[key] = entry
+    if entry.fuzzy:
+        fuzzy[key] = entry
+    if entry.obsolete:
+        obsolete[key] = entry
+
+
+def _container(klass, value, entry):
+    """
+    Returns ``value`` as a container of ``klass`` belonging to ``entry``:
+    ``value`` itself if it is already one that belongs to no other entry, a
+    copy otherwise.
+    """
+    if type(value) is not klass or (
+        value._entry is not None and value._entry is not entry
+    ):
+        value = klass(value)
+    value._entry = entry
+    return value
 
-    def percent_translated(self):
-        """
-        Convenience method that returns the percentage of translated
-        messages.
-        """
-        total = len([e for e in self if not e.obsolete])
-        if total == 0:
-            return 100
-        translated = len(self.translated_entries())
-        return int(translated * 100 / float(total))
 
-    def translated_entries(self):
-        """
-        Convenience method that returns the list of translated entries.
-        """
-        return [e for e in self if e.translated()]
+def _container_changed(container):
+    """
+    Tells the files holding the entry of ``container`` that the container
+    changed in place.
+    """
+    entry = container._entry
+    if entry is not None and entry._owners is not None:
+        _entry_changed(entry, container._field, None)
 
-    def untranslated_entries(self):
-        """
-        Convenience method that returns the list of untranslated entries.
-        """
-        return [
-            e for e in self if not e.translated() and not e.obsolete and not e.fuzzy
-        ]
 
-    def fuzzy_entries(self):
-        """
-        Convenience method that returns the list of fuzzy entries.
-        """
-        return [e for e in self if e.fuzzy]
+class _TrackedList(list):
+    """
+    A list that tells the files holding its entry when it is modified, used
+    for the flags of the entries.
+    """
 
-    def obsolete_entries(self):
+    # the number of changes of the list, an entry is rendered again when the
+    # versions of its containers differ from the ones it was rendered with
+    _version = 0
+
+    # the entry holding the list and its property
+    _entry = None
+    _field = "flags"
+
+    def _changed(self):
         """
-        Convenience method that returns the list of obsolete entries.
+        Called after each change of the list.
         """
-        return [e for e in self if e.obsolete]
+        self._version += 1
+        _container_changed(self)
 
-    def merge(self, refpot):
-        """
-        Convenience method that merges the current pofile with the pot file
-        provided. It behaves exactly as the gettext msgmerge utility:
+    def __reduce_ex__(self, protocol):
+        # copies belong to the copy of the entry, that takes them when they
+        # are used
+        return type(self), (list(self),)
 
-        * comments of this file will be preserved, but extracted comments and
-          occurrences will be discarded;
-        * any translations or comments in the file will be discarded, however,
-          dot comments and file positions will be preserved;
-        * the fuzzy flags are preserved.
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._changed()
+        return result
 
-        Keyword argument:
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self._changed()
+        return result
 
-        ``refpot``
-            object POFile, the reference catalog.
-        """
-        # Store entries in dict/set for faster access
-        self_entries = {entry.msgid_with_context: entry for entry in self}
-        refpot_msgids = {entry.msgid_with_context for entry in refpot}
-        # Merge entries that are in the refpot
-        for entry in refpot:
-            e = self_entries.get(entry.msgid_with_context)
-            if e is None:
-                e = POEntry()
-                self.append(e)
-            e.merge(entry)
-        # ok, now we must "obsolete" entries that are not in the refpot anymore
-        for entry in self:
-            if entry.msgid_with_context not in refpot_msgids:
-                entry.obsolete = True
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
 
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
 
-class MOFile(_BaseFile):
+    def append(self, item):
+        super().append(item)
+        self._changed()
+
+    def extend(self, items):
+        super().extend(items)
+        self._changed()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._changed()
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+
+class _TrackedDict(dict):
     """
-    Mo file reader/writer.
-    This class inherits the :class:`~polib._BaseFile` class and, by
-    extension, the python ``list`` type.
+    A dict that tells the files holding its entry when it is modified, used
+    for the msgstr_plural of the entries.
     """
 
-    MAGIC = 0x950412DE
-    MAGIC_SWAPPED = 0xDE120495
+    # the number of changes of the dict and its entry, see _TrackedList
+    _version = 0
+    _entry = None
+    _field = "msgstr_plural"
 
-    def __init__(self, *args, **kwargs):
+    def _changed(self):
         """
-        Constructor, accepts all keywords arguments accepted by
-        :class:`~polib._BaseFile` class.
+        Called after each change of the dict.
         """
-        _BaseFile.__init__(self, *args, **kwargs)
-        self.magic_number = None
-        self.version = 0
+        self._version += 1
+        _container_changed(self)
 
-    def save_as_pofile(self, fpath):
-        """
-        Saves the mofile as a pofile to ``fpath``.
+    def __reduce_ex__(self, protocol):
+        # see _TrackedList
+        return type(self), (dict(self),)
 
-        Keyword argument:
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._changed()
+        return result
 
-        ``fpath``
-            string, full or relative path to the file.
-        """
-        _BaseFile.save(self, fpath)
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
 
-    def save(self, fpath=None):
-        """
-        Saves the mofile to ``fpath``.
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
 
-        Keyword argument:
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._changed()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+class _OccurrenceList(_TrackedList):
+    """
+    A list that tells the files holding its entry when it is modified, used
+    for the occurrences of the entries.
+    """
+
+    _field = "occurrences"
+
+
+class POParseError(ValueError):
+    """
+    Subclass of ``ValueError`` with the following additional properties:
+    msg: The unformatted error message
+    fpath: The path of the file being parsed
+    lineno: The index of the line in doc where parsing failed
+    """
+
+    def __init__(self, msg, fpath, lineno):
+        ValueError.__init__(self, f"{msg}: {fpath}(line {lineno})")
+        self.msg = msg
+        self.fpath = fpath
+        self.lineno = lineno
+
+    def __reduce__(self):
+        return self.__class__, (self.msg, self.fpath, self.lineno)
+
+
+class MOParseError(ValueError):
+    pass
+
+
+class _BaseFile(list):
+    """
+    Common base class for the :class:`~polib.POFile` and :class:`~polib.MOFile`
+    classes. This class should **not** be instantiated directly.
+    """
+
+    # the properties by which the entries are indexed
+    _indexed_fields = ("msgid",)
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts the following keyword arguments:
+
+        ``pofile``
+            string, the path to the po or mo file, or its contents as bytes.
+
+        ``wrapwidth``
+            integer, the wrap width, only useful when the ``-w`` option was
+            passed to xgettext (optional, default: ``78``).
+
+        ``encoding``
+            string, the encoding to use, defaults to the ``default_encoding``
+            global variable (optional).
+
+        ``check_for_duplicates``
+            whether to check for duplicate entries when adding entries to the
+            file, (optional, default: ``False``).
+        """
+        list.__init__(self)
+        # the opened file handle
+        pofile = kwargs.get("pofile", None)
+        if pofile and _is_filepath(pofile):
+            self.fpath = pofile
+        else:
+            self.fpath = kwargs.get("fpath")
+        # the width at which lines should be wrapped
+        self.wrapwidth = kwargs.get("wrapwidth", 78)
+        # the file encoding
+        self.encoding = kwargs.get("encoding", default_encoding)
+        # whether to check for duplicate entries or not
+        self.check_for_duplicates = kwargs.get("check_for_duplicates", False)
+        # header
+        self.header = ""
+        # both po and mo files have metadata
+        self.metadata = {}
+        self.metadata_is_fuzzy = 0
+
+    def __str__(self):
+        """
+        Returns the string representation of the file.
+        """
+        return "".join(self._iter_chunks())
+
+    def _iter_chunks(self):
+        """
+        Renders the file one piece at a time: the metadata entry and then each
+        entry, preceded by the blank line that separates it from the previous
+        one.
+        """
+        wrapwidth = self.wrapwidth
+        yield self.metadata_as_entry().__str__(wrapwidth)
+        for entry in self._output_order():
+            yield "\n"
+            yield entry.__str__(wrapwidth)
+
+    def iter_lines(self):
+        """
+        Yields the lines of the string representation of the file, each one
+        with its trailing newline, rendering the entries as they are needed so
+        that the whole file is never held in memory.
+        """
+        rest = ""
+        for chunk in self._iter_chunks():
+            lines = (rest + chunk).split("\n")
+            rest = lines.pop()
+            for line in lines:
+                yield line + "\n"
+        if rest:
+            yield rest
+
+    def write(self, fileobj):
+        """
+        Writes the string representation of the file to ``fileobj``: the
+        entries are rendered one by one and written in blocks, encoded with
+        the file encoding if ``fileobj`` is a binary stream.
+
+        Keyword argument:
+
+        ``fileobj``
+            a file-like object opened in text or binary mode.
+        """
+        encoding = self.encoding if _is_binary_stream(fileobj) else None
+        buf, size = [], 0
+        for chunk in self._iter_chunks():
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= _WRITE_SIZE:
+                data = "".join(buf)
+                fileobj.write(data if encoding is None else data.encode(encoding))
+                buf, size = [], 0
+        if buf:
+            data = "".join(buf)
+            fileobj.write(data if encoding is None else data.encode(encoding))
+
+    def __contains__(self, entry):
+        """
+        Overridden ``list`` method to implement the membership test (``in`` and
+        ``not in``).
+        The method considers that an entry is in the file if it finds an entry
+        that has the same msgid (the test is **case sensitive**) and the same
+        msgctxt (or none for both entries).
+
+        Argument:
+
+        ``entry``
+            an instance of :class:`~polib._BaseEntry`.
+        """
+        return self.find(entry.msgid, by="msgid", msgctxt=entry.msgctxt) is not None
+
+    def __eq__(self, other):
+        """
+        Two files are equal if they have the same header, metadata and
+        entries, obsolete entries being compared after the other ones as they
+        are written at the end of the file.
+        """
+        if not isinstance(other, _BaseFile):
+            return NotImplemented
+        if self is other:
+            return True
+        if (
+            len(self) != len(other)
+            or self.header != other.header
+            or bool(self.metadata_is_fuzzy) != bool(other.metadata_is_fuzzy)
+            or self.metadata != other.metadata
+        ):
+            return False
+        return self._output_order() == other._output_order()
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    # files are mutable
+    __hash__ = None
+
+    def _output_order(self):
+        """
+        Returns the list of the entries in the order they are written.
+        """
+        return [e for e in self if not e.obsolete] + [e for e in self if e.obsolete]
+
+    def append(self, entry):
+        """
+        Overridden method that checks for duplicate entries. If a user tries to
+        add an entry that is already in the file, a ``ValueError`` exception
+        will be raised.
+
+        Argument:
+
+        ``entry``
+            an instance of :class:`~polib._BaseEntry`.
+        """
+        # check_for_duplicates may not be defined (yet) when unpickling.
+        # But if pickling, we never want to check for duplicates anyway.
+        if getattr(self, "check_for_duplicates", False) and entry in self:
+            raise ValueError('Entry "%s" already exists' % entry.msgid)
+        super().append(entry)
+        if self.__dict__.get("_indexes") is not None:
+            self._add_to_indexes(entry)
+        if self.__dict__.get("_status") is not None:
+            self._add_to_status(entry)
+
+    def insert(self, index, entry):
+        """
+        Overridden method that checks for duplicates entries. If a user tries to
+        add an entry that is already in the file, a ``ValueError`` exception
+        will be raised.
+
+        Arguments:
+
+        ``index``
+            index at which the entry should be inserted.
+
+        ``entry``
+            an instance of :class:`~polib._BaseEntry`.
+        """
+        if self.check_for_duplicates and entry in self:
+            raise ValueError('Entry "%s" already exists' % entry.msgid)
+        super().insert(index, entry)
+        if self._built_indexes() is not None:
+            self._add_to_indexes(entry, inserted=True)
+        if self.__dict__.get("_status") is not None:
+            self._add_to_status(entry, inserted=True)
+
+    def extend(self, entries):
+        start = len(self)
+        super().extend(entries)
+        indexes = self._built_indexes()
+        status = self.__dict__.get("_status")
+        if indexes is not None or status is not None:
+            for entry in self[start:]:
+                if indexes is not None:
+                    self._add_to_indexes(entry)
+                if status is not None:
+                    self._add_to_status(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._entries_changed()
+        return self
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._entries_changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._entries_changed()
+
+    def remove(self, entry):
+        super().remove(entry)
+        self._entries_changed()
+
+    def pop(self, index=-1):
+        entry = super().pop(index)
+        self._entries_changed()
+        return entry
+
+    def clear(self):
+        super().clear()
+        self._entries_changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._entries_changed()
+
+    def reverse(self):
+        super().reverse()
+        self._entries_changed()
+
+    def __getstate__(self):
+        # copies must not share the indexes and the status
+        state = self.__dict__.copy()
+        state.pop("_indexes", None)
+        state.pop("_status", None)
+        state.pop("_status_unordered", None)
+        state.pop("_status_repeated", None)
+        state.pop("_token", None)
+        return state
+
+    def _entries_changed(self):
+        """
+        Drops the indexes and the cached status of the entries after a change
+        of the list, they are built again when needed.
+        """
+        self._indexes = None
+        self._status = None
+        self._token = None
+
+    def _get_token(self):
+        """
+        Returns the token given to the entries held by the caches of the file.
+        """
+        token = self.__dict__.get("_token")
+        if token is None:
+            token = self._token = _FileToken(self)
+        return token
+
+    def _entry_changed(self, entry, name, old):
+        """
+        Called when the property ``name`` of ``entry``, an entry held by the
+        caches of the file, was changed from ``old``: moves the entry in the
+        index of the property.
+        """
+        indexes = self.__dict__.get("_indexes")
+        if indexes is None or name not in indexes:
+            return
+        if not _move_in_index(indexes[name], entry, old, getattr(entry, name)):
+            # built again on next lookup
+            del indexes[name]
+
+    def create_index(self, by):
+        """
+        Indexes the entries of the file by the property identified by ``by``,
+        so that :meth:`~polib._BaseFile.find` and
+        :meth:`~polib._BaseFile.find_all` don't scan the whole file to look up
+        a value of this property. Entries are always indexed by msgid.
+
+        The index is built on first lookup and follows the entries added to
+        or removed from the file and the changes of their property, including
+        the changes made in place to lists like ``flags``.
+
+        Argument:
+
+        ``by``
+            string, the property to index, its values must be strings or lists
+            of hashable items (``flags``, ``occurrences``).
+        """
+        if by not in self._indexed_fields:
+            self._indexed_fields = self._indexed_fields + (by,)
+        indexes = self._built_indexes()
+        if indexes is not None:
+            indexes.pop(by, None)
+
+    def _built_indexes(self):
+        """
+        Returns the dict of the indexes already built, ``None`` if the indexes
+        must be built again because entries were removed from the file.
+        """
+        return self.__dict__.get("_indexes")
+
+    def _get_index(self, by):
+        """
+        Returns the index of the property ``by``, a dict mapping its values to
+        the lists of entries having them, in the order of the file, or
+        ``None`` if the property is not indexed.
+        """
+        if by not in self._indexed_fields:
+            return None
+        indexes = self._built_indexes()
+        if indexes is None:
+            indexes = self._indexes = {}
+        index = indexes.get(by)
+        if index is None:
+            index = indexes[by] = {}
+            token = self._get_token()
+            for entry in self:
+                _index_entry(index, by, entry)
+                _own(entry, token)
+        return index
+
+    def _add_to_indexes(self, entry, inserted=False):
+        """
+        Adds ``entry`` to the indexes that are built, ``inserted`` tells if the
+        entry was inserted instead of appended to the file.
+        """
+        indexes = self._built_indexes()
+        if indexes is None:
+            return
+        if inserted:
+            for by, index in indexes.items():
+                if any(key in index for key in _index_keys(entry, by)):
+                    # the order of the entries of a key matters to find()
+                    self._indexes = None
+                    return
+        for by, index in indexes.items():
+            _index_entry(index, by, entry)
+        _own(entry, self._get_token())
+
+    def _candidates(self, st, by):
+        """
+        Returns the entries that may have ``st`` as value of the property
+        ``by``, using its index if any.
+        """
+        index = self._get_index(by)
+        if index is None:
+            return self
+        try:
+            return index.get(st, ())
+        except TypeError:
+            # unhashable value, can't be an index key
+            return self
+
+    def metadata_as_entry(self):
+        """
+        Returns the file metadata as a :class:`~polib.POFile` instance.
+        """
+        e = POEntry(msgid="")
+        mdata = self.ordered_metadata()
+        if mdata:
+            # Strip whitespace off each line in a multi-line entry
+            strs = [f"{name}: {value}" for name, value in mdata]
+            e.msgstr = "\n".join(strs) + "\n"
+        if self.metadata_is_fuzzy:
+            e.flags.append("fuzzy")
+        return e
+
+    def save(self, fpath=None, repr_method="__str__"):
+        """
+        Saves the po file to ``fpath``.
+        If it is an existing file and no ``fpath`` is provided, then the
+        existing file is rewritten with the modified data.
+
+        Keyword arguments:
 
         ``fpath``
             string, full or relative path to the file.
+
+        ``repr_method``
+            string, the method to use for output.
+        """
+        if self.fpath is None and fpath is None:
+            raise TypeError("You must provide a file path to the save() method")
+        if fpath is None:
+            fpath = self.fpath
+        if repr_method == "to_binary":
+            # the mo file is streamed to the file
+            with open(fpath, "wb") as fhandle:
+                self.write_binary(fhandle)
+        elif repr_method == "__str__" and type(self).__str__ is _BaseFile.__str__:
+            # the po file is streamed to the file, unless a subclass renders it
+            # differently
+            with open(fpath, "w", encoding=self.encoding) as fhandle:
+                self.write(fhandle)
+        else:
+            contents = getattr(self, repr_method)()
+            fhandle = open(fpath, "w", encoding=self.encoding)
+            if not isinstance(contents, str):
+                contents = contents.decode(self.encoding)
+            fhandle.write(contents)
+            fhandle.close()
+        # set the file path if not set
+        if self.fpath is None and fpath:
+            self.fpath = fpath
+
+    def find(self, st, by="msgid", include_obsolete_entries=False, msgctxt=False):
+        """
+        Find the entry which msgid (or property identified by the ``by``
+        argument) matches the string ``st``.
+
+        Keyword arguments:
+
+        ``st``
+            string, the string to search for.
+
+        ``by``
+            string, the property to use for comparison (default: ``msgid``).
+
+        ``include_obsolete_entries``
+            boolean, whether to also search in entries that are obsolete.
+
+        ``msgctxt``
+            string, allows specifying a specific message context for the
+            search.
+        """
+        entries = self._candidates(st, by)
+        if not include_obsolete_entries:
+            entries = [e for e in entries if not e.obsolete]
+        matches = []
+        for e in entries:
+            if getattr(e, by) == st:
+                if msgctxt is not False and e.msgctxt != msgctxt:
+                    continue
+                matches.append(e)
+        if len(matches) == 1:
+            return matches[0]
+        elif len(matches) > 1:
+            if not msgctxt:
+                # find the entry with no msgctx
+                e = None
+                for m in matches:
+                    if not m.msgctxt:
+                        e = m
+                if e:
+                    return e
+                # fallback to the first entry found
+                return matches[0]
+        return None
+
+    def find_all(self, st, by="msgid", include_obsolete_entries=False, msgctxt=False):
+        """
+        Returns the list of the entries, in the order of the file, which msgid
+        (or property identified by the ``by`` argument) matches ``st``. If the
+        property is a list (like ``flags`` or ``occurrences``), the entries
+        having ``st`` among its items also match.
+
+        Keyword arguments:
+
+        ``st``
+            the value to search for.
+
+        ``by``
+            string, the property to use for comparison (default: ``msgid``).
+
+        ``include_obsolete_entries``
+            boolean, whether to also search in entries that are obsolete.
+
+        ``msgctxt``
+            string, allows specifying a specific message context for the
+            search.
+        """
+        matches = []
+        for e in self._candidates(st, by):
+            if not include_obsolete_entries and e.obsolete:
+                continue
+            if msgctxt is not False and e.msgctxt != msgctxt:
+                continue
+            value = getattr(e, by)
+            if value == st or (isinstance(value, list) and st in value):
+                matches.append(e)
+        return matches
+
+    def ordered_metadata(self):
+        """
+        Convenience method that returns an ordered version of the metadata
+        dictionary. The return value is list of tuples (metadata name,
+        metadata_value).
+        """
+        # copy the dict first
+        metadata = self.metadata.copy()
+        data_order = [
+            "Project-Id-Version",
+            "Report-Msgid-Bugs-To",
+            "POT-Creation-Date",
+            "PO-Revision-Date",
+            "Last-Translator",
+            "Language-Team",
+            "Language",
+            "MIME-Version",
+            "Content-Type",
+            "Content-Transfer-Encoding",
+            "Plural-Forms",
+        ]
+        ordered_data = []
+        for data in data_order:
+            try:
+                value = metadata.pop(data)
+                ordered_data.append((data, value))
+            except KeyError:
+                pass
+        # the rest of the metadata will be alphabetically ordered since there
+        # are no specs for this AFAIK
+        for data in natural_sort(metadata.keys()):
+            value = metadata[data]
+            ordered_data.append((data, value))
+        return ordered_data
+
+    def to_binary(self):
+        """
+        Return the binary representation of the file.
+        """
+        output = io.BytesIO()
+        self.write_binary(output)
+        return output.getvalue()
+
+    def write_binary(self, fileobj):
+        """
+        Writes the binary representation of the file, a mo file, to
+        ``fileobj``: each string is encoded once, the encoded strings are kept
+        in memory to build the tables and then written one by one, so that
+        they are never concatenated into a copy of the whole file.
+
+        Keyword argument:
+
+        ``fileobj``
+            a file-like object opened in binary mode.
+        """
+        encode = self._encode
+        strings = self._mo_strings()
+        # the entries are sorted by the bytes of their key, like msgfmt does,
+        # and the metadata comes first
+        strings.sort(key=lambda s: s[0])
+        mentry = self.metadata_as_entry()
+        strings.insert(0, (b"", b"", encode(mentry.msgstr)))
+        entries_len = len(strings)
+
+        # The hash table used by gettext to look up msgids, like msgfmt the
+        # msgid_plural of plural entries is not hashed
+        hash_table = _mo_hash_table([key for key, msgid, msgstr in strings])
+        hash_offset = 7 * 4 + 16 * entries_len
+        # The header is 7 32-bit unsigned integers, it is followed by the
+        # string tables, the hash table and the strings: the keys and then
+        # the values.
+        keystart = hash_offset + 4 * len(hash_table)
+        # The string table first has the list of keys, then the list of values.
+        # Each entry has first the size of the string, then the file offset.
+        # Each string is NUL terminated; the NUL does not count into the size.
+        koffsets = array.array("I", bytes(8 * entries_len))
+        voffsets = array.array("I", bytes(8 * entries_len))
+        offset = keystart
+        for i, (key, msgid, msgstr) in enumerate(strings):
+            koffsets[2 * i] = len(msgid)
+            koffsets[2 * i + 1] = offset
+            offset += len(msgid) + 1
+        for i, (key, msgid, msgstr) in enumerate(strings):
+            voffsets[2 * i] = len(msgstr)
+            voffsets[2 * i + 1] = offset
+            offset += len(msgstr) + 1
+
+        fileobj.write(
+            struct.pack(
+                "Iiiiiii",
+                # Magic number
+                MOFile.MAGIC,
+                # Version
+                0,
+                # number of entries
+                entries_len,
+                # start of key index
+                7 * 4,
+                # start of value index
+                7 * 4 + entries_len * 8,
+                # size and offset of hash table
+                len(hash_table),
+                hash_offset,
+            )
+        )
+        fileobj.write(koffsets.tobytes())
+        fileobj.write(voffsets.tobytes())
+        fileobj.write(array.array("I", hash_table).tobytes())
+        for key, msgid, msgstr in strings:
+            fileobj.write(msgid)
+            fileobj.write(b"\0")
+        for key, msgid, msgstr in strings:
+            fileobj.write(msgstr)
+            fileobj.write(b"\0")
+
+    def _mo_strings(self):
+        """
+        Returns the list of the strings of the translated entries written in
+        mo files: for each entry, the key used to sort the entries and to look
+        them up (the msgid with its context), the msgid to store (with the
+        msgid_plural) and the msgstr to store, encoded with the file encoding.
+        """
+        encode = self._encode
+        strings = []
+        for e in self.translated_entries():
+            key = encode(e.msgid)
+            if e.msgctxt:
+                # Contexts are stored by storing the concatenation of the
+                # context, a <EOT> byte, and the original string
+                key = encode(e.msgctxt + "\4") + key
+            if e.msgid_plural:
+                msgid = key + b"\0" + encode(e.msgid_plural)
+                msgstr_plural = e._msgstr_plural
+                msgstr = encode(
+                    "\0".join(msgstr_plural[i] for i in sorted(msgstr_plural))
+                )
+            else:
+                msgid = key
+                msgstr = encode(e.msgstr)
+            strings.append((key, msgid, msgstr))
+        return strings
+
+    def _encode(self, mixed):
+        """
+        Encodes the given ``mixed`` argument with the file encoding if and
+        only if it's an unicode string and returns the encoded string.
+        """
+        if isinstance(mixed, str):
+            mixed = mixed.encode(self.encoding)
+        return mixed
+
+
+class POFile(_BaseFile):
+    """
+    Po (or Pot) file reader/writer.
+    This class inherits the :class:`~polib._BaseFile` class and, by extension,
+    the python ``list`` type.
+    """
+
+    def _iter_chunks(self):
+        """
+        Renders the po file one piece at a time, starting with the header.
+        """
+        ret = []
+        for header in self.header.split("\n"):
+            if not len(header):
+                ret.append("#\n")
+            elif header[:1] in [",", ":"]:
+                ret.append("#%s\n" % header)
+            else:
+                ret.append("# %s\n" % header)
+        yield "".join(ret)
+        yield from _BaseFile._iter_chunks(self)
+
+    def save_as_mofile(self, fpath):
+        """
+        Saves the binary representation of the file to given ``fpath``.
+
+        Keyword argument:
+
+        ``fpath``
+            string, full or relative path to the mo file.
+        """
+        _BaseFile.save(self, fpath, "to_binary")
+
+    def percent_translated(self):
+        """
+        Convenience method that returns the percentage of translated
+        messages.
+        """
+        total = len(self) - self._status_count(3)
+        if total == 0:
+            return 100
+        return int(self._status_count(0) * 100 / float(total))
+
+    def translated_entries(self):
+        """
+        Convenience method that returns the list of translated entries.
+        """
+        return self._status_entries(0)
+
+    def untranslated_entries(self):
+        """
+        Convenience method that returns the list of untranslated entries.
+        """
+        return self._status_entries(1)
+
+    def fuzzy_entries(self):
+        """
+        Convenience method that returns the list of fuzzy entries.
+        """
+        return self._status_entries(2)
+
+    def obsolete_entries(self):
+        """
+        Convenience method that returns the list of obsolete entries.
+        """
+        return self._status_entries(3)
+
+    def _get_status(self):
+        """
+        Returns the translated, untranslated, fuzzy and obsolete entries, as
+        dicts mapping the ids of the entries to the entries, computed in a
+        single pass over the entries. They are cached and updated when
+        entries are added or changed, and computed again after other changes
+        of the file.
+        """
+        status = self.__dict__.get("_status")
+        if status is not None:
+            return status
+        self._status = status = [{}, {}, {}, {}]
+        # the partitions whose entries are not in the order of the file
+        self._status_unordered = set()
+        token = self._get_token()
+        for entry in self:
+            _add_entry_status(status, entry)
+            _own(entry, token)
+        translated, untranslated, fuzzy, obsolete = status
+        # whether an entry is in the file several times, the dicts only hold
+        # it once
+        self._status_repeated = len(translated) + len(untranslated) + len(
+            fuzzy.keys() | obsolete.keys()
+        ) != len(self)
+        return status
+
+    def _status_entries(self, partition):
+        """
+        Returns the list of the entries of the partition ``partition`` of the
+        status, in the order of the file.
+        """
+        status = self._get_status()
+        entries = status[partition]
+        if self._status_repeated:
+            return [entry for entry in self if id(entry) in entries]
+        if partition in self._status_unordered:
+            entries = status[partition] = {
+                id(entry): entry for entry in self if id(entry) in entries
+            }
+            self._status_unordered.discard(partition)
+        return list(entries.values())
+
+    def _status_count(self, partition):
+        """
+        Returns the number of entries of the partition ``partition`` of the
+        status.
+        """
+        entries = self._get_status()[partition]
+        if self._status_repeated:
+            return len(self._status_entries(partition))
+        return len(entries)
+
+    def _add_to_status(self, entry, inserted=False):
+        """
+        Adds ``entry``, appended to the file or inserted if ``inserted`` is
+        true, to the cached status.
+        """
+        status = self._status
+        key = id(entry)
+        if any(key in entries for entries in status):
+            self._status_repeated = True
+            return
+        _add_entry_status(status, entry)
+        if inserted:
+            self._status_unordered.update(
+                i
+                for i, entries in enumerate(status)
+                if key in entries and len(entries) > 1
+            )
+        _own(entry, self._get_token())
+
+    def _entry_changed(self, entry, name, old):
+        _BaseFile._entry_changed(self, entry, name, old)
+        status = self.__dict__.get("_status")
+        if status is None or name not in _STATUS_FIELDS:
+            return
+        # move the entry to the partitions of its new state
+        key = id(entry)
+        new = ({}, {}, {}, {})
+        _add_entry_status(new, entry)
+        for i, entries in enumerate(status):
+            if not new[i]:
+                entries.pop(key, None)
+            elif key not in entries:
+                if entries:
+                    # added after the entries that follow it in the file
+                    self._status_unordered.add(i)
+                entries[key] = entry
+
+    def merge(self, refpot):
+        """
+        Convenience method that merges the current pofile with the pot file
+        provided. It behaves exactly as the gettext msgmerge utility:
+
+        * comments of this file will be preserved, but extracted comments and
+          occurrences will be discarded;
+        * any translations or comments in the file will be discarded, however,
+          dot comments and file positions will be preserved;
+        * the fuzzy flags are preserved.
+
+        Keyword argument:
+
+        ``refpot``
+            object POFile, the reference catalog.
+        """
+        # Store entries in dict/set for faster access
+        self_entries = {entry.msgid_with_context: entry for entry in self}
+        refpot_msgids = {entry.msgid_with_context for entry in refpot}
+        # Merge entries that are in the refpot
+        for entry in refpot:
+            e = self_entries.get(entry.msgid_with_context)
+            if e is None:
+                # the msgid is set first to index the entry under it
+                e = POEntry(msgid=entry.msgid, msgctxt=entry.msgctxt)
+                self.append(e)
+            e.merge(entry)
+        # ok, now we must "obsolete" entries that are not in the refpot anymore
+        for entry in self:
+            if entry.msgid_with_context not in refpot_msgids:
+                entry.obsolete = True
+
+
+class MOFile(_BaseFile):
+    """
+    Mo file reader/writer.
+    This class inherits the :class:`~polib._BaseFile` class and, by
+    extension, the python ``list`` type.
+    """
+
+    MAGIC = 0x950412DE
+    MAGIC_SWAPPED = 0xDE120495
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts all keywords arguments accepted by
+        :class:`~polib._BaseFile` class.
+        """
+        _BaseFile.__init__(self, *args, **kwargs)
+        self.magic_number = None
+        self.version = 0
+
+    def save_as_pofile(self, fpath):
+        """
+        Saves the mofile as a pofile to ``fpath``.
+
+        Keyword argument:
+
+        ``fpath``
+            string, full or relative path to the file.
+        """
+        _BaseFile.save(self, fpath)
+
+    def save(self, fpath=None):
+        """
+        Saves the mofile to ``fpath``.
+
+        Keyword argument:
+
+        ``fpath``
+            string, full or relative path to the file.
+        """
+        _BaseFile.save(self, fpath, "to_binary")
+
+    def percent_translated(self):
+        """
+        Convenience method to keep the same interface with POFile instances.
+        """
+        return 100
+
+    def translated_entries(self):
+        """
+        Convenience method to keep the same interface with POFile instances.
+        """
+        return self
+
+    def untranslated_entries(self):
+        """
+        Convenience method to keep the same interface with POFile instances.
+        """
+        return []
+
+    def fuzzy_entries(self):
+        """
+        Convenience method to keep the same interface with POFile instances.
+        """
+        return []
+
+    def obsolete_entries(self):
+        """
+        Convenience method to keep the same interface with POFile instances.
+        """
+        return []
+
+
+def _entry_property(name):
+    """
+    Returns a property of the entries storing the field ``name`` in the slot
+    ``_name``, the rendered text of the entry is dropped when it is set.
+    """
+    attr = "_" + name
+
+    def fset(self, value):
+        self._rendered = None
+        if self._owners is None:
+            setattr(self, attr, value)
+            return
+        old = getattr(self, attr)
+        setattr(self, attr, value)
+        if value != old:
+            _entry_changed(self, name, old)
+
+    return property(operator.attrgetter(attr), fset)
+
+
+class _BaseEntry:
+    """
+    Base class for :class:`~polib.POEntry` and :class:`~polib.MOEntry` classes.
+    This class should **not** be instantiated directly.
+    """
+
+    # entries don't have a __dict__, the fields exposed by properties are
+    # stored in the slots prefixed by an underscore
+    __slots__ = (
+        "_msgid",
+        "_msgstr",
+        "_msgid_plural",
+        "_msgstr_plural",
+        "_msgctxt",
+        "_obsolete",
+        "encoding",
+        "_comment",
+        "_tcomment",
+        "_occurrences",
+        "_flags",
+        "_previous_msgctxt",
+        "_previous_msgid",
+        "_previous_msgid_plural",
+        # the token of the file holding the entry in its indexes or status, a
+        # tuple of tokens if there are several files, None if there are none
+        "_owners",
+        # the last rendered text of the entry, with the wrapwidth and the
+        # version of the containers it was rendered with, or None if a field
+        # was set since
+        "_rendered",
+    )
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts the following keyword arguments:
+
+        ``msgid``
+            string, the entry msgid.
+
+        ``msgstr``
+            string, the entry msgstr.
+
+        ``msgid_plural``
+            string, the entry msgid_plural.
+
+        ``msgstr_plural``
+            list, the entry msgstr_plural lines.
+
+        ``msgctxt``
+            string, the entry context (msgctxt).
+
+        ``obsolete``
+            bool, whether the entry is "obsolete" or not.
+
+        ``encoding``
+            string, the encoding to use, defaults to ``default_encoding``
+            global variable (optional).
+        """
+        # a new entry is in no file and not rendered yet, bypass the
+        # properties
+        self._owners = None
+        self._rendered = None
+        self._msgid = kwargs.get("msgid", "")
+        self._msgstr = kwargs.get("msgstr", "")
+        self._msgid_plural = kwargs.get("msgid_plural", "")
+        msgstr_plural = kwargs.get("msgstr_plural")
+        if msgstr_plural is None:
+            # empty containers are shared by the entries until they are used
+            self._msgstr_plural = ()
+        else:
+            self._msgstr_plural = _container(_TrackedDict, msgstr_plural, self)
+        self._msgctxt = kwargs.get("msgctxt", None)
+        self._obsolete = kwargs.get("obsolete", False)
+        self.encoding = kwargs.get("encoding", default_encoding)
+        self._occurrences = ()
+        self._flags = ()
+
+    @property
+    def msgid(self):
+        return self._msgid
+
+    @msgid.setter
+    def msgid(self, value):
+        old = self._msgid
+        self._rendered = None
+        self._msgid = value
+        if self._owners is not None and value != old:
+            # move the entry in the indexes of its files
+            _entry_changed(self, "msgid", old)
+
+    @property
+    def msgstr(self):
+        return self._msgstr
+
+    @msgstr.setter
+    def msgstr(self, value):
+        old = self._msgstr
+        self._rendered = None
+        self._msgstr = value
+        if self._owners is not None and value != old:
+            _entry_changed(self, "msgstr", old)
+
+    @property
+    def msgstr_plural(self):
+        msgstr_plural = self._msgstr_plural
+        if type(msgstr_plural) is not _TrackedDict or msgstr_plural._entry is not self:
+            # the dict is about to be exposed, track its changes
+            msgstr_plural = self._msgstr_plural = _container(
+                _TrackedDict, msgstr_plural, self
+            )
+        return msgstr_plural
+
+    @msgstr_plural.setter
+    def msgstr_plural(self, value):
+        self._rendered = None
+        self._msgstr_plural = _container(_TrackedDict, value, self)
+        if self._owners is not None:
+            _entry_changed(self, "msgstr_plural", None)
+
+    @property
+    def obsolete(self):
+        return self._obsolete
+
+    @obsolete.setter
+    def obsolete(self, value):
+        old = self._obsolete
+        self._rendered = None
+        self._obsolete = value
+        if self._owners is not None and value != old:
+            _entry_changed(self, "obsolete", old)
+
+    @property
+    def occurrences(self):
+        occurrences = self._occurrences
+        if type(occurrences) is not _OccurrenceList or occurrences._entry is not self:
+            # the packed occurrences are about to be exposed, track their
+            # changes
+            occurrences = self._occurrences = _container(
+                _OccurrenceList, occurrences, self
+            )
+        return occurrences
+
+    @occurrences.setter
+    def occurrences(self, value):
+        self._rendered = None
+        if type(value) is not tuple:
+            # tuples are kept as they are until the occurrences are used
+            value = _container(_OccurrenceList, value, self)
+        self._occurrences = value
+        if self._owners is not None:
+            _entry_changed(self, "occurrences", None)
+
+    @property
+    def flags(self):
+        flags = self._flags
+        if type(flags) is not _TrackedList or flags._entry is not self:
+            # the list is about to be exposed, track its changes
+            flags = self._flags = _container(_TrackedList, flags, self)
+        return flags
+
+    @flags.setter
+    def flags(self, value):
+        self._rendered = None
+        if type(value) is not tuple:
+            # see occurrences
+            value = _container(_TrackedList, value, self)
+        self._flags = value
+        if self._owners is not None:
+            _entry_changed(self, "flags", None)
+
+    # the fields that are not exposed by the properties above
+    msgid_plural = _entry_property("msgid_plural")
+    msgctxt = _entry_property("msgctxt")
+    comment = _entry_property("comment")
+    tcomment = _entry_property("tcomment")
+    previous_msgctxt = _entry_property("previous_msgctxt")
+    previous_msgid = _entry_property("previous_msgid")
+    previous_msgid_plural = _entry_property("previous_msgid_plural")
+
+    def __str__(self, wrapwidth=78):
+        """
+        Returns the string representation of the entry, it is rendered once
+        for a given ``wrapwidth`` and kept until the entry is modified.
+        """
+        version = self._containers_version()
+        rendered = self._rendered
+        if rendered is not None and rendered[0] == wrapwidth and rendered[1] == version:
+            return rendered[2]
+        ret = self._render(wrapwidth)
+        self._rendered = (wrapwidth, version, ret)
+        return ret
+
+    def _containers_version(self):
+        """
+        Returns the sum of the versions of the containers of the entry, that
+        changes when they are modified in place.
+        """
+        return getattr(self._msgstr_plural, "_version", 0)
+
+    def _render(self, wrapwidth):
+        """
+        Renders the string representation of the entry.
+        """
+        if self._obsolete:
+            delflag = "#~ "
+        else:
+            delflag = ""
+        ret = []
+        # write the msgctxt if any
+        if self._msgctxt is not None:
+            ret += self._str_field("msgctxt", delflag, "", self._msgctxt, wrapwidth)
+        # write the msgid
+        ret += self._str_field("msgid", delflag, "", self._msgid, wrapwidth)
+        # write the msgid_plural if any
+        if self._msgid_plural:
+            ret += self._str_field(
+                "msgid_plural", delflag, "", self._msgid_plural, wrapwidth
+            )
+        if self._msgstr_plural:
+            # write the msgstr_plural if any
+            msgstrs = self._msgstr_plural
+            keys = list(msgstrs)
+            keys.sort()
+            for index in keys:
+                msgstr = msgstrs[index]
+                plural_index = "[%s]" % index
+                ret += self._str_field(
+                    "msgstr", delflag, plural_index, msgstr, wrapwidth
+                )
+        else:
+            # otherwise write the msgstr
+            ret += self._str_field("msgstr", delflag, "", self._msgstr, wrapwidth)
+        ret.append("")
+        ret = "\n".join(ret)
+        return ret
+
+    def __eq__(self, other):
+        """
+        Two entries are equal if they have the same data written in po
+        files, whatever their line numbers, encodings and the order of their
+        occurrences.
+        """
+        if not isinstance(other, _BaseEntry):
+            return NotImplemented
+        if self is other:
+            return True
+        # most entries differ by their msgid, check it before the others
+        return self.msgid == other.msgid and self._fingerprint() == (
+            other._fingerprint()
+        )
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        return hash((self.msgid, self.msgctxt))
+
+    def __getstate__(self):
+        # copies don't belong to the files of the entry
+        slots = {}
+        for klass in type(self).__mro__:
+            for name in getattr(klass, "__slots__", ()):
+                try:
+                    slots[name] = klass.__dict__[name].__get__(self)
+                except AttributeError:
+                    pass
+        slots["_owners"] = slots["_rendered"] = None
+        for name in ("_msgstr_plural", "_occurrences", "_flags"):
+            value = slots.get(name)
+            if isinstance(value, (_TrackedList, _TrackedDict)):
+                # the containers tell their changes to one entry
+                slots[name] = type(value)(value)
+        return None, slots
+
+    def _fingerprint(self):
+        """
+        Returns the tuple of the data of the entry written in po files, that
+        is compared by ``==``.
+        """
+        msgstr_plural = self._msgstr_plural or None
+        return (
+            self.msgid,
+            # the msgstr is not written when there are plural forms
+            None if msgstr_plural else self.msgstr,
+            self.msgctxt,
+            self.msgid_plural,
+            msgstr_plural,
+            self.obsolete,
+        )
+
+    def _str_field(self, fieldname, delflag, plural_index, field, wrapwidth=78):
+        lines = field.splitlines(True)
+        if len(lines) > 1:
+            # start with initial empty line
+            lines = [""] + [escape(line) for line in lines]
+        else:
+            escaped_field = escape(field)
+            # each escaped character takes one more character
+            specialchars_count = len(escaped_field) - len(field)
+            # comparison must take into account fieldname length + one space
+            # + 2 quotes (eg. msgid "<string>")
+            flength = len(fieldname) + 3
+            if plural_index:
+                flength += len(plural_index)
+            real_wrapwidth = wrapwidth - flength + specialchars_count
+            if wrapwidth > 0 and len(field) > real_wrapwidth:
+                # Wrap the line but take field name into account, the escaped
+                # field is wrapped as is since its escape sequences are never
+                # split
+                lines = [""] + _wrap(
+                    escaped_field,
+                    wrapwidth - 2,  # 2 for quotes ""
+                    drop_whitespace=False,
+                )
+            else:
+                lines = [escaped_field]
+        if fieldname.startswith("previous_"):
+            # quick and dirty trick to get the real field name
+            fieldname = fieldname[9:]
+
+        ret = [f'{delflag}{fieldname}{plural_index} "{lines[0]}"']
+        for line in lines[1:]:
+            ret.append(f'{delflag}"{line}"')
+        return ret
+
+
+class POEntry(_BaseEntry):
+    """
+    Represents a po file entry.
+    """
+
+    __slots__ = ("linenum",)
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts the following keyword arguments:
+
+        ``comment``
+            string, the entry comment.
+
+        ``tcomment``
+            string, the entry translator comment.
+
+        ``occurrences``
+            list, the entry occurrences.
+
+        ``flags``
+            list, the entry flags.
+
+        ``previous_msgctxt``
+            string, the entry previous context.
+
+        ``previous_msgid``
+            string, the entry previous msgid.
+
+        ``previous_msgid_plural``
+            string, the entry previous msgid_plural.
+
+        ``linenum``
+            integer, the line number of the entry
+        """
+        _BaseEntry.__init__(self, *args, **kwargs)
+        self._comment = kwargs.get("comment", "")
+        self._tcomment = kwargs.get("tcomment", "")
+        occurrences = kwargs.get("occurrences")
+        if occurrences is not None:
+            self._occurrences = _container(_OccurrenceList, occurrences, self)
+        flags = kwargs.get("flags")
+        if flags is not None:
+            self._flags = _container(_TrackedList, flags, self)
+        self._previous_msgctxt = kwargs.get("previous_msgctxt", None)
+        self._previous_msgid = kwargs.get("previous_msgid", None)
+        self._previous_msgid_plural = kwargs.get("previous_msgid_plural", None)
+        self.linenum = kwargs.get("linenum", None)
+
+    def _containers_version(self):
+        return (
+            getattr(self._msgstr_plural, "_version", 0)
+            + getattr(self._flags, "_version", 0)
+            + getattr(self._occurrences, "_version", 0)
+        )
+
+    def _render(self, wrapwidth):
+        ret = []
+        obsolete = self._obsolete
+        # comments first, if any (with text wrapping as xgettext does)
+        if obsolete:
+            comments = [(self._tcomment, "# ")]
+        else:
+            comments = [(self._comment, "#. "), (self._tcomment, "# ")]
+        for c in comments:
+            val = c[0]
+            if val:
+                for comment in val.split("\n"):
+                    if wrapwidth > 0 and len(comment) + len(c[1]) > wrapwidth:
+                        ret += _wrap(comment, wrapwidth, c[1])
+                    else:
+                        ret.append("{}{}".format(c[1], comment))
+
+        # occurrences (with text wrapping as xgettext does)
+        if not obsolete and self._occurrences:
+            filelist = []
+            for fpath, lineno in self._occurrences:
+                if lineno:
+                    filelist.append(f"{fpath}:{lineno}")
+                else:
+                    filelist.append(fpath)
+            filestr = " ".join(filelist)
+            if wrapwidth > 0 and len(filestr) + 3 > wrapwidth:
+                # file names are not split on their hyphens
+                ret += _wrap(filestr, wrapwidth, "#: ", break_on_hyphens=False)
+            else:
+                ret.append("#: " + filestr)
+
+        # flags (TODO: wrapping ?)
+        if self._flags:
+            ret.append("#, %s" % ", ".join(self._flags))
+
+        # previous context and previous msgid/msgid_plural
+        fields = [
+            ("previous_msgctxt", self._previous_msgctxt),
+            ("previous_msgid", self._previous_msgid),
+            ("previous_msgid_plural", self._previous_msgid_plural),
+        ]
+        if obsolete:
+            prefix = "#~| "
+        else:
+            prefix = "#| "
+        for f, val in fields:
+            if val:
+                ret += self._str_field(f, prefix, "", val, wrapwidth)
+
+        ret.append(_BaseEntry._render(self, wrapwidth))
+        ret = "\n".join(ret)
+        return ret
+
+    def __cmp__(self, other):
+        """
+        Used to implement rich comparison.
+        """
+        # First: Obsolete test
+        if self.obsolete != other.obsolete:
+            if self.obsolete:
+                return -1
+            else:
+                return 1
+        # Work on a copy to protect original
+        occ1 = sorted(self._occurrences)
+        occ2 = sorted(other._occurrences)
+        pos = 0
+        if occ1 > occ2:
+            return 1
+        if occ1 < occ2:
+            return -1
+        # Compare context
+        msgctxt = self.msgctxt or 0
+        othermsgctxt = other.msgctxt or 0
+        if msgctxt > othermsgctxt:
+            return 1
+        elif msgctxt < othermsgctxt:
+            return -1
+        # Compare msgid_plural
+        msgid_plural = self.msgid_plural or 0
+        othermsgid_plural = other.msgid_plural or 0
+        if msgid_plural > othermsgid_plural:
+            return 1
+        elif msgid_plural < othermsgid_plural:
+            return -1
+        # Compare msgstr_plural
+        msgstr_plural = self._msgstr_plural or 0
+        othermsgstr_plural = other._msgstr_plural or 0
+        if msgstr_plural > othermsgstr_plural:
+            return 1
+        elif msgstr_plural < othermsgstr_plural:
+            return -1
+        # Compare msgid
+        if self.msgid > other.msgid:
+            return 1
+        elif self.msgid < other.msgid:
+            return -1
+        return 0
+        # Compare msgstr
+        if self.msgstr > other.msgstr:
+            return 1
+        elif self.msgstr < other.msgstr:
+            return -1
+        return 0
+
+    def __gt__(self, other):
+        return self.__cmp__(other) > 0
+
+    def __lt__(self, other):
+        return self.__cmp__(other) < 0
+
+    def __ge__(self, other):
+        return self.__cmp__(other) >= 0
+
+    def __le__(self, other):
+        return self.__cmp__(other) <= 0
+
+    def translated(self):
         """
-        _BaseFile.save(self, fpath, "to_binary")
+        Returns ``True`` if the entry has been translated or ``False``
+        otherwise.
+        """
+        if self.obsolete or self.fuzzy:
+            return False
+        if self.msgstr != "":
+            return True
+        msgstr_plural = self._msgstr_plural
+        if msgstr_plural:
+            for pos in msgstr_plural:
+                if msgstr_plural[pos] == "":
+                    return False
+            return True
+        return False
+
+    def merge(self, other):
+        """
+        Merge the current entry with the given pot entry.
+        """
+        self.msgid = other.msgid
+        self.msgctxt = other.msgctxt
+        # the containers of the other entry are copied
+        self.occurrences = tuple(other._occurrences)
+        self.comment = other.comment
+        fuzzy = self.fuzzy
+        self.flags = tuple(other._flags)
+        if fuzzy:
+            self.flags.append("fuzzy")
+        self.msgid_plural = other.msgid_plural
+        self.obsolete = other.obsolete
+        self.previous_msgctxt = other.previous_msgctxt
+        self.previous_msgid = other.previous_msgid
+        self.previous_msgid_plural = other.previous_msgid_plural
+        if other.msgstr_plural:
+            for pos in other.msgstr_plural:
+                try:
+                    # keep existing translation at pos if any
+                    self.msgstr_plural[pos]
+                except KeyError:
+                    self.msgstr_plural[pos] = ""
+
+    @property
+    def fuzzy(self):
+        return "fuzzy" in self._flags
+
+    @property
+    def msgid_with_context(self):
+        if self.msgctxt:
+            return "{}{}{}".format(self.msgctxt, "\x04", self.msgid)
+        return self.msgid
+
+    def _fingerprint(self):
+        obsolete = self.obsolete
+        return _BaseEntry._fingerprint(self) + (
+            # the extracted comments and occurrences of obsolete entries are
+            # not written, the order of the occurrences does not matter
+            None if obsolete else self.comment,
+            self.tcomment,
+            None if obsolete else sorted(self._occurrences),
+            tuple(self._flags),
+            self.previous_msgctxt,
+            self.previous_msgid,
+            self.previous_msgid_plural,
+        )
+
+
+class MOEntry(_BaseEntry):
+    """
+    Represents a mo file entry.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts the following keyword arguments,
+        for consistency with :class:`~polib.POEntry`:
+
+        ``comment``
+        ``tcomment``
+        ``occurrences``
+        ``flags``
+        ``previous_msgctxt``
+        ``previous_msgid``
+        ``previous_msgid_plural``
+
+        Note: even though these keyword arguments are accepted,
+        they hold no real meaning in the context of MO files
+        and are simply ignored.
+        """
+        _BaseEntry.__init__(self, *args, **kwargs)
+        self._comment = ""
+        self._tcomment = ""
+        self._previous_msgctxt = None
+        self._previous_msgid = None
+        self._previous_msgid_plural = None
+
+
+# The columnar catalog stores each field of its entries in a column holding
+# the values of all the entries encoded in utf-8 one after the other. Each
+# value starts with a marker byte, 0xFF for a string (or for each item of a
+# list) and 0xFE for None: these bytes never appear in utf-8, so the values
+# can be searched in the columns without decoding them.
+_COLUMN_STR = b"\xff"
+_COLUMN_NONE = b"\xfe"
+
+# the bits of the state of the entries of a columnar catalog, an entry is
+# translated when its state is _COLUMN_TRANSLATED: its msgstr (or all its
+# msgstr_plural) are translated and it is neither fuzzy nor obsolete
+_COLUMN_FUZZY = 1
+_COLUMN_OBSOLETE = 2
+_COLUMN_TRANSLATED = 4
+
+
+def _column_table(predicate):
+    """
+    Returns the table translating the states of the entries to 1 if they
+    satisfy ``predicate`` and to 0 otherwise.
+    """
+    return bytes(1 if predicate(state) else 0 for state in range(256))
+
+
+_COLUMN_TRANSLATED_TABLE = _column_table(lambda s: s == _COLUMN_TRANSLATED)
+_COLUMN_UNTRANSLATED_TABLE = _column_table(lambda s: s == 0)
+_COLUMN_FUZZY_TABLE = _column_table(lambda s: s & _COLUMN_FUZZY)
+_COLUMN_OBSOLETE_TABLE = _column_table(lambda s: s & _COLUMN_OBSOLETE)
+
+
+def _column_state(msgstr, msgstr_plural, flags, obsolete):
+    """
+    Returns the state of an entry having the given fields.
+    """
+    state = 0
+    if "fuzzy" in flags:
+        state |= _COLUMN_FUZZY
+    if obsolete:
+        state |= _COLUMN_OBSOLETE
+    if msgstr != "" or (msgstr_plural and "" not in msgstr_plural.values()):
+        state |= _COLUMN_TRANSLATED
+    return state
+
+
+def _encode_column_value(value):
+    if value is None:
+        return _COLUMN_NONE
+    return _COLUMN_STR + value.encode("utf-8", "surrogatepass")
+
+
+def _decode_column_value(raw):
+    if raw[:1] == _COLUMN_NONE:
+        return None
+    return raw[1:].decode("utf-8", "surrogatepass")
+
+
+def _encode_column_items(items):
+    return b"".join(
+        [_COLUMN_STR + item.encode("utf-8", "surrogatepass") for item in items]
+    )
+
+
+def _decode_column_items(raw):
+    return [
+        item.decode("utf-8", "surrogatepass") for item in raw.split(_COLUMN_STR)[1:]
+    ]
+
+
+def _encode_column_occurrences(occurrences):
+    # the line numbers are stored as strings, like the parser returns them
+    return _encode_column_items(
+        [str(item) for occurrence in occurrences for item in occurrence]
+    )
+
+
+def _decode_column_occurrences(raw):
+    items = _decode_column_items(raw)
+    return list(zip(items[::2], items[1::2]))
+
+
+def _encode_column_plurals(msgstr_plural):
+    if not msgstr_plural:
+        return b""
+    return _encode_column_items(
+        [item for key, value in msgstr_plural.items() for item in (str(key), value)]
+    )
+
+
+def _decode_column_plurals(raw):
+    items = _decode_column_items(raw)
+    return {int(key): value for key, value in zip(items[::2], items[1::2])}
+
+
+# the columns of the columnar catalog: the field they store, the attribute of
+# the entries holding it and the functions encoding and decoding its values
+_COLUMNS = (
+    ("msgid", "_msgid", _encode_column_value, _decode_column_value),
+    ("msgstr", "_msgstr", _encode_column_value, _decode_column_value),
+    ("msgctxt", "_msgctxt", _encode_column_value, _decode_column_value),
+    ("msgid_plural", "_msgid_plural", _encode_column_value, _decode_column_value),
+    (
+        "msgstr_plural",
+        "_msgstr_plural",
+        _encode_column_plurals,
+        _decode_column_plurals,
+    ),
+    ("comment", "_comment", _encode_column_value, _decode_column_value),
+    ("tcomment", "_tcomment", _encode_column_value, _decode_column_value),
+    (
+        "occurrences",
+        "_occurrences",
+        _encode_column_occurrences,
+        _decode_column_occurrences,
+    ),
+    ("flags", "_flags", _encode_column_items, _decode_column_items),
+    (
+        "previous_msgctxt",
+        "_previous_msgctxt",
+        _encode_column_value,
+        _decode_column_value,
+    ),
+    ("previous_msgid", "_previous_msgid", _encode_column_value, _decode_column_value),
+    (
+        "previous_msgid_plural",
+        "_previous_msgid_plural",
+        _encode_column_value,
+        _decode_column_value,
+    ),
+)
+
+
+class _Column:
+    """
+    A column of a :class:`~polib.ColumnarPOFile`: the encoded values of a
+    field of its entries, stored one after the other in a single buffer.
+    """
+
+    __slots__ = ("data", "offsets", "changed", "encode", "decode")
+
+    def __init__(self, encode, decode):
+        self.data = bytearray()
+        # the value of the row i is data[offsets[i]:offsets[i + 1]]
+        self.offsets = array.array("q", [0])
+        # the values of the rows changed after they were added
+        self.changed = {}
+        self.encode = encode
+        self.decode = decode
+
+    def append(self, raw):
+        """
+        Adds a row holding the encoded value ``raw``.
+        """
+        self.data += raw
+        self.offsets.append(len(self.data))
+
+    def get(self, row):
+        """
+        Returns the encoded value of ``row``.
+        """
+        if self.changed:
+            raw = self.changed.get(row)
+            if raw is not None:
+                return raw
+        offsets = self.offsets
+        return self.data[offsets[row] : offsets[row + 1]]
+
+    def search(self, needle):
+        """
+        Returns the set of the rows which encoded value contains ``needle``.
+        """
+        rows = set()
+        data = self.data
+        offsets = self.offsets
+        changed = self.changed
+        pos = data.find(needle)
+        while pos != -1:
+            row = bisect.bisect_right(offsets, pos) - 1
+            if row not in changed:
+                rows.add(row)
+            pos = data.find(needle, offsets[row + 1])
+        for row, raw in changed.items():
+            if needle in raw:
+                rows.add(row)
+        return rows
+
+
+class ColumnarPOFile:
+    """
+    Po (or Pot) file reader/writer storing its entries in columns, for very
+    large catalogs.
+
+    Each field of the entries is stored in a column holding the values of all
+    the entries encoded one after the other in a single buffer, and the
+    fuzzy, obsolete and translated states of the entries are stored in a
+    byte per entry. This uses less than half the memory of a
+    :class:`~polib.POFile`, and the status methods, the generation of mo
+    files and the merge work on the columns. Lookups search the encoded value
+    in the column of the property, there is no index.
+
+    Instances are returned by :func:`~polib.pofile` when it is given
+    ``klass=ColumnarPOFile``. They have the attributes and methods of
+    :class:`~polib.POFile` instances, except ``create_index()``, and support
+    ``len()``, iteration, indexing, item assignment and deletion,
+    ``append()``, ``extend()`` and ``insert()``, but not the other methods of
+    lists. The entries are :class:`~polib.POEntry` instances reading their
+    fields from the columns, the changes made to them are stored in the
+    catalog.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor, accepts the keyword arguments of the
+        :class:`~polib.POFile` class.
+        """
+        pofile = kwargs.get("pofile", None)
+        if pofile and _is_filepath(pofile):
+            self.fpath = pofile
+        else:
+            self.fpath = kwargs.get("fpath")
+        self.wrapwidth = kwargs.get("wrapwidth", 78)
+        self.encoding = kwargs.get("encoding", default_encoding)
+        self.check_for_duplicates = kwargs.get("check_for_duplicates", False)
+        self.header = ""
+        self.metadata = {}
+        self.metadata_is_fuzzy = 0
+        self._reset()
+
+    def _reset(self):
+        """
+        Empties the columns.
+        """
+        self._columns = {
+            name: _Column(encode, decode) for name, attr, encode, decode in _COLUMNS
+        }
+        self._linenums = array.array("q")
+        self._states = bytearray()
+        # the rows of the entries, in the order of the file
+        self._rows = array.array("q")
+        # whether the rows are in increasing order
+        self._ordered = True
+        # the hashes of the msgid_with_context of the entries, used to check
+        # for duplicates
+        self._keys = None
+
+    # the methods that don't depend on how the entries are stored
+    __str__ = _BaseFile.__str__
+    __contains__ = _BaseFile.__contains__
+    find = _BaseFile.find
+    find_all = _BaseFile.find_all
+    iter_lines = _BaseFile.iter_lines
+    metadata_as_entry = _BaseFile.metadata_as_entry
+    ordered_metadata = _BaseFile.ordered_metadata
+    save = _BaseFile.save
+    save_as_mofile = POFile.save_as_mofile
+    to_binary = _BaseFile.to_binary
+    write = _BaseFile.write
+    write_binary = _BaseFile.write_binary
+    _encode = _BaseFile._encode
+    _iter_chunks = POFile._iter_chunks
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        for row in self._rows:
+            yield _ColumnarPOEntry(self, row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_ColumnarPOEntry(self, row) for row in self._rows[index]]
+        return _ColumnarPOEntry(self, self._rows[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = array.array("q", [self._add_row(entry) for entry in value])
+        else:
+            value = self._add_row(value)
+        self._rows[index] = value
+        self._ordered = False
+
+    def __delitem__(self, index):
+        del self._rows[index]
+
+    def __eq__(self, other):
+        """
+        Compares the file with a :class:`~polib.POFile` or another columnar
+        file like :class:`~polib.POFile` instances are compared.
+        """
+        if not isinstance(other, (_BaseFile, ColumnarPOFile)):
+            return NotImplemented
+        if self is other:
+            return True
+        if (
+            len(self) != len(other)
+            or self.header != other.header
+            or bool(self.metadata_is_fuzzy) != bool(other.metadata_is_fuzzy)
+            or self.metadata != other.metadata
+        ):
+            return False
+        return all(a == b for a, b in zip(self._output_order(), other._output_order()))
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    # files are mutable
+    __hash__ = None
+
+    def append(self, entry):
+        """
+        Adds ``entry`` at the end of the file, a ``ValueError`` exception is
+        raised if it is already in the file and duplicates are checked.
+
+        Argument:
+
+        ``entry``
+            an instance of :class:`~polib._BaseEntry`.
+        """
+        self._check_duplicate(entry)
+        self._rows.append(self._add_row(entry))
+
+    def extend(self, entries):
+        """
+        Adds the given entries at the end of the file.
+
+        Argument:
+
+        ``entries``
+            an iterable of :class:`~polib._BaseEntry` instances.
+        """
+        for entry in entries:
+            self.append(entry)
+
+    def insert(self, index, entry):
+        """
+        Inserts ``entry`` at ``index``, a ``ValueError`` exception is raised
+        if it is already in the file and duplicates are checked.
+
+        Arguments:
+
+        ``index``
+            index at which the entry should be inserted.
+
+        ``entry``
+            an instance of :class:`~polib._BaseEntry`.
+        """
+        self._check_duplicate(entry)
+        self._rows.insert(index, self._add_row(entry))
+        self._ordered = False
 
     def percent_translated(self):
         """
-        Convenience method to keep the same interface with POFile instances.
+        Convenience method that returns the percentage of translated
+        messages.
         """
-        return 100
+        states = self._visible_states()
+        total = len(states) - states.translate(_COLUMN_OBSOLETE_TABLE).count(1)
+        if total == 0:
+            return 100
+        translated = states.translate(_COLUMN_TRANSLATED_TABLE).count(1)
+        return int(translated * 100 / float(total))
 
     def translated_entries(self):
         """
-        Convenience method to keep the same interface with POFile instances.
+        Convenience method that returns the list of translated entries.
         """
-        return self
+        return self._status_entries(_COLUMN_TRANSLATED_TABLE)
 
     def untranslated_entries(self):
         """
-        Convenience method to keep the same interface with POFile instances.
+        Convenience method that returns the list of untranslated entries.
         """
-        return []
+        return self._status_entries(_COLUMN_UNTRANSLATED_TABLE)
 
     def fuzzy_entries(self):
         """
-        Convenience method to keep the same interface with POFile instances.
+        Convenience method that returns the list of fuzzy entries.
         """
-        return []
+        return self._status_entries(_COLUMN_FUZZY_TABLE)
 
     def obsolete_entries(self):
         """
-        Convenience method to keep the same interface with POFile instances.
+        Convenience method that returns the list of obsolete entries.
+        """
+        return self._status_entries(_COLUMN_OBSOLETE_TABLE)
+
+    def merge(self, refpot):
+        """
+        Convenience method that merges the current pofile with the pot file
+        provided, like :meth:`~polib.POFile.merge` does. Only the entries that are
+        merged are decoded, the columns are then written again.
+
+        Keyword argument:
+
+        ``refpot``
+            object POFile or ColumnarPOFile, the reference catalog.
+        """
+        rows = self._rows
+        positions = {self._row_key(row): pos for pos, row in enumerate(rows)}
+        refpot_keys = set()
+        merged = {}
+        added = []
+        for entry in refpot:
+            key = entry.msgid_with_context.encode("utf-8", "surrogatepass")
+            refpot_keys.add(key)
+            pos = positions.get(key)
+            if pos is None:
+                e = POEntry()
+                added.append(e)
+            else:
+                e = merged.get(pos)
+                if e is None:
+                    e = merged[pos] = self._entry(rows[pos])
+            e.merge(entry)
+        # the entries that are not merged are copied without being decoded,
+        # those that are not in the refpot anymore become obsolete
+        columns, linenums, states = self._columns, self._linenums, self._states
+        self._reset()
+        new_columns = [
+            (columns[name], self._columns[name]) for name, attr, e, d in _COLUMNS
+        ]
+        new_rows = self._rows
+        for pos, row in enumerate(rows):
+            entry = merged.get(pos)
+            if entry is not None:
+                new_rows.append(self._add_row(entry))
+                continue
+            key = self._row_key(row, columns)
+            for column, new_column in new_columns:
+                new_column.append(column.get(row))
+            self._linenums.append(linenums[row])
+            state = states[row]
+            if key not in refpot_keys:
+                state |= _COLUMN_OBSOLETE
+            self._states.append(state)
+            new_rows.append(len(self._states) - 1)
+        for entry in added:
+            new_rows.append(self._add_row(entry))
+
+    def _add_row(self, entry):
+        """
+        Stores the fields of ``entry`` in a new row of the columns and
+        returns the row.
+        """
+        # the fields are all encoded before the columns are changed
+        raws = [encode(getattr(entry, attr)) for name, attr, encode, decode in _COLUMNS]
+        state = _column_state(
+            entry._msgstr, entry._msgstr_plural, entry._flags, entry._obsolete
+        )
+        linenum = getattr(entry, "linenum", None)
+        for column, raw in zip(self._columns.values(), raws):
+            data = column.data
+            data += raw
+            column.offsets.append(len(data))
+        self._linenums.append(-1 if linenum is None else linenum)
+        self._states.append(state)
+        row = len(self._states) - 1
+        if self._keys is not None:
+            self._keys.add(hash(self._row_key(row)))
+        return row
+
+    def _get(self, row, name):
+        """
+        Returns the value of the field ``name`` of ``row``.
+        """
+        if name == "obsolete":
+            return bool(self._states[row] & _COLUMN_OBSOLETE)
+        if name == "linenum":
+            linenum = self._linenums[row]
+            return None if linenum < 0 else linenum
+        column = self._columns[name]
+        return column.decode(column.get(row))
+
+    def _set(self, row, name, value):
+        """
+        Sets the value of the field ``name`` of ``row``.
+        """
+        if name == "obsolete":
+            state = self._states[row] & ~_COLUMN_OBSOLETE
+            self._states[row] = state | _COLUMN_OBSOLETE if value else state
+            return
+        if name == "linenum":
+            self._linenums[row] = -1 if value is None else value
+            return
+        column = self._columns[name]
+        column.changed[row] = column.encode(value)
+        if name in ("msgstr", "msgstr_plural", "flags"):
+            self._states[row] = _column_state(
+                self._get(row, "msgstr"),
+                self._get(row, "msgstr_plural"),
+                self._get(row, "flags"),
+                self._states[row] & _COLUMN_OBSOLETE,
+            )
+        elif name in ("msgid", "msgctxt") and self._keys is not None:
+            self._keys.add(hash(self._row_key(row)))
+
+    def _entry(self, row):
+        """
+        Returns a :class:`~polib.POEntry` holding the fields of ``row``.
+        """
+        kwargs = {
+            name: column.decode(column.get(row))
+            for name, column in self._columns.items()
+        }
+        linenum = self._linenums[row]
+        return POEntry(
+            obsolete=bool(self._states[row] & _COLUMN_OBSOLETE),
+            linenum=None if linenum < 0 else linenum,
+            encoding=self.encoding,
+            **kwargs,
+        )
+
+    def _row_key(self, row, columns=None):
+        """
+        Returns the encoded msgid_with_context of ``row``.
+        """
+        if columns is None:
+            columns = self._columns
+        msgid = columns["msgid"].get(row)[1:]
+        msgctxt = columns["msgctxt"].get(row)
+        if len(msgctxt) > 1:
+            return bytes(msgctxt[1:] + b"\x04" + msgid)
+        return bytes(msgid)
+
+    def _check_duplicate(self, entry):
+        """
+        Raises a ``ValueError`` exception if duplicates are checked and
+        ``entry`` is already in the file.
+        """
+        if not self.check_for_duplicates:
+            return
+        keys = self._keys
+        if keys is None:
+            keys = self._keys = {hash(self._row_key(row)) for row in self._rows}
+        key = entry.msgid_with_context.encode("utf-8", "surrogatepass")
+        # the hashes of the entries of the file may collide or be outdated
+        if hash(key) in keys and entry in self:
+            raise ValueError('Entry "%s" already exists' % entry.msgid)
+
+    def _positions(self, rows):
+        """
+        Returns the sorted list of the positions in the file of the given
+        rows, the rows that are not in the file are ignored.
+        """
+        visible = self._rows
+        if self._ordered:
+            positions = []
+            for row in rows:
+                pos = bisect.bisect_left(visible, row)
+                if pos < len(visible) and visible[pos] == row:
+                    positions.append(pos)
+            positions.sort()
+            return positions
+        return [pos for pos, row in enumerate(visible) if row in rows]
+
+    def _candidates(self, st, by):
+        """
+        Returns the entries that may have ``st`` as value of the property
+        ``by``, found by searching the encoded value in its column.
+        """
+        column = self._columns.get(by)
+        if column is None:
+            return self
+        if isinstance(st, str):
+            needle = _COLUMN_STR + st.encode("utf-8", "surrogatepass")
+        elif by == "occurrences" and isinstance(st, tuple):
+            needle = _encode_column_occurrences([st])
+        else:
+            return self
+        rows = self._rows
+        return [
+            _ColumnarPOEntry(self, rows[pos])
+            for pos in self._positions(column.search(needle))
+        ]
+
+    def _visible_states(self):
+        """
+        Returns the states of the entries, in the order of the file.
+        """
+        states = self._states
+        rows = self._rows
+        if self._ordered and len(rows) == len(states):
+            return bytes(states)
+        return bytes(map(states.__getitem__, rows))
+
+    def _status_entries(self, table):
+        """
+        Returns the list of the entries which state is translated to 1 by
+        ``table``.
+        """
+        matches = self._visible_states().translate(table)
+        rows = self._rows
+        entries = []
+        pos = matches.find(1)
+        while pos != -1:
+            entries.append(_ColumnarPOEntry(self, rows[pos]))
+            pos = matches.find(1, pos + 1)
+        return entries
+
+    def _output_order(self):
+        """
+        Yields the entries in the order they are written, as
+        :class:`~polib.POEntry` instances decoded once.
+        """
+        states = self._visible_states().translate(_COLUMN_OBSOLETE_TABLE)
+        rows = self._rows
+        for obsolete in (0, 1):
+            pos = states.find(obsolete)
+            while pos != -1:
+                yield self._entry(rows[pos])
+                pos = states.find(obsolete, pos + 1)
+
+    def _mo_strings(self):
         """
-        return []
+        Returns the list of the strings of the translated entries written in
+        mo files, see :meth:`~polib._BaseFile._mo_strings`. When the file is
+        encoded in utf-8, they are taken from the columns as is.
+        """
+        if codecs.lookup(self.encoding).name != "utf-8":
+            return _BaseFile._mo_strings(self)
+        columns = self._columns
+        msgids = columns["msgid"]
+        msgctxts = columns["msgctxt"]
+        msgid_plurals = columns["msgid_plural"]
+        msgstrs = columns["msgstr"]
+        msgstr_plurals = columns["msgstr_plural"]
+        matches = self._visible_states().translate(_COLUMN_TRANSLATED_TABLE)
+        rows = self._rows
+        strings = []
+        pos = matches.find(1)
+        while pos != -1:
+            row = rows[pos]
+            key = bytes(msgids.get(row)[1:])
+            msgctxt = msgctxts.get(row)
+            if len(msgctxt) > 1:
+                key = bytes(msgctxt[1:]) + b"\4" + key
+            msgid_plural = msgid_plurals.get(row)
+            if len(msgid_plural) > 1:
+                msgid = key + b"\0" + bytes(msgid_plural[1:])
+                items = msgstr_plurals.get(row).split(_COLUMN_STR)[1:]
+                msgstr_plural = sorted(zip(map(int, items[::2]), items[1::2]))
+                msgstr = b"\0".join([value for index, value in msgstr_plural])
+            else:
+                msgid = key
+                msgstr = bytes(msgstrs.get(row)[1:])
+            strings.append((key, msgid, msgstr))
+            pos = matches.find(1, pos + 1)
+        return strings
 
 
-class _BaseEntry:
+def _column_property(name):
     """
-    Base class for :class:`~polib.POEntry` and :class:`~polib.MOEntry` classes.
-    This class should **not** be instantiated directly.
+    Returns a property of :class:`~polib._ColumnarPOEntry` reading and writing
+    the field ``name`` in the catalog.
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        Constructor, accepts the following keyword arguments:
+    def fget(self):
+        return self._catalog._get(self._row, name)
 
-        ``msgid``
-            string, the entry msgid.
+    def fset(self, value):
+        self._catalog._set(self._row, name, value)
 
-        ``msgstr``
-            string, the entry msgstr.
+    return property(fget, fset)
 
-        ``msgid_plural``
-            string, the entry msgid_plural.
 
-        ``msgstr_plural``
-            list, the entry msgstr_plural lines.
+class _ColumnList(_TrackedList):
+    """
+    The flags or the occurrences of a :class:`~polib._ColumnarPOEntry`,
+    stored in the catalog when they are modified.
+    """
 
-        ``msgctxt``
-            string, the entry context (msgctxt).
+    def __init__(self, items, entry, name):
+        super().__init__(items)
+        self._entry = entry
+        self._field = name
 
-        ``obsolete``
-            bool, whether the entry is "obsolete" or not.
+    def _changed(self):
+        super()._changed()
+        self._entry._catalog._set(self._entry._row, self._field, self)
 
-        ``encoding``
-            string, the encoding to use, defaults to ``default_encoding``
-            global variable (optional).
-        """
-        self.msgid = kwargs.get("msgid", "")
-        self.msgstr = kwargs.get("msgstr", "")
-        self.msgid_plural = kwargs.get("msgid_plural", "")
-        self.msgstr_plural = kwargs.get("msgstr_plural", {})
-        self.msgctxt = kwargs.get("msgctxt", None)
-        self.obsolete = kwargs.get("obsolete", False)
-        self.encoding = kwargs.get("encoding", default_encoding)
+    def __reduce_ex__(self, protocol):
+        # copies are plain lists
+        return list, (list(self),)
 
-    def __str__(self, wrapwidth=78):
-        """
-        Returns the string representation of the entry.
-        """
-        if self.obsolete:
-            delflag = "#~ "
-        else:
-            delflag = ""
-        ret = []
-        # write the msgctxt if any
-        if self.msgctxt is not None:
-            ret += self._str_field("msgctxt", delflag, "", self.msgctxt, wrapwidth)
-        # write the msgid
-        ret += self._str_field("msgid", delflag, "", self.msgid, wrapwidth)
-        # write the msgid_plural if any
-        if self.msgid_plural:
-            ret += self._str_field(
-                "msgid_plural", delflag, "", self.msgid_plural, wrapwidth
-            )
-        if self.msgstr_plural:
-            # write the msgstr_plural if any
-            msgstrs = self.msgstr_plural
-            keys = list(msgstrs)
-            keys.sort()
-            for index in keys:
-                msgstr = msgstrs[index]
-                plural_index = "[%s]" % index
-                ret += self._str_field(
-                    "msgstr", delflag, plural_index, msgstr, wrapwidth
-                )
-        else:
-            # otherwise write the msgstr
-            ret += self._str_field("msgstr", delflag, "", self.msgstr, wrapwidth)
-        ret.append("")
-        ret = "\n".join(ret)
-        return ret
 
-    def __eq__(self, other):
-        return str(self) == str(other)
+class _ColumnDict(_TrackedDict):
+    """
+    The msgstr_plural of a :class:`~polib._ColumnarPOEntry`, stored in the
+    catalog when they are modified.
+    """
 
-    def _str_field(self, fieldname, delflag, plural_index, field, wrapwidth=78):
-        lines = field.splitlines(True)
-        if len(lines) > 1:
-            lines = [""] + lines  # start with initial empty line
-        else:
-            escaped_field = escape(field)
-            specialchars_count = 0
-            for c in ["\\", "\n", "\r", "\t", '"']:
-                specialchars_count += field.count(c)
-            # comparison must take into account fieldname length + one space
-            # + 2 quotes (eg. msgid "<string>")
-            flength = len(fieldname) + 3
-            if plural_index:
-                flength += len(plural_index)
-            real_wrapwidth = wrapwidth - flength + specialchars_count
-            if wrapwidth > 0 and len(field) > real_wrapwidth:
-                # Wrap the line but take field name into account
-                lines = [""] + [
-                    unescape(item)
-                    for item in textwrap.wrap(
-                        escaped_field,
-                        wrapwidth - 2,  # 2 for quotes ""
-                        drop_whitespace=False,
-                        break_long_words=False,
-                    )
-                ]
-            else:
-                lines = [field]
-        if fieldname.startswith("previous_"):
-            # quick and dirty trick to get the real field name
-            fieldname = fieldname[9:]
+    def __init__(self, items, entry):
+        super().__init__(items)
+        self._entry = entry
 
-        ret = [
-            '{}{}{} "{}"'.format(delflag, fieldname, plural_index, escape(lines.pop(0)))
-        ]
-        for line in lines:
-            ret.append('{}"{}"'.format(delflag, escape(line)))
-        return ret
+    def _changed(self):
+        super()._changed()
+        self._entry._catalog._set(self._entry._row, "msgstr_plural", self)
 
+    def __reduce_ex__(self, protocol):
+        # copies are plain dicts
+        return dict, (dict(self),)
 
-class POEntry(_BaseEntry):
+
+class _ColumnarPOEntry(POEntry):
     """
-    Represents a po file entry.
+    A :class:`~polib.POEntry` returned by a :class:`~polib.ColumnarPOFile`: it
+    only holds its catalog and its row, its fields are read from the columns
+    and its changes are stored in the catalog.
     """
 
-    def __init__(self, *args, **kwargs):
+    __slots__ = ("_catalog", "_row")
+
+    def __init__(self, catalog, row):
         """
-        Constructor, accepts the following keyword arguments:
+        Constructor.
 
-        ``comment``
-            string, the entry comment.
+        Arguments:
 
-        ``tcomment``
-            string, the entry translator comment.
+        ``catalog``
+            the :class:`~polib.ColumnarPOFile` holding the entry.
 
-        ``occurrences``
-            list, the entry occurrences.
+        ``row``
+            integer, the row of the entry in the columns of the catalog.
+        """
+        self._owners = None
+        self._catalog = catalog
+        self._row = row
+
+    # the attributes holding the fields of the other entries
+    _msgid = _column_property("msgid")
+    _msgstr = _column_property("msgstr")
+    _msgctxt = _column_property("msgctxt")
+    _msgid_plural = _column_property("msgid_plural")
+    _msgstr_plural = _column_property("msgstr_plural")
+    _obsolete = _column_property("obsolete")
+    _comment = _column_property("comment")
+    _tcomment = _column_property("tcomment")
+    _occurrences = _column_property("occurrences")
+    _flags = _column_property("flags")
+    _previous_msgctxt = _column_property("previous_msgctxt")
+    _previous_msgid = _column_property("previous_msgid")
+    _previous_msgid_plural = _column_property("previous_msgid_plural")
+    linenum = _column_property("linenum")
 
-        ``flags``
-            list, the entry flags.
+    @property
+    def encoding(self):
+        return self._catalog.encoding
 
-        ``previous_msgctxt``
-            string, the entry previous context.
+    def _get_msgstr_plural(self):
+        return _ColumnDict(self._msgstr_plural, self)
 
-        ``previous_msgid``
-            string, the entry previous msgid.
+    def _get_occurrences(self):
+        return _ColumnList(self._occurrences, self, "occurrences")
 
-        ``previous_msgid_plural``
-            string, the entry previous msgid_plural.
+    def _get_flags(self):
+        return _ColumnList(self._flags, self, "flags")
 
-        ``linenum``
-            integer, the line number of the entry
-        """
-        _BaseEntry.__init__(self, *args, **kwargs)
-        self.comment = kwargs.get("comment", "")
-        self.tcomment = kwargs.get("tcomment", "")
-        self.occurrences = kwargs.get("occurrences", [])
-        self.flags = kwargs.get("flags", [])
-        self.previous_msgctxt = kwargs.get("previous_msgctxt", None)
-        self.previous_msgid = kwargs.get("previous_msgid", None)
-        self.previous_msgid_plural = kwargs.get("previous_msgid_plural", None)
-        self.linenum = kwargs.get("linenum", None)
+    # the containers store their changes in the catalog
+    msgstr_plural = property(_get_msgstr_plural, _BaseEntry.msgstr_plural.fset)
+    occurrences = property(_get_occurrences, _BaseEntry.occurrences.fset)
+    flags = property(_get_flags, _BaseEntry.flags.fset)
 
     def __str__(self, wrapwidth=78):
-        """
-        Returns the unicode representation of the entry.
-        """
-        ret = []
-        # comments first, if any (with text wrapping as xgettext does)
-        if self.obsolete:
-            comments = [("tcomment", "# ")]
-        else:
-            comments = [("comment", "#. "), ("tcomment", "# ")]
-        for c in comments:
-            val = getattr(self, c[0])
-            if val:
-                for comment in val.split("\n"):
-                    if wrapwidth > 0 and len(comment) + len(c[1]) > wrapwidth:
-                        ret += textwrap.wrap(
-                            comment,
-                            wrapwidth,
-                            initial_indent=c[1],
-                            subsequent_indent=c[1],
-                            break_long_words=False,
-                        )
-                    else:
-                        ret.append("{}{}".format(c[1], comment))
-
-        # occurrences (with text wrapping as xgettext does)
-        if not self.obsolete and self.occurrences:
-            filelist = []
-            for fpath, lineno in self.occurrences:
-                if lineno:
-                    filelist.append(f"{fpath}:{lineno}")
-                else:
-                    filelist.append(fpath)
-            filestr = " ".join(filelist)
-            if wrapwidth > 0 and len(filestr) + 3 > wrapwidth:
-                # textwrap split words that contain hyphen, this is not
-                # what we want for filenames, so the dirty hack is to
-                # temporally replace hyphens with a char that a file cannot
-                # contain, like "*"
-                ret += [
-                    l.replace("*", "-")
-                    for l in textwrap.wrap(
-                        filestr.replace("-", "*"),
-                        wrapwidth,
-                        initial_indent="#: ",
-                        subsequent_indent="#: ",
-                        break_long_words=False,
-                    )
-                ]
-            else:
-                ret.append("#: " + filestr)
+        # the row can be changed through the other entries of the catalog, the
+        # rendered text is not kept
+        return self._render(wrapwidth)
+
+    def __reduce_ex__(self, protocol):
+        # copies are detached from the catalog
+        return self._catalog._entry(self._row).__reduce_ex__(protocol)
+
+
+# States of the _POFileParser state machine, each one is also the symbol
+# matched by the tokenizer for a line leading to this state:
+#     * ST: Beginning of the file (start)
+#     * HE: Header
+#     * TC: a translation comment
+#     * GC: a generated comment
+#     * OC: a file/line occurrence
+#     * FL: a flags line
+#     * CT: a message context
+#     * PC: a previous msgctxt
+#     * PM: a previous msgid
+#     * PP: a previous msgid_plural
+#     * MI: a msgid
+#     * MP: a msgid plural
+#     * MS: a msgstr
+#     * MX: a msgstr plural
+#     * MC: a msgid or msgstr continuation line (symbol only, the state is
+#       left unchanged)
+(
+    _ST,
+    _HE,
+    _TC,
+    _GC,
+    _OC,
+    _FL,
+    _CT,
+    _PC,
+    _PM,
+    _PP,
+    _MI,
+    _MP,
+    _MS,
+    _MX,
+    _MC,
+) = range(15)
+
+
+def _po_transitions():
+    """
+    Returns the transitions table of the po parser: a tuple indexed by symbol
+    holding the bit mask of the states in which the symbol is accepted.
+    """
+    all = (_ST, _HE, _GC, _OC, _FL, _CT, _PC, _PM, _PP, _TC, _MS, _MP, _MX, _MI)
+    transitions = {
+        _TC: (_ST, _HE, _GC, _OC, _FL, _TC, _PC, _PM, _PP, _MS, _MP, _MX, _MI),
+        _GC: all,
+        _OC: all,
+        _FL: all,
+        _PC: all,
+        _PM: all,
+        _PP: all,
+        _CT: (_ST, _HE, _GC, _OC, _FL, _TC, _PC, _PM, _PP, _MS, _MX),
+        _MI: (_ST, _HE, _GC, _OC, _FL, _CT, _TC, _PC, _PM, _PP, _MS, _MX),
+        _MP: (_TC, _GC, _PC, _PM, _PP, _MI),
+        _MS: (_MI, _MP, _TC),
+        _MX: (_MI, _MX, _MP, _TC),
+        _MC: (_CT, _MI, _MP, _MS, _MX, _PM, _PP, _PC),
+    }
+    masks = [0] * (_MC + 1)
+    for symbol, states in transitions.items():
+        for state in states:
+            masks[symbol] |= 1 << state
+    return tuple(masks)
+
+
+_PO_TRANSITIONS = _po_transitions()
+
+# the msgid, msgid_plural, msgctxt & msgstr keywords and their symbols
+_PO_KEYWORDS = {
+    b"msgctxt": _CT,
+    b"msgid": _MI,
+    b"msgstr": _MS,
+    b"msgid_plural": _MP,
+}
+
+# the keywords allowed in "previous translation" comments and their symbols
+_PO_PREVIOUS_KEYWORDS = {
+    b"msgid_plural": _PP,
+    b"msgid": _PM,
+    b"msgctxt": _PC,
+}
+
+# the entry fields a continuation line can be appended to, by state
+_PO_CONTINUED_FIELDS = {
+    _CT: "msgctxt",
+    _MI: "msgid",
+    _MP: "msgid_plural",
+    _MS: "msgstr",
+    _PP: "previous_msgid_plural",
+    _PM: "previous_msgid",
+    _PC: "previous_msgctxt",
+}
+
+# the entry fields the parser can skip and the symbol of their lines
+_PO_OPTIONAL_FIELDS = {
+    "occurrences": _OC,
+    "comment": _GC,
+    "tcomment": _TC,
+    "flags": _FL,
+    "previous_msgctxt": _PC,
+    "previous_msgid": _PM,
+    "previous_msgid_plural": _PP,
+}
+
+# the fields of the entries the parser always fills
+_PO_REQUIRED_FIELDS = {
+    "msgctxt",
+    "msgid",
+    "msgid_plural",
+    "msgstr",
+    "msgstr_plural",
+    "obsolete",
+}
+
+
+def _po_skipped_fields(fields=None, skip=None):
+    """
+    Returns the tuple of the entry fields the parser must skip, given the
+    ``fields`` to keep or the fields to ``skip`` (see :func:`~polib.pofile`).
+    """
+    known = _PO_REQUIRED_FIELDS.union(_PO_OPTIONAL_FIELDS)
+    skipped = set()
+    if fields is not None:
+        unknown = set(fields) - known
+        if unknown:
+            raise ValueError("unknown fields: %s" % ", ".join(sorted(unknown)))
+        skipped.update(set(_PO_OPTIONAL_FIELDS) - set(fields))
+    if skip is not None:
+        unknown = set(skip) - known
+        if unknown:
+            raise ValueError("unknown fields: %s" % ", ".join(sorted(unknown)))
+        required = _PO_REQUIRED_FIELDS.intersection(skip)
+        if required:
+            raise ValueError(
+                "fields that cannot be skipped: %s" % ", ".join(sorted(required))
+            )
+        skipped.update(skip)
+    return tuple(sorted(skipped))
 
-        # flags (TODO: wrapping ?)
-        if self.flags:
-            ret.append("#, %s" % ", ".join(self.flags))
 
-        # previous context and previous msgid/msgid_plural
-        fields = ["previous_msgctxt", "previous_msgid", "previous_msgid_plural"]
-        if self.obsolete:
-            prefix = "#~| "
-        else:
-            prefix = "#| "
-        for f in fields:
-            val = getattr(self, f)
-            if val:
-                ret += self._str_field(f, prefix, "", val, wrapwidth)
+# matches a double quote that is not escaped
+_UNESCAPED_QUOTE_RE = re.compile(r'([^\\]|^)"')
 
-        ret.append(_BaseEntry.__str__(self, wrapwidth))
-        ret = "\n".join(ret)
-        return ret
+# matches a blank line followed by a line that starts an entry (empty
+# comments are ignored by the parser so they cannot start an entry)
+_PO_SPLIT_RE = re.compile(
+    rb"\n[ \t\r\f\v]*\n"
+    rb"(?=[ \t]*(?:#~ )?(?:#[ \t\r\n]|#[.:,][ \t]*[!-~]|msgctxt\s|msgid\s))"
+)
 
-    def __cmp__(self, other):
-        """
-        Used to implement rich comparison.
-        """
-        # First: Obsolete test
-        if self.obsolete != other.obsolete:
-            if self.obsolete:
-                return -1
-            else:
-                return 1
-        # Work on a copy to protect original
-        occ1 = sorted(self.occurrences[:])
-        occ2 = sorted(other.occurrences[:])
-        pos = 0
-        if occ1 > occ2:
-            return 1
-        if occ1 < occ2:
-            return -1
-        # Compare context
-        msgctxt = self.msgctxt or 0
-        othermsgctxt = other.msgctxt or 0
-        if msgctxt > othermsgctxt:
-            return 1
-        elif msgctxt < othermsgctxt:
-            return -1
-        # Compare msgid_plural
-        msgid_plural = self.msgid_plural or 0
-        othermsgid_plural = other.msgid_plural or 0
-        if msgid_plural > othermsgid_plural:
-            return 1
-        elif msgid_plural < othermsgid_plural:
-            return -1
-        # Compare msgstr_plural
-        msgstr_plural = self.msgstr_plural or 0
-        othermsgstr_plural = other.msgstr_plural or 0
-        if msgstr_plural > othermsgstr_plural:
-            return 1
-        elif msgstr_plural < othermsgstr_plural:
-            return -1
-        # Compare msgid
-        if self.msgid > other.msgid:
-            return 1
-        elif self.msgid < other.msgid:
-            return -1
-        return 0
-        # Compare msgstr
-        if self.msgstr > other.msgstr:
-            return 1
-        elif self.msgstr < other.msgstr:
-            return -1
-        return 0
+# the minimum size of the parts of a po file parsed by the parallel parser
+_PO_MIN_CHUNK_SIZE = 1 << 20
 
-    def __gt__(self, other):
-        return self.__cmp__(other) > 0
 
-    def __lt__(self, other):
-        return self.__cmp__(other) < 0
+def _lazy_source(entry, name):
+    """
+    Returns the source of the lazy ``entry`` to load its attributes from,
+    raises ``AttributeError`` for ``name`` if the entry is already loaded.
+    """
+    try:
+        if not name.startswith("__") and name != "_lazy":
+            return entry._lazy
+    except AttributeError:
+        pass
+    raise AttributeError(
+        "'%s' object has no attribute '%s'" % (type(entry).__name__, name)
+    )
 
-    def __ge__(self, other):
-        return self.__cmp__(other) >= 0
 
-    def __le__(self, other):
-        return self.__cmp__(other) <= 0
+def _fill_slots(entry, source):
+    """
+    Sets the slots of ``entry`` that are not set yet to their value in
+    ``source``, an entry of a base class of the class of ``entry``.
+    """
+    for klass in type(source).__mro__:
+        for name in getattr(klass, "__slots__", ()):
+            slot = klass.__dict__[name]
+            try:
+                slot.__get__(entry)
+            except AttributeError:
+                slot.__set__(entry, slot.__get__(source))
 
-    def __eq__(self, other):
-        return self.__cmp__(other) == 0
 
-    def __ne__(self, other):
-        return self.__cmp__(other) != 0
+class _LazyPOEntry(POEntry):
+    """
+    A :class:`~polib.POEntry` returned by the lazy po parser, only its
+    msgctxt, msgid, obsolete and linenum attributes are set, the entry is
+    parsed the first time another attribute is accessed.
+    """
 
-    def translated(self):
-        """
-        Returns ``True`` if the entry has been translated or ``False``
-        otherwise.
-        """
-        if self.obsolete or self.fuzzy:
-            return False
-        if self.msgstr != "":
-            return True
-        if self.msgstr_plural:
-            for pos in self.msgstr_plural:
-                if self.msgstr_plural[pos] == "":
-                    return False
-            return True
-        return False
+    __slots__ = ("_lazy",)
 
-    def merge(self, other):
-        """
-        Merge the current entry with the given pot entry.
+    def __init__(self, source, start, end, first_line, **kwargs):
         """
-        self.msgid = other.msgid
-        self.msgctxt = other.msgctxt
-        self.occurrences = other.occurrences
-        self.comment = other.comment
-        fuzzy = self.fuzzy
-        self.flags = other.flags[:]  # clone flags
-        if fuzzy:
-            self.flags.append("fuzzy")
-        self.msgid_plural = other.msgid_plural
-        self.obsolete = other.obsolete
-        self.previous_msgctxt = other.previous_msgctxt
-        self.previous_msgid = other.previous_msgid
-        self.previous_msgid_plural = other.previous_msgid_plural
-        if other.msgstr_plural:
-            for pos in other.msgstr_plural:
-                try:
-                    # keep existing translation at pos if any
-                    self.msgstr_plural[pos]
-                except KeyError:
-                    self.msgstr_plural[pos] = ""
-
-    @property
-    def fuzzy(self):
-        return "fuzzy" in self.flags
+        Constructor.
 
-    @property
-    def msgid_with_context(self):
-        if self.msgctxt:
-            return "{}{}{}".format(self.msgctxt, "\x04", self.msgid)
-        return self.msgid
+        Arguments:
 
-    def __hash__(self):
-        return hash((self.msgid, self.msgstr))
+        ``source``
+            tuple, the contents of the po file as bytes, the encoding of
+            these bytes, the path of the file and the skipped fields.
 
+        ``start``
+            integer, the offset of the entry in the contents of the file.
 
-class MOEntry(_BaseEntry):
-    """
-    Represents a mo file entry.
-    """
+        ``end``
+            integer, the offset of the end of the entry.
 
-    def __init__(self, *args, **kwargs):
-        """
-        Constructor, accepts the following keyword arguments,
-        for consistency with :class:`~polib.POEntry`:
+        ``first_line``
+            integer, the number of the first line of the entry.
 
-        ``comment``
-        ``tcomment``
-        ``occurrences``
-        ``flags``
-        ``previous_msgctxt``
-        ``previous_msgid``
-        ``previous_msgid_plural``
+        Keyword arguments:
 
-        Note: even though these keyword arguments are accepted,
-        they hold no real meaning in the context of MO files
-        and are simply ignored.
+        ``msgctxt``, ``msgid``, ``obsolete``
+            the attributes of the entry found when scanning the file.
         """
-        _BaseEntry.__init__(self, *args, **kwargs)
-        self.comment = ""
-        self.tcomment = ""
-        self.occurrences = []
-        self.flags = []
-        self.previous_msgctxt = None
-        self.previous_msgid = None
-        self.previous_msgid_plural = None
-
-    def __hash__(self):
-        return hash((self.msgid, self.msgstr))
+        self._owners = None
+        self._msgctxt = kwargs.get("msgctxt")
+        self._msgid = kwargs.get("msgid", "")
+        self._obsolete = kwargs.get("obsolete", False)
+        self.linenum = first_line
+        self._lazy = (source, start, end)
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set yet
+        lazy = _lazy_source(self, name)
+        (data, encoding, fpath, skip), start, end = lazy
+        parser = _POFileParser(
+            data[start:end].splitlines(),
+            encoding=encoding,
+            fpath=fpath,
+            first_line=self.linenum,
+            complete=True,
+            skip=skip,
+        )
+        for entry in parser.iter_entries():
+            # attributes set before the entry was parsed are kept
+            _fill_slots(self, entry)
+        del self._lazy
+        return getattr(self, name)
 
 
 class _POFileParser:
@@ -1166,432 +3962,802 @@ class _POFileParser:
         Keyword arguments:
 
         ``pofile``
-            string, path to the po file or its contents
+            string, path to the po file or its contents, or list of the lines
+            of a part of a po file as bytes
 
         ``encoding``
-            string, the encoding to use, defaults to the ``default_encoding``
-            global variable (optional).
+            string, the encoding to use, if it is not given the encoding is
+            detected, the charset of files being looked for in their first
+            block (optional).
 
         ``check_for_duplicates``
             whether to check for duplicate entries when adding entries to the
             file (optional, default: ``False``).
+
+        ``fpath``
+            string, when ``pofile`` is a list of lines, the path of the file
+            they come from (optional).
+
+        ``first_line``
+            integer, when ``pofile`` is a part of a po file starting with an
+            entry (and not with the header), the number of its first line in
+            the file (optional).
+
+        ``complete``
+            whether ``pofile`` is a list of lines ending with a complete
+            entry, that must be yielded even if its last line is a comment
+            (optional, default: ``False``).
+
+        ``fields``, ``skip``
+            the fields of the entries to parse or to skip, see
+            :func:`~polib.pofile` (optional).
         """
-        enc = kwargs.get("encoding", default_encoding)
-        if _is_filepath(pofile):
-            try:
-                self.fhandle = open(pofile, "rt", encoding=enc)
-            except LookupError:
+        enc = kwargs.get("encoding")
+        fpath = kwargs.get("fpath")
+        # the lines are parsed as bytes, only the strings and comments are
+        # decoded with self.encoding
+        self.head = b""
+        if isinstance(pofile, list):
+            self.fhandle = pofile
+            self.encoding = enc = enc or default_encoding
+        elif _is_filepath(pofile):
+            # the file is read once: the charset is detected in the first
+            # block, which is then parsed by _iter_lines()
+            self.fhandle = open(pofile, "rb")
+            self.head = self.fhandle.read(_READ_SIZE)
+            if enc is None:
+                head = self.head
+                if len(head) == _READ_SIZE:
+                    head = head[: head.rfind(b"\n") + 1]
+                enc = _find_charset(head) or default_encoding
+            elif not _charset_exists(enc):
                 enc = default_encoding
-                self.fhandle = open(pofile, "rt", encoding=enc)
+            self.encoding = enc if _is_ascii_compatible(enc) else "utf-8"
         else:
-            self.fhandle = pofile.splitlines()
+            if enc is None:
+                enc = detect_encoding(pofile)
+            text = "\n".join(pofile.splitlines())
+            # the text is encoded in the charset of the file when possible,
+            # its numeric escapes are bytes in this charset
+            self.encoding = enc if _is_ascii_compatible(enc) else "utf-8"
+            try:
+                data = text.encode(self.encoding)
+            except UnicodeEncodeError:
+                self.encoding = "utf-8"
+                data = text.encode("utf-8")
+            self.fhandle = data.split(b"\n")
+        self.first_line = kwargs.get("first_line")
+        self.complete = kwargs.get("complete", False)
+        self.skip = _po_skipped_fields(kwargs.get("fields"), kwargs.get("skip"))
 
         klass = kwargs.get("klass")
         if klass is None:
             klass = POFile
         self.instance = klass(
-            pofile=pofile,
+            pofile=None if isinstance(pofile, list) else pofile,
+            fpath=fpath,
             encoding=enc,
             check_for_duplicates=kwargs.get("check_for_duplicates", False),
         )
-        self.transitions = {}
-        self.current_line = 0
-        self.current_entry = POEntry(linenum=self.current_line)
-        self.current_state = "st"
-        self.current_token = None
-        # two memo flags used in handlers
-        self.msgstr_index = 0
-        self.entry_obsolete = 0
-        # Configure the state machine, by adding transitions.
-        # Signification of symbols:
-        #     * ST: Beginning of the file (start)
-        #     * HE: Header
-        #     * TC: a translation comment
-        #     * GC: a generated comment
-        #     * OC: a file/line occurrence
-        #     * FL: a flags line
-        #     * CT: a message context
-        #     * PC: a previous msgctxt
-        #     * PM: a previous msgid
-        #     * PP: a previous msgid_plural
-        #     * MI: a msgid
-        #     * MP: a msgid plural
-        #     * MS: a msgstr
-        #     * MX: a msgstr plural
-        #     * MC: a msgid or msgstr continuation line
-        all = [
-            "st",
-            "he",
-            "gc",
-            "oc",
-            "fl",
-            "ct",
-            "pc",
-            "pm",
-            "pp",
-            "tc",
-            "ms",
-            "mp",
-            "mx",
-            "mi",
-        ]
-
-        self.add("tc", ["st", "he"], "he")
-        self.add(
-            "tc",
-            ["gc", "oc", "fl", "tc", "pc", "pm", "pp", "ms", "mp", "mx", "mi"],
-            "tc",
-        )
-        self.add("gc", all, "gc")
-        self.add("oc", all, "oc")
-        self.add("fl", all, "fl")
-        self.add("pc", all, "pc")
-        self.add("pm", all, "pm")
-        self.add("pp", all, "pp")
-        self.add(
-            "ct",
-            ["st", "he", "gc", "oc", "fl", "tc", "pc", "pm", "pp", "ms", "mx"],
-            "ct",
-        )
-        self.add(
-            "mi",
-            ["st", "he", "gc", "oc", "fl", "ct", "tc", "pc", "pm", "pp", "ms", "mx"],
-            "mi",
-        )
-        self.add("mp", ["tc", "gc", "pc", "pm", "pp", "mi"], "mp")
-        self.add("ms", ["mi", "mp", "tc"], "ms")
-        self.add("mx", ["mi", "mx", "mp", "tc"], "mx")
-        self.add("mc", ["ct", "mi", "mp", "ms", "mx", "pm", "pp", "pc"], "mc")
 
     def parse(self):
         """
-        Run the state machine, parse the file line by line and call process()
-        with the current matched symbol.
+        Run the state machine, parse the file line by line and add the
+        entries to the instance.
         """
+        instance = self.instance
+        # the metadata entry is the one find("") would return, while parsing
+        # we just remember the index of the entries that could be it
+        candidates = []
+        for entry in self.iter_entries():
+            if entry.msgid == "" and not entry.obsolete:
+                candidates.append(len(instance))
+            instance.append(entry)
+
+        if candidates:  # metadata found
+            metadataentry = instance[candidates[0]]
+            if len(candidates) > 1:
+                # like find(), prefer the last entry without msgctxt
+                for index in candidates:
+                    if not instance[index].msgctxt:
+                        metadataentry = instance[index]
+            # remove the first entry equal to the metadata entry, like
+            # list.remove() would do
+            for index in candidates:
+                entry = instance[index]
+                if entry is metadataentry or entry == metadataentry:
+                    del instance[index]
+                    break
+            self._set_metadata(metadataentry)
+        return instance
+
+    def iterparse(self):
+        """
+        Run the state machine like :meth:`parse` does, but without adding the
+        entries to the instance: the instance, holding only the header and the
+        metadata, is yielded first, then each entry is yielded as soon as it
+        is complete.
 
-        keywords = {
-            "msgctxt": "ct",
-            "msgid": "mi",
-            "msgstr": "ms",
-            "msgid_plural": "mp",
-        }
-        prev_keywords = {
-            "msgid_plural": "pp",
-            "msgid": "pm",
-            "msgctxt": "pc",
-        }
-        tokens = []
-        fpath = "%s " % self.instance.fpath if self.instance.fpath else ""
-        for line in self.fhandle:
-            self.current_line += 1
-            line = line.strip()
-            if line == "":
-                continue
+        Only the first entry of the file is considered as the metadata entry,
+        an empty msgid found later in the file is yielded as a regular entry.
+        """
+        entries = self.iter_entries()
+        first = next(entries, None)
+        if first is not None and first.msgid == "" and not first.obsolete:
+            self._set_metadata(first)
+            first = None
+        yield self.instance
+        if first is not None:
+            yield first
+        yield from entries
+
+    def iter_entries(self):
+        """
+        Generator that runs the state machine and yields the entries in the
+        order they appear in the file. The file is closed once exhausted (or
+        when the generator is closed).
+        """
+        try:
+            yield from self._iter_entries()
+        finally:
+            # close opened file
+            if not isinstance(self.fhandle, list):  # must be file
+                self.fhandle.close()
 
-            tokens = line.split(None, 2)
-            nb_tokens = len(tokens)
+    def _iter_entries(self):
+        """
+        The actual state machine loop, see :meth:`iter_entries`.
 
-            if tokens[0] == "#~|":
-                continue
+        Lines are dispatched on their first bytes and the handlers are
+        inlined, an entry is yielded as soon as a line belonging to the next
+        entry is found.
+        """
+        instance = self.instance
+        fpath = "%s " % instance.fpath if instance.fpath else ""
+        transitions = _PO_TRANSITIONS
+        keywords = _PO_KEYWORDS
+        quote_search = _UNESCAPED_QUOTE_RE.search
+        intern = sys.intern
+        encoding = self.encoding
+        # bit mask of the symbols of the skipped fields
+        skipped = 0
+        for field in self.skip:
+            skipped |= 1 << _PO_OPTIONAL_FIELDS[field]
+        lines = self.fhandle
+        if not isinstance(lines, list):
+            lines = _iter_lines(lines, self.head, instance.encoding)
+        if self.first_line is None:
+            lineno = 0
+            state = _ST
+        else:
+            # the text starts with an entry, start in a state where comments
+            # belong to the entry instead of the header
+            lineno = self.first_line - 1
+            state = _GC
+        entry = POEntry(linenum=self.first_line or lineno)
+        # index of the last msgstr plural found
+        msgstr_index = 0
+        # the fragments of the string being continued, they are joined when
+        # the string is complete instead of being concatenated one by one
+        fragments = None
+        # whether the last non empty line was a comment, trailing comments
+        # are ignored
+        comment = None
 
-            if tokens[0] == "#~" and nb_tokens > 1:
-                line = line[3:].strip()
-                tokens = tokens[1:]
-                nb_tokens -= 1
-                self.entry_obsolete = 1
-            else:
-                self.entry_obsolete = 0
-
-            # Take care of keywords like
-            # msgid, msgid_plural, msgctxt & msgstr.
-            if tokens[0] in keywords and nb_tokens > 1:
-                line = line[len(tokens[0]) :].lstrip()
-                if re.search(r'([^\\]|^)"', line[1:-1]):
-                    raise POParseError(
-                        "unescaped double quote found", fpath, self.current_line
-                    )
-                self.current_token = line
-                self.process(keywords[tokens[0]])
+        for line in lines:
+            lineno += 1
+            line = line.strip()
+            if not line:
                 continue
-
-            self.current_token = line
-
-            if tokens[0] == "#:":
-                if nb_tokens <= 1:
+            if not (32 < line[0] < 127 and 32 < line[-1] < 127):
+                line = _strip_line(line, encoding)
+                if not line:
                     continue
-                # we are on a occurrences line
-                self.process("oc")
 
-            elif line[:1] == '"':
-                # we are on a continuation line
-                if re.search(r'([^\\]|^)"', line[1:-1]):
-                    raise POParseError(
-                        "unescaped double quote found", fpath, self.current_line
-                    )
-                self.process("mc")
-
-            elif line[:7] == "msgstr[":
-                # we are on a msgstr plural
-                self.process("mx")
-
-            elif tokens[0] == "#,":
-                if nb_tokens <= 1:
+            first = line[:1]
+            obsolete = 0
+            if first == b"#" and line[1:2] == b"~":
+                marker = line[2:3]
+                if marker == b"|" and (len(line) == 3 or line[3:4].isspace()):
+                    # previous msgid of obsolete entries are ignored
+                    comment = True
                     continue
-                # we are on a flags line
-                self.process("fl")
+                if marker.isspace():
+                    line = line[3:].strip()
+                    first = line[:1]
+                    obsolete = 1
+            comment = first == b"#"
+
+            # tokenize the line: the matched symbol is stored in "symbol",
+            # the line in "token" and, for quoted strings, the decoded string
+            # between the quotes in "value"
+            token = line
+            if first == b'"':
+                # we are on a continuation line
+                value = line[1:-1].decode(encoding)
+                if '"' in value and quote_search(value):
+                    raise POParseError("unescaped double quote found", fpath, lineno)
+                symbol = _MC
+            elif first == b"m":
+                # take care of keywords like msgid, msgid_plural, msgctxt &
+                # msgstr.
+                words = line.split(None, 1)
+                symbol = keywords.get(words[0])
+                if symbol is not None and len(words) > 1:
+                    value = words[1][1:-1].decode(encoding)
+                    if '"' in value and quote_search(value):
+                        raise POParseError(
+                            "unescaped double quote found", fpath, lineno
+                        )
+                elif line[:7] == b"msgstr[":
+                    # we are on a msgstr plural
+                    symbol = _MX
+                else:
+                    raise POParseError("", fpath, lineno)
+            elif first == b"#":
+                marker = line[1:2]
+                if marker == b"#" or not marker or marker.isspace():
+                    # we are on a translator comment line
+                    symbol = _TC
+                elif len(line) > 2 and not line[2:3].isspace():
+                    raise POParseError("", fpath, lineno)
+                elif marker == b":":
+                    if len(line) == 2:
+                        continue
+                    # we are on a occurrences line
+                    symbol = _OC
+                elif marker == b",":
+                    if len(line) == 2:
+                        continue
+                    # we are on a flags line
+                    symbol = _FL
+                elif marker == b".":
+                    if len(line) == 2:
+                        continue
+                    # we are on a generated comment line
+                    symbol = _GC
+                elif marker == b"|":
+                    if len(line) == 2:
+                        raise POParseError("", fpath, lineno)
+                    # the marker of obsolete entries has already been removed
+                    tokens = line.split(None, 1 if obsolete else 2)
+                    # Remove the marker and any whitespace right after that.
+                    token = line[2:].lstrip()
+                    if tokens[1].startswith(b'"'):
+                        # Continuation of previous metadata.
+                        symbol = _MC
+                        value = token[1:-1].decode(encoding)
+                    elif len(tokens) == 2:
+                        # Invalid continuation line.
+                        raise POParseError("invalid continuation line", fpath, lineno)
+                    elif tokens[1] not in _PO_PREVIOUS_KEYWORDS:
+                        # Unknown keyword in previous translation comment.
+                        raise POParseError(
+                            f"unknown keyword {tokens[1].decode(encoding)}",
+                            fpath,
+                            lineno,
+                        )
+                    else:
+                        # we are on a "previous translation" comment line,
+                        # remove the keyword and any whitespace between it
+                        # and the starting quote.
+                        symbol = _PO_PREVIOUS_KEYWORDS[tokens[1]]
+                        value = token[len(tokens[1]) :].lstrip()[1:-1]
+                        value = value.decode(encoding)
+                else:
+                    raise POParseError("", fpath, lineno)
+            else:
+                raise POParseError("", fpath, lineno)
 
-            elif tokens[0] == "#" or tokens[0].startswith("##"):
-                if line == "#":
-                    line += " "
-                # we are on a translator comment line
-                self.process("tc")
+            # check the transition and run the handler of the symbol
+            if not transitions[symbol] >> state & 1:
+                raise POParseError("", fpath, lineno)
 
-            elif tokens[0] == "#.":
-                if nb_tokens <= 1:
+            if symbol == _MC:
+                # a msgid or msgstr continuation line, the state is not
+                # changed
+                if skipped >> state & 1:
                     continue
-                # we are on a generated comment line
-                self.process("gc")
-
-            elif tokens[0] == "#|":
-                if nb_tokens <= 1:
-                    raise POParseError("", fpath, self.current_line)
-
-                # Remove the marker and any whitespace right after that.
-                line = line[2:].lstrip()
-                self.current_token = line
+                if fragments is None:
+                    if state == _MX:
+                        fragments = [entry._msgstr_plural[msgstr_index]]
+                    else:
+                        fragments = [getattr(entry, _PO_CONTINUED_FIELDS[state])]
+                fragments.append(unescape(value, encoding))
+                continue
 
-                if tokens[1].startswith('"'):
-                    # Continuation of previous metadata.
-                    self.process("mc")
-                    continue
+            if fragments is not None:
+                # the continued string is complete, join it once
+                self._join_fragments(entry, state, msgstr_index, fragments)
+                fragments = None
+
+            if symbol == _TC and state <= _HE:
+                # a header comment
+                if instance.header != "":
+                    instance.header += "\n"
+                instance.header += token[2:].decode(encoding)
+                state = _HE
+                continue
 
-                if nb_tokens == 2:
-                    # Invalid continuation line.
-                    raise POParseError(
-                        "invalid continuation line", fpath, self.current_line
-                    )
-
-                # we are on a "previous translation" comment line,
-                if tokens[1] not in prev_keywords:
-                    # Unknown keyword in previous translation comment.
-                    raise POParseError(
-                        f"unknown keyword {tokens[1]}", fpath, self.current_line
-                    )
-
-                # Remove the keyword and any whitespace
-                # between it and the starting quote.
-                line = line[len(tokens[1]) :].lstrip()
-                self.current_token = line
-                self.process(prev_keywords[tokens[1]])
+            if state >= _MS and symbol not in (_MP, _MS, _MX):
+                # the line starts a new entry, the current one is complete
+                yield entry
+                entry = POEntry(linenum=lineno)
+            state = symbol
+            if skipped >> symbol & 1:
+                # the field of the line is not wanted
+                continue
 
-            else:
-                raise POParseError("", fpath, self.current_line)
-
-        if self.current_entry and len(tokens) > 0 and not tokens[0].startswith("#"):
-            # since entries are added when another entry is found, we must add
-            # the last entry here (only if there are lines). Trailing comments
-            # are ignored
-            self.instance.append(self.current_entry)
-
-        # before returning the instance, check if there's metadata and if
-        # so extract it in a dict
-        metadataentry = self.instance.find("")
-        if metadataentry:  # metadata found
-            # remove the entry
-            self.instance.remove(metadataentry)
-            self.instance.metadata_is_fuzzy = metadataentry.flags
-            key = None
-            for msg in metadataentry.msgstr.splitlines():
+            if symbol == _MI:
+                entry.obsolete = obsolete
+                entry.msgid = unescape(value, encoding)
+            elif symbol == _MS:
+                entry.msgstr = unescape(value, encoding)
+            elif symbol == _OC:
+                occurrences = []
+                for occurrence in token[3:].decode(encoding).split():
+                    fil, sep, num = occurrence.rpartition(":")
+                    if not sep or not num.isdigit():
+                        fil, num = occurrence, ""
+                    # the same files are referenced by many entries
+                    occurrences.append((intern(fil), num))
+                entry._occurrences += tuple(occurrences)
+            elif symbol == _TC:
+                if entry._tcomment != "":
+                    entry._tcomment += "\n"
+                tcomment = token.lstrip(b"#")
+                if tcomment.startswith(b" "):
+                    tcomment = tcomment[1:]
+                entry._tcomment += tcomment.decode(encoding)
+            elif symbol == _GC:
+                if entry._comment != "":
+                    entry._comment += "\n"
+                entry._comment += token[3:].decode(encoding)
+            elif symbol == _FL:
+                flags = token[3:].decode(encoding).split(",")
+                entry._flags += tuple([intern(c.strip()) for c in flags])
+            elif symbol == _CT:
+                entry._msgctxt = unescape(value, encoding)
+            elif symbol == _MX:
                 try:
-                    key, val = msg.split(":", 1)
-                    self.instance.metadata[key] = val.strip()
-                except (ValueError, KeyError):
-                    if key is not None:
-                        self.instance.metadata[key] += "\n" + msg.strip()
-        # close opened file
-        if not isinstance(self.fhandle, list):  # must be file
-            self.fhandle.close()
-        return self.instance
+                    msgstr_index = int(token[7:8])
+                except ValueError:
+                    raise POParseError("", fpath, lineno)
+                value = token[token.find(b'"') + 1 : -1].decode(encoding)
+                if not entry._msgstr_plural:
+                    entry._msgstr_plural = {}
+                entry._msgstr_plural[msgstr_index] = unescape(value, encoding)
+            elif symbol == _MP:
+                entry._msgid_plural = unescape(value, encoding)
+            elif symbol == _PM:
+                entry._previous_msgid = unescape(value, encoding)
+            elif symbol == _PC:
+                entry._previous_msgctxt = unescape(value, encoding)
+            elif symbol == _PP:
+                entry._previous_msgid_plural = unescape(value, encoding)
+
+        if fragments is not None:
+            self._join_fragments(entry, state, msgstr_index, fragments)
+        if comment is False or self.complete:
+            # since entries are yielded when another entry is found, we must
+            # yield the last entry here (only if there are lines). Trailing
+            # comments are ignored
+            yield entry
+
+    def _join_fragments(self, entry, state, msgstr_index, fragments):
+        """
+        Store the fragments of a continued string in the field of the entry
+        corresponding to the given state.
+        """
+        if state == _MX:
+            entry._msgstr_plural[msgstr_index] = "".join(fragments)
+        else:
+            setattr(entry, _PO_CONTINUED_FIELDS[state], "".join(fragments))
 
-    def add(self, symbol, states, next_state):
+    def _set_metadata(self, metadataentry):
         """
-        Add a transition to the state machine.
+        Extract the metadata of the given entry in the instance metadata dict.
+        """
+        self.instance.metadata_is_fuzzy = list(metadataentry._flags)
+        key = None
+        for msg in metadataentry.msgstr.splitlines():
+            try:
+                key, val = msg.split(":", 1)
+                self.instance.metadata[key] = val.strip()
+            except (ValueError, KeyError):
+                if key is not None:
+                    self.instance.metadata[key] += "\n" + msg.strip()
 
-        Keywords arguments:
 
-        ``symbol``
-            string, the matched token (two chars symbol).
+class _LazyPOFileParser(_POFileParser):
+    """
+    A po file parser that only scans the file to find the entries and their
+    msgctxt, msgid and obsolete attributes, each entry is parsed by
+    :class:`~polib._POFileParser` the first time it is accessed.
+    """
+
+    def __init__(self, pofile, *args, **kwargs):
+        """
+        Constructor, accepts the same arguments as
+        :class:`~polib._POFileParser`.
+        """
+        _POFileParser.__init__(self, pofile, *args, **kwargs)
+        if isinstance(self.fhandle, list):
+            data = b"\n".join(self.fhandle)
+        else:
+            with self.fhandle:
+                data = self.head + self.fhandle.read()
+            if self.encoding != self.instance.encoding:
+                # the file is transcoded to utf-8
+                data = data.decode(self.instance.encoding).encode("utf-8")
+        self.fhandle = []
+        self.source = (data, self.encoding, self.instance.fpath, self.skip)
+
+    def iter_entries(self):
+        """
+        Generator that yields the entries in the order they appear in the
+        file: the first entry is parsed right away with the header of the
+        file, the others are :class:`~polib._LazyPOEntry` instances.
+        """
+        data = self.source[0]
+        first = True
+        for start, end, first_line, msgctxt, msgid, obsolete in self._scan():
+            if first:
+                # the header is parsed with the first entry
+                first = False
+                yield from self._parse_header(data[:end], complete=True)
+                continue
+            yield _LazyPOEntry(
+                self.source,
+                start,
+                end,
+                first_line,
+                msgctxt=msgctxt,
+                msgid=msgid,
+                obsolete=obsolete,
+            )
+        if first:
+            # no entries, but there may be a header
+            yield from self._parse_header(data)
 
-        ``states``
-            list, a list of states (two chars symbols).
+    def _parse_header(self, data, complete=False):
+        """
+        Parse ``data``, the beginning of the file, with the regular parser
+        and set the header of the instance.
+        """
+        encoding, fpath, skip = self.source[1:]
+        parser = _POFileParser(
+            data.splitlines(),
+            encoding=encoding,
+            fpath=fpath,
+            complete=complete,
+            skip=skip,
+        )
+        yield from parser.iter_entries()
+        self.instance.header = parser.instance.header
 
-        ``next_state``
-            the next state the fsm will have after the action.
+    def _decode(self, fragments):
         """
-        for state in states:
-            action = getattr(self, "handle_%s" % next_state)
-            self.transitions[(symbol, state)] = (action, next_state)
+        Returns the string made of the given fragments of a quoted string.
+        """
+        encoding = self.source[1]
+        value = b"".join(fragments)
+        if b"\\" in value:
+            # fragments are unescaped separately, like the regular parser does
+            return "".join([unescape(f.decode(encoding), encoding) for f in fragments])
+        return value.decode(encoding)
+
+    def _scan(self):
+        """
+        Generator that yields, for each entry of the file, a tuple (start
+        offset, end offset, first line, msgctxt, msgid, obsolete).
 
-    def process(self, symbol):
+        Lines are classified like :meth:`~polib._POFileParser._iter_entries`
+        does but transitions are not checked, syntax errors are raised when
+        the entries are parsed.
         """
-        Process the transition corresponding to the current state and the
-        symbol provided.
+        data, encoding, fpath = self.source[:3]
+        pos = 0
+        lineno = 0
+        # the entry being scanned: start offset, first line, msgctxt, msgid
+        # and obsolete
+        current = None
+        # end offset of the last line of the current entry
+        end = 0
+        # index in current of the msgctxt or msgid being scanned, if any
+        field = None
+        fragments = None
+        in_msgstr = False
+        # whether the last non empty line was a comment, trailing comments
+        # are ignored
+        comment = None
+
+        for line in data.splitlines(True):
+            lineno += 1
+            start = pos
+            pos += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            if not (32 < line[0] < 127 and 32 < line[-1] < 127):
+                line = _strip_line(line, encoding)
+                if not line:
+                    continue
+
+            first = line[:1]
+            obsolete = 0
+            if first == b"#" and line[1:2] == b"~":
+                marker = line[2:3]
+                if marker == b"|" and (len(line) == 3 or line[3:4].isspace()):
+                    comment = True
+                    continue
+                if marker.isspace():
+                    line = line[3:].strip()
+                    first = line[:1]
+                    obsolete = 1
+            comment = first == b"#"
+
+            if first == b"#":
+                marker = line[1:2]
+                if len(line) == 2 and marker in (b":", b",", b"."):
+                    # empty comments are ignored
+                    continue
+                if marker == b"|" and line[2:].lstrip()[:1] == b'"':
+                    # continuation of a previous msgid
+                    first = b'"'
+                    line = line[2:].lstrip()
+            if first == b'"':
+                if field is not None:
+                    fragments.append(line[1:-1])
+                end = pos
+                continue
 
-        Keywords arguments:
+            if field is not None:
+                current[field] = self._decode(fragments)
+                field = None
+
+            keyword = line.split(None, 1)[0] if first == b"m" else None
+            if first == b"#" or keyword == b"msgid" or keyword == b"msgctxt":
+                # the line starts a new entry if the previous one is complete
+                if current is None:
+                    current = [0, None, None, "", False]
+                elif in_msgstr:
+                    yield (current[0], end) + tuple(current[1:])
+                    current = [start, lineno, None, "", False]
+                if keyword is not None and len(line) > len(keyword):
+                    field = 2 if keyword == b"msgctxt" else 3
+                    fragments = [line[len(keyword) :].lstrip()[1:-1]]
+                    if field == 3:
+                        current[4] = obsolete
+            elif current is None:
+                # a syntax error, raised when the entry is parsed
+                current = [0, None, None, "", False]
+            in_msgstr = keyword == b"msgstr" or line[:7] == b"msgstr["
+            end = pos
+
+        if field is not None:
+            current[field] = self._decode(fragments)
+        if current is None:
+            return
+        if comment is False:
+            yield (current[0], end) + tuple(current[1:])
+        elif current[1] is not None:
+            # trailing comments are ignored, but the syntax of the last entry
+            # still has to be checked
+            parser = _POFileParser(
+                data[current[0] : end].splitlines(),
+                encoding=encoding,
+                fpath=fpath,
+                first_line=current[1],
+            )
+            for entry in parser.iter_entries():
+                pass
 
-        ``symbol``
-            string, the matched token (two chars symbol).
 
-        ``linenum``
-            integer, the current line number of the parsed file.
+def _parse_po_chunk(task, skip=()):
+    """
+    Parse a part of a po file, this function runs in the worker processes of
+    :class:`~polib._ParallelPOFileParser` and returns the header of the file
+    (only found in the first part) and the entries. ``skip`` is the tuple of
+    the fields to skip.
+
+    The entries are returned as rows of field values, which are much faster
+    to pickle and unpickle than the entries themselves, and rebuilt in the
+    parent process.
+    """
+    source, start, end, encoding, fpath, first_line, complete = task
+    if isinstance(source, bytes):
+        data = source
+    else:
+        with open(source, "rb") as fhandle:
+            fhandle.seek(start)
+            data = fhandle.read(end - start)
+    parser = _POFileParser(
+        data.splitlines(),
+        encoding=encoding,
+        fpath=fpath,
+        first_line=first_line,
+        complete=complete,
+        skip=skip,
+    )
+    rows = _entries_to_rows(parser.iter_entries(), _PO_ENTRY_ATTRS)
+    return parser.instance.header, rows
+
+
+class _ParallelPOFileParser(_POFileParser):
+    """
+    A po file parser that splits the file between entries and parses the
+    parts with :class:`~polib._POFileParser` in a pool of processes.
+    """
+
+    def __init__(self, pofile, *args, **kwargs):
         """
-        try:
-            (action, state) = self.transitions[(symbol, self.current_state)]
-            if action():
-                self.current_state = state
-        except Exception:
-            raise POParseError("", "", self.current_line)  # TODO: missing fpath
-
-    # state handlers
-
-    def handle_he(self):
-        """Handle a header comment."""
-        if self.instance.header != "":
-            self.instance.header += "\n"
-        self.instance.header += self.current_token[2:]
-        return 1
-
-    def handle_tc(self):
-        """Handle a translator comment."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        if self.current_entry.tcomment != "":
-            self.current_entry.tcomment += "\n"
-        tcomment = self.current_token.lstrip("#")
-        if tcomment.startswith(" "):
-            tcomment = tcomment[1:]
-        self.current_entry.tcomment += tcomment
-        return True
+        Constructor, accepts the same arguments as
+        :class:`~polib._POFileParser` and:
 
-    def handle_gc(self):
-        """Handle a generated comment."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        if self.current_entry.comment != "":
-            self.current_entry.comment += "\n"
-        self.current_entry.comment += self.current_token[3:]
-        return True
+        ``workers``
+            integer, the number of processes to use.
+        """
+        _POFileParser.__init__(self, pofile, *args, **kwargs)
+        self.workers = kwargs["workers"]
+        self.tasks = []
+        fpath = self.instance.fpath
+        enc = self.encoding
+        if isinstance(self.fhandle, list):
+            data = b"\n".join(self.fhandle)
+            size = len(data)
+            self.tasks = [
+                (data[start:end], start, end, enc, None, first_line, end != size)
+                for start, end, first_line in self._split(data)
+            ]
+        elif self.encoding == self.instance.encoding:
+            fileno = self.fhandle.fileno()
+            size = os.fstat(fileno).st_size
+            if size:
+                with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as data:
+                    spans = self._split(data)
+                self.tasks = [
+                    (fpath, start, end, enc, fpath, first_line, end != size)
+                    for start, end, first_line in spans
+                ]
+        if len(self.tasks) == 1:
+            # the file is too small to be split
+            self.tasks = []
+        elif self.tasks and not isinstance(self.fhandle, list):
+            # the worker processes open the file themselves
+            self.fhandle.close()
 
-    def handle_oc(self):
-        """Handle a file:num occurrence."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        occurrences = self.current_token[3:].split()
-        for occurrence in occurrences:
-            if occurrence != "":
-                try:
-                    fil, line = occurrence.rsplit(":", 1)
-                    if not line.isdigit():
-                        fil = occurrence
-                        line = ""
-                    self.current_entry.occurrences.append((fil, line))
-                except (ValueError, AttributeError):
-                    self.current_entry.occurrences.append((occurrence, ""))
-        return True
+    def iter_entries(self):
+        """
+        Generator that yields the entries in the order they appear in the
+        file, once all the parts have been parsed.
+        """
+        if not self.tasks:
+            yield from _POFileParser.iter_entries(self)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            skip = [self.skip] * len(self.tasks)
+            results = executor.map(_parse_po_chunk, self.tasks, skip)
+            yield from self._iter_results(results)
+
+    def _iter_results(self, results):
+        for header, rows in results:
+            if header:
+                self.instance.header = header
+            yield from _entries_from_rows(POEntry, _PO_ENTRY_ATTRS, rows)
+
+    def _split(self, data):
+        """
+        Returns the list of the parts of ``data`` (bytes or mmap) to parse,
+        as tuples (start offset, end offset, first line), the first line of
+        the first part is ``None`` as it starts with the header.
 
-    def handle_fl(self):
-        """Handle a flags line."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.flags += [
-            c.strip() for c in self.current_token[3:].split(",")
-        ]
-        return True
+        The parts are split on blank lines found between the msgstr of an
+        entry and the first line of the next one, so that each part can be
+        parsed on its own.
+        """
+        size = len(data)
+        count = min(self.workers * 4, size // _PO_MIN_CHUNK_SIZE)
+        spans = []
+        start = 0
+        first_line = None
+        lineno = 1
+        for i in range(1, count):
+            pos = max(size * i // count, start)
+            while True:
+                match = _PO_SPLIT_RE.search(data, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if self._ends_with_msgstr(data, match.start()):
+                    break
+                pos -= 1
+            if match is None:
+                break
+            spans.append((start, pos, first_line))
+            chunk = data[start:pos]
+            lineno += chunk.count(b"\n")
+            if b"\r" in chunk:
+                # lone carriage returns also end lines
+                lineno += chunk.count(b"\r") - chunk.count(b"\r\n")
+            start, first_line = pos, lineno
+        spans.append((start, size, first_line))
+        return spans
+
+    def _ends_with_msgstr(self, data, pos):
+        """
+        Returns True if the last non empty line before the offset ``pos`` of
+        ``data`` is a msgstr, or the continuation of a msgstr.
+        """
+        while pos > 0:
+            start = data.rfind(b"\n", 0, pos) + 1
+            line = data[start:pos].strip()
+            if line.startswith(b"#~ "):
+                line = line[3:].lstrip()
+            if line.startswith(b"msgstr"):
+                return True
+            if line and not line.startswith(b'"'):
+                return False
+            pos = start - 1
+        return False
 
-    def handle_pp(self):
-        """Handle a previous msgid_plural line."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.previous_msgid_plural = unescape(self.current_token[1:-1])
-        return True
 
-    def handle_pm(self):
-        """Handle a previous msgid line."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.previous_msgid = unescape(self.current_token[1:-1])
-        return True
+class _LazyMOEntry(MOEntry):
+    """
+    A :class:`~polib.MOEntry` returned by the memory mapped mo parser, its
+    msgid and msgstr are decoded the first time one of its attributes is
+    accessed.
+    """
 
-    def handle_pc(self):
-        """Handle a previous msgctxt line."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.previous_msgctxt = unescape(self.current_token[1:-1])
-        return True
+    __slots__ = ("_lazy",)
 
-    def handle_ct(self):
-        """Handle a msgctxt."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.msgctxt = unescape(self.current_token[1:-1])
-        return True
+    def __init__(self, source, index):
+        """
+        Constructor.
 
-    def handle_mi(self):
-        """Handle a msgid."""
-        if self.current_state in ["mc", "ms", "mx"]:
-            self.instance.append(self.current_entry)
-            self.current_entry = POEntry(linenum=self.current_line)
-        self.current_entry.obsolete = self.entry_obsolete
-        self.current_entry.msgid = unescape(self.current_token[1:-1])
-        return True
+        Arguments:
 
-    def handle_mp(self):
-        """Handle a msgid plural."""
-        self.current_entry.msgid_plural = unescape(self.current_token[1:-1])
-        return True
+        ``source``
+            tuple, the memoryview of the mapped mo file, its msgids and
+            msgstrs tables as flat arrays of lengths and offsets and its
+            encoding.
 
-    def handle_ms(self):
-        """Handle a msgstr."""
-        self.current_entry.msgstr = unescape(self.current_token[1:-1])
-        return True
+        ``index``
+            integer, the index of the entry in the tables.
+        """
+        self._lazy = (source, index)
 
-    def handle_mx(self):
-        """Handle a msgstr plural."""
-        index = self.current_token[7]
-        value = self.current_token[self.current_token.find('"') + 1 : -1]
-        self.current_entry.msgstr_plural[int(index)] = unescape(value)
-        self.msgstr_index = int(index)
-        return True
+    def __getattr__(self, name):
+        # only called for attributes that are not set yet
+        self._decode(_lazy_source(self, name))
+        return getattr(self, name)
 
-    def handle_mc(self):
-        """Handle a msgid or msgstr continuation line."""
-        token = unescape(self.current_token[1:-1])
-        if self.current_state == "ct":
-            self.current_entry.msgctxt += token
-        elif self.current_state == "mi":
-            self.current_entry.msgid += token
-        elif self.current_state == "mp":
-            self.current_entry.msgid_plural += token
-        elif self.current_state == "ms":
-            self.current_entry.msgstr += token
-        elif self.current_state == "mx":
-            self.current_entry.msgstr_plural[self.msgstr_index] += token
-        elif self.current_state == "pp":
-            self.current_entry.previous_msgid_plural += token
-        elif self.current_state == "pm":
-            self.current_entry.previous_msgid += token
-        elif self.current_state == "pc":
-            self.current_entry.previous_msgctxt += token
-        # don't change the current state
-        return False
+    def _decode(self, lazy):
+        """
+        Decodes the entry from ``lazy``, its source and its index.
+        """
+        (data, msgids_index, msgstrs_index, encoding), index = lazy
+        length, offset = msgids_index[2 * index : 2 * index + 2]
+        msgid = bytes(data[offset : offset + length])
+        length, offset = msgstrs_index[2 * index : 2 * index + 2]
+        msgstr = bytes(data[offset : offset + length])
+        entry = MOEntry(**_mo_entry_kwargs(msgid, msgstr, encoding))
+        # attributes set before the entry was decoded are kept
+        _fill_slots(self, entry)
+        del self._lazy
+
+    def __reduce_ex__(self, protocol):
+        # copies are decoded, the memoryview of the mapped file can't be
+        # copied
+        try:
+            lazy = _LazyMOEntry._lazy.__get__(self)
+        except AttributeError:
+            pass
+        else:
+            self._decode(lazy)
+        return MOEntry.__reduce_ex__(self, protocol)
 
 
 class _MOFileParser:
@@ -1609,21 +4775,29 @@ class _MOFileParser:
             string, path to the mo file or its content
 
         ``encoding``
-            string, the encoding to use, defaults to ``default_encoding``
-            global variable (optional).
+            string, the encoding to use, if it is not given the encoding is
+            detected (optional).
 
         ``check_for_duplicates``
             whether to check for duplicate entries when adding entries to the
             file (optional, default: ``False``).
         """
+        enc = kwargs.get("encoding")
         self.fhandle = open(mofile, "rb")
+        if enc is None:
+            # the metadata can be anywhere in the file, read it once to
+            # detect the charset and parse it
+            with self.fhandle:
+                data = self.fhandle.read()
+            self.fhandle = io.BytesIO(data)
+            enc = _find_charset(data) or default_encoding
 
         klass = kwargs.get("klass")
         if klass is None:
             klass = MOFile
         self.instance = klass(
             fpath=mofile,
-            encoding=kwargs.get("encoding", default_encoding),
+            encoding=enc,
             check_for_duplicates=kwargs.get("check_for_duplicates", False),
         )
 
@@ -1677,53 +4851,13 @@ class _MOFileParser:
             self.fhandle.seek(msgstrs_index[i][1])
             msgstr = self.fhandle.read(msgstrs_index[i][0])
             if i == 0 and not msgid:  # metadata
-                raw_metadata, metadata = msgstr.split(b"\n"), {}
-                for line in raw_metadata:
-                    tokens = line.split(b":", 1)
-                    if tokens[0] != b"":
-                        try:
-                            k = tokens[0].decode(encoding)
-                            v = tokens[1].decode(encoding)
-                            metadata[k] = v.strip()
-                        except IndexError:
-                            metadata[k] = ""
-                self.instance.metadata = metadata
+                self.instance.metadata = _parse_mo_metadata(msgstr, encoding)
                 continue
-            # test if we have a plural entry
-            msgid_tokens = msgid.split(b"\0")
-            if len(msgid_tokens) > 1:
-                entry = self._build_entry(
-                    msgid=msgid_tokens[0],
-                    msgid_plural=msgid_tokens[1],
-                    msgstr_plural={k: v for k, v in enumerate(msgstr.split(b"\0"))},
-                )
-            else:
-                entry = self._build_entry(msgid=msgid, msgstr=msgstr)
-            self.instance.append(entry)
+            self.instance.append(MOEntry(**_mo_entry_kwargs(msgid, msgstr, encoding)))
         # close opened file
         self.fhandle.close()
         return self.instance
 
-    def _build_entry(self, msgid, msgstr=None, msgid_plural=None, msgstr_plural=None):
-        msgctxt_msgid = msgid.split(b"\x04")
-        encoding = self.instance.encoding
-        if len(msgctxt_msgid) > 1:
-            kwargs = {
-                "msgctxt": msgctxt_msgid[0].decode(encoding),
-                "msgid": msgctxt_msgid[1].decode(encoding),
-            }
-        else:
-            kwargs = {"msgid": msgid.decode(encoding)}
-        if msgstr:
-            kwargs["msgstr"] = msgstr.decode(encoding)
-        if msgid_plural:
-            kwargs["msgid_plural"] = msgid_plural.decode(encoding)
-        if msgstr_plural:
-            for k in msgstr_plural:
-                msgstr_plural[k] = msgstr_plural[k].decode(encoding)
-            kwargs["msgstr_plural"] = msgstr_plural
-        return MOEntry(**kwargs)
-
     def _readbinary(self, fmt, numbytes):
         """
         Private method that unpacks n bytes of data using format <fmt>.
@@ -1734,3 +4868,361 @@ class _MOFileParser:
         if len(tup) == 1:
             return tup[0]
         return tup
+
+
+class _MMapMOFileParser(_MOFileParser):
+    """
+    A mo file parser that maps the file in memory instead of reading it, the
+    entries are :class:`~polib._LazyMOEntry` instances that reference their
+    strings in the mapped file.
+    """
+
+    def __init__(self, mofile, *args, **kwargs):
+        """
+        Constructor, accepts the same arguments as
+        :class:`~polib._MOFileParser`.
+        """
+        self.encoding = kwargs.get("encoding")
+        with open(mofile, "rb") as fhandle:
+            if os.fstat(fhandle.fileno()).st_size:
+                data = mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = b""  # empty files can't be mapped
+        self.fhandle = None
+        self.data = memoryview(data)
+
+        klass = kwargs.get("klass")
+        if klass is None:
+            klass = MOFile
+        self.instance = klass(
+            fpath=mofile,
+            encoding=self.encoding or default_encoding,
+            check_for_duplicates=kwargs.get("check_for_duplicates", False),
+        )
+
+    def parse(self):
+        """
+        Build the instance from the mapped file, the index tables are
+        unpacked at once and the strings are only decoded when the entries
+        are used.
+        """
+        data = self.data
+        magic_number = struct.unpack_from("<I", data)[0]
+        if magic_number == MOFile.MAGIC:
+            order = "<"
+        elif magic_number == MOFile.MAGIC_SWAPPED:
+            order = ">"
+        else:
+            raise MOParseError("magic number is incorrect")
+        self.instance.magic_number = magic_number
+        (
+            version,
+            numofstrings,
+            msgids_hash_offset,
+            msgstrs_hash_offset,
+        ) = struct.unpack_from(order + "4I", data, 4)
+        if version >> 16 not in (0, 1):
+            raise MOParseError("unexpected major revision number")
+        self.instance.version = version
+        # the tables are made of (length, offset) pairs
+        msgids_index = self._read_table(msgids_hash_offset, numofstrings, order)
+        msgstrs_index = self._read_table(msgstrs_hash_offset, numofstrings, order)
+        start = 0
+        msgstr = None
+        if numofstrings and not msgids_index[0]:  # metadata
+            start = 1
+            length, offset = msgstrs_index[:2]
+            msgstr = bytes(data[offset : offset + length])
+        encoding = self.encoding
+        if encoding is None:
+            if msgstr:
+                encoding = _find_charset(msgstr)
+            if encoding is None:
+                encoding = _find_charset(data) or default_encoding
+            self.instance.encoding = encoding
+        if msgstr is not None:
+            self.instance.metadata = _parse_mo_metadata(msgstr, encoding)
+        source = (data, msgids_index, msgstrs_index, encoding)
+        append = self.instance.append
+        for index in range(start, numofstrings):
+            append(_LazyMOEntry(source, index))
+        return self.instance
+
+    def _read_table(self, offset, numofstrings, order):
+        """
+        Returns the table of ``numofstrings`` (length, offset) pairs found at
+        ``offset`` in the file, as a flat array of integers.
+        """
+        size = 8 * numofstrings
+        if offset + size > len(self.data):
+            raise MOParseError("string table is truncated")
+        table = array.array("I")
+        table.frombytes(self.data[offset : offset + size])
+        if (order == "<") != (sys.byteorder == "little"):
+            table.byteswap()
+        return table
+
+
+# the attributes of the entries stored in the cache, in order
+_CACHED_ENTRY_FIELDS = (
+    "msgid",
+    "msgstr",
+    "msgid_plural",
+    "msgstr_plural",
+    "msgctxt",
+    "obsolete",
+    "encoding",
+    "comment",
+    "tcomment",
+    "occurrences",
+    "flags",
+    "previous_msgctxt",
+    "previous_msgid",
+    "previous_msgid_plural",
+)
+_CACHED_PO_ENTRY_FIELDS = _CACHED_ENTRY_FIELDS + ("linenum",)
+
+# the attributes of the files stored in the cache
+_CACHED_FILE_FIELDS = ("header", "metadata", "metadata_is_fuzzy")
+_CACHED_MO_FILE_FIELDS = _CACHED_FILE_FIELDS + ("magic_number", "version")
+
+# the containers of the entries are stored as builtin types in the rows, the
+# empty ones as the shared empty tuple
+_ROW_CONVERTERS = {
+    "_flags": tuple,
+    "_occurrences": tuple,
+    "_msgstr_plural": lambda value: dict(value) if value else (),
+}
+
+
+def _entry_attrs(entry_klass, fields):
+    """
+    Returns the names of the attributes storing ``fields`` in the entries of
+    ``entry_klass``, the fields exposed by properties are stored in private
+    attributes.
+    """
+    return tuple(
+        "_" + name if isinstance(getattr(entry_klass, name, None), property) else name
+        for name in fields
+    )
+
+
+def _entries_to_rows(entries, attrs):
+    """
+    Returns the list of the values of the attributes ``attrs`` of each entry
+    of ``entries``, as tuples of builtin values.
+    """
+    converters = [_ROW_CONVERTERS.get(name) for name in attrs]
+    return [
+        tuple(
+            [
+                getattr(e, name) if convert is None else convert(getattr(e, name))
+                for name, convert in zip(attrs, converters)
+            ]
+        )
+        for e in entries
+    ]
+
+
+def _entries_from_rows(entry_klass, attrs, rows):
+    """
+    Generator that yields the entries of ``entry_klass`` built from the
+    ``rows`` returned by :func:`~polib._entries_to_rows`.
+    """
+    new = entry_klass.__new__
+    setters = [getattr(entry_klass, name).__set__ for name in attrs]
+    for row in rows:
+        entry = new(entry_klass)
+        entry._owners = None
+        entry._rendered = None
+        for setter, value in zip(setters, row):
+            setter(entry, value)
+        yield entry
+
+
+# the attributes of the po entries sent back by the parallel parser workers
+_PO_ENTRY_ATTRS = _entry_attrs(POEntry, _CACHED_PO_ENTRY_FIELDS)
+
+
+class _ParseCache:
+    """
+    An on-disk cache of parsed po or mo files.
+
+    Each file is cached in its own file of the cache directory, as the crc32
+    of the data followed by the data itself, serialized with marshal: the key
+    of the cache, the file attributes and a tuple of attribute values for each
+    entry. The key is made of the polib and python versions, the absolute path,
+    size and modification time of the file and the options that change the
+    result of the parsing, the cache is only used if it matches.
+    """
+
+    def __init__(self, directory, fpath, type, **kwargs):
+        """
+        Constructor.
+
+        Arguments:
+
+        ``directory``
+            string or pathlike-object, the cache directory.
+
+        ``fpath``
+            string or pathlike-object, the path of the po or mo file.
+
+        ``type``
+            string, ``"pofile"`` or ``"mofile"``.
+
+        Keyword arguments:
+
+        The keyword arguments of :func:`~polib.pofile` or
+        :func:`~polib.mofile`.
+        """
+        self.fpath = fpath
+        self.type = type
+        self.encoding = kwargs.get("encoding")
+        self.check_for_duplicates = kwargs.get("check_for_duplicates", False)
+        path = os.path.abspath(os.fspath(fpath))
+        options = (
+            __version__,
+            sys.version_info[:2],
+            marshal.version,
+            path,
+            type,
+            self.encoding,
+            self.check_for_duplicates,
+            _po_skipped_fields(kwargs.get("fields"), kwargs.get("skip")),
+        )
+        # one cache file per file and options, replaced when the file changes
+        name = hashlib.sha1(repr(options).encode("utf-8")).hexdigest()
+        self.path = os.path.join(directory, name)
+        stat = os.stat(path)
+        self.key = repr(options + (stat.st_size, stat.st_mtime_ns))
+        if type == "pofile":
+            self.klass = POFile
+            self.entry_klass = POEntry
+            self.file_fields = _CACHED_FILE_FIELDS
+            self.entry_fields = _CACHED_PO_ENTRY_FIELDS
+        else:
+            self.klass = MOFile
+            self.entry_klass = MOEntry
+            self.file_fields = _CACHED_MO_FILE_FIELDS
+            self.entry_fields = _CACHED_ENTRY_FIELDS
+        self.entry_attrs = _entry_attrs(self.entry_klass, self.entry_fields)
+
+    def load(self, klass=None):
+        """
+        Returns the cached instance of the file, built with ``klass``, or
+        ``None`` if it is not cached, outdated or the cache is corrupted.
+        """
+        try:
+            with open(self.path, "rb") as fhandle:
+                data = fhandle.read()
+        except OSError:
+            return None
+        if len(data) < 4 or struct.unpack("<I", data[:4])[0] != binascii.crc32(
+            data[4:]
+        ):
+            return None
+        # entries only hold builtin values that can't form reference cycles,
+        # don't let the garbage collector walk them while they are loaded
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                key, encoding, attrs, rows = marshal.loads(data[4:])
+            except (EOFError, ValueError, TypeError):
+                return None
+            if key != self.key:
+                return None
+            instance = (klass or self.klass)(
+                fpath=self.fpath,
+                encoding=encoding,
+                check_for_duplicates=self.check_for_duplicates,
+            )
+            for name, value in zip(self.file_fields, attrs):
+                setattr(instance, name, value)
+            append = instance.append
+            for entry in _entries_from_rows(self.entry_klass, self.entry_attrs, rows):
+                append(entry)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return instance
+
+    def save(self, instance):
+        """
+        Stores ``instance`` in the cache, errors are ignored as the file can
+        still be parsed.
+        """
+        attrs = tuple(getattr(instance, name) for name in self.file_fields)
+        rows = _entries_to_rows(instance, self.entry_attrs)
+        try:
+            data = marshal.dumps((self.key, instance.encoding, attrs, rows))
+        except ValueError:  # not a builtin value, e.g. a subclass
+            return
+        data = struct.pack("<I", binascii.crc32(data)) + data
+        tmppath = "%s.%d.tmp" % (self.path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmppath, "wb") as fhandle:
+                fhandle.write(data)
+            os.replace(tmppath, self.path)
+        except OSError:
+            try:
+                os.remove(tmppath)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    """
+    Command line entry point that compiles a tree of po files to mo files
+    with :func:`~polib.compile_tree`, run ``python -m polib --help`` for the
+    usage.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="polib",
+        description="Compile the po files of a directory tree to mo files.",
+    )
+    parser.add_argument("src_root", help="directory of the po files")
+    parser.add_argument(
+        "dst_root",
+        nargs="?",
+        help="directory of the mo files (default: next to the po files)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of processes (default: the number of cpus)",
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true", help="compile unchanged files too"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only report failures"
+    )
+    args = parser.parse_args(argv)
+    results = compile_tree(
+        args.src_root, args.dst_root, workers=args.workers, force=args.force
+    )
+    failures = 0
+    for src, dst, status, elapsed, error in results:
+        if status == "failed":
+            failures += 1
+            print("failed    %8.3fs  %s: %s" % (elapsed, src, error), file=sys.stderr)
+        elif not args.quiet:
+            print("%-9s %8.3fs  %s" % (status, elapsed, src))
+    if not args.quiet:
+        counts = {
+            status: sum(1 for r in results if r[2] == status)
+            for status in ("compiled", "skipped", "failed")
+        }
+        print("%(compiled)d compiled, %(skipped)d skipped, %(failed)d failed" % counts)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -71,4 +71,5 @@ if __name__ == "__main__":
             "Topic :: Text Processing :: Linguistic",
         ],
         py_modules=["polib"],
+        entry_points={"console_scripts": ["polib = polib:main"]},
     )
@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+#
+# License: MIT (see LICENSE file provided)
+
+"""
+polib benchmarks, useful for developers only.
+
+Usage::
+
+    python tests/benchmark.py [-n ENTRIES] [-w WORKERS] [--reference PATH]
+                              [--memory] [NAME ...]
+
+Runs the given benchmarks (all of them by default) on a generated catalog of
+``ENTRIES`` entries. If ``--reference`` is given, the benchmarks are also run
+with the polib module found at ``PATH`` (e.g. an older version extracted with
+``git show v2.0.0:polib.py > /tmp/polib.py``) and the speedup is reported.
+Parallel benchmarks use ``WORKERS`` processes (the number of cpus by default),
+run them with several values to see how parsing scales with the cores.
+With ``--memory``, the benchmarks returning a catalog report the memory used
+per entry (measured with tracemalloc) instead of the time taken.
+"""
+
+import argparse
+import gc
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(1, os.path.abspath("."))
+
+import polib
+
+BENCHMARKS = {}
+
+# the number of processes used by the parallel benchmarks
+WORKERS = os.cpu_count()
+
+
+def benchmark(func):
+    """
+    Register the decorated function as a benchmark, the function receives the
+    polib module to benchmark and the path of the generated catalog and
+    returns the function to time.
+    """
+    BENCHMARKS[func.__name__[len("bench_") :]] = func
+    return func
+
+
+def generate_catalog(fpath, entries):
+    """
+    Write a po file of ``entries`` entries, mixing the various kinds of lines
+    found in real world catalogs, to ``fpath``.
+    """
+    with open(fpath, "w", encoding="utf-8") as f:
+        f.write(
+            "# Benchmark catalog.\n"
+            "#\n"
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Project-Id-Version: benchmark\\n"\n'
+            '"Language: fr\\n"\n'
+            '"MIME-Version: 1.0\\n"\n'
+            '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            '"Content-Transfer-Encoding: 8bit\\n"\n'
+            '"Plural-Forms: nplurals=2; plural=(n > 1);\\n"\n\n'
+        )
+        for i in range(entries):
+            f.write("#. Extracted comment for entry %d\n" % i)
+            f.write("#: src/module%d/file.py:%d src/other.py:%d\n" % (i % 97, i, i + 1))
+            if i % 5 == 0:
+                f.write("#, fuzzy, python-format\n")
+            if i % 7 == 0:
+                f.write('msgctxt "context %d"\n' % (i % 13))
+            if i % 11 == 0:
+                f.write('msgid "%d file"\n' % i)
+                f.write('msgid_plural "%d files"\n' % i)
+                f.write('msgstr[0] "%d fichier"\n' % i)
+                f.write('msgstr[1] "%d fichiers"\n\n' % i)
+            elif i % 3 == 0:
+                f.write('msgid ""\n')
+                f.write('"A rather long message number %d that has been "\n' % i)
+                f.write('"wrapped by xgettext because it is \\"too long\\"\\n"\n')
+                f.write('msgstr ""\n')
+                f.write('"Un message plutôt long numéro %d qui a été "\n' % i)
+                f.write('"coupé par xgettext car il est \\"trop long\\"\\n"\n\n')
+            else:
+                f.write('msgid "Message number %d"\n' % i)
+                f.write('msgstr "Message numéro %d"\n\n' % i)
+
+
+@benchmark
+def bench_parse(module, fpath):
+    return lambda: module.pofile(fpath)
+
+
+@benchmark
+def bench_parse_long_wrapped(module, fpath):
+    # a single entry wrapped on as many lines as the catalog has, run with
+    # several values of ENTRIES to check that the parsing time stays linear
+    with open(fpath, encoding="utf-8") as f:
+        lines = sum(1 for line in f)
+    data = 'msgid ""\n"%s"\nmsgstr ""\n' % ("x" * 60)
+    data += '"%s\\n"\n' % ("word " * 15) * lines
+    return lambda: module.pofile(data)
+
+
+@benchmark
+def bench_parse_cached(module, fpath):
+    cachedir = os.path.join(os.path.dirname(fpath), "cache")
+    module.pofile(fpath, cache=cachedir)
+    return lambda: module.pofile(fpath, cache=cachedir)
+
+
+@benchmark
+def bench_parse_fields(module, fpath):
+    fields = ["msgctxt", "msgid", "msgstr", "flags"]
+    return lambda: module.pofile(fpath, fields=fields)
+
+
+@benchmark
+def bench_parse_check_for_duplicates(module, fpath):
+    return lambda: module.pofile(fpath, check_for_duplicates=True)
+
+
+@benchmark
+def bench_parse_lazy(module, fpath):
+    def func():
+        po = module.pofile(fpath, lazy=True)
+        po.find("Message number 1000")
+
+    return func
+
+
+@benchmark
+def bench_parse_parallel(module, fpath):
+    return lambda: module.pofile(fpath, workers=WORKERS)
+
+
+@benchmark
+def bench_find(module, fpath):
+    po = module.pofile(fpath)
+    msgids = [e.msgid for e in po[::20]]
+
+    def func():
+        for msgid in msgids:
+            po.find(msgid)
+
+    return func
+
+
+@benchmark
+def bench_find_msgstr(module, fpath):
+    po = module.pofile(fpath)
+    msgstrs = [e.msgstr for e in po[::20]]
+    if hasattr(po, "create_index"):
+        po.create_index("msgstr")
+
+    def func():
+        for msgstr in msgstrs:
+            po.find(msgstr, by="msgstr")
+
+    return func
+
+
+def status(po):
+    """
+    Returns a function calling the status methods of ``po``.
+    """
+
+    def func():
+        po.percent_translated()
+        po.translated_entries()
+        po.untranslated_entries()
+        po.fuzzy_entries()
+        po.obsolete_entries()
+
+    return func
+
+
+@benchmark
+def bench_status(module, fpath):
+    return status(module.pofile(fpath))
+
+
+@benchmark
+def bench_eq(module, fpath):
+    po1 = module.pofile(fpath)
+    po2 = module.pofile(fpath)
+    return lambda: po1 == po2
+
+
+@benchmark
+def bench_merge(module, fpath):
+    refpot = module.pofile(fpath)
+
+    def func():
+        module.pofile(fpath).merge(refpot)
+
+    return func
+
+
+@benchmark
+def bench_columnar_parse(module, fpath):
+    klass = module.ColumnarPOFile
+    return lambda: module.pofile(fpath, klass=klass)
+
+
+@benchmark
+def bench_columnar_find(module, fpath):
+    po = module.pofile(fpath, klass=module.ColumnarPOFile)
+    msgids = [e.msgid for e in po[::20]]
+
+    def func():
+        for msgid in msgids:
+            po.find(msgid)
+
+    return func
+
+
+@benchmark
+def bench_columnar_status(module, fpath):
+    return status(module.pofile(fpath, klass=module.ColumnarPOFile))
+
+
+@benchmark
+def bench_columnar_merge(module, fpath):
+    klass = module.ColumnarPOFile
+    refpot = module.pofile(fpath)
+
+    def func():
+        module.pofile(fpath, klass=klass).merge(refpot)
+
+    return func
+
+
+@benchmark
+def bench_columnar_str(module, fpath):
+    po = module.pofile(fpath, klass=module.ColumnarPOFile)
+    return lambda: str(po)
+
+
+@benchmark
+def bench_columnar_to_binary(module, fpath):
+    po = module.pofile(fpath, klass=module.ColumnarPOFile)
+    return po.to_binary
+
+
+@benchmark
+def bench_escape(module, fpath):
+    strings = [s for e in module.pofile(fpath) for s in (e.msgid, e.msgstr)]
+
+    def func():
+        for st in strings:
+            module.unescape(module.escape(st))
+
+    return func
+
+
+def rerender(po, func):
+    """
+    Return a function calling ``func`` after changing the wrap width of
+    ``po`` between 78 and 79, so that its entries are rendered again at each
+    call instead of reusing the text they keep.
+    """
+
+    def rerender():
+        po.wrapwidth = 157 - po.wrapwidth
+        return func()
+
+    return rerender
+
+
+@benchmark
+def bench_str(module, fpath):
+    po = module.pofile(fpath)
+    return rerender(po, lambda: str(po))
+
+
+def wrapped_catalog(module, fpath):
+    """
+    Return the catalog with long comments, occurrences and messages containing
+    hyphens in all its entries, so that all of them are wrapped.
+    """
+    po = module.pofile(fpath)
+    for i, entry in enumerate(po):
+        entry.tcomment = (
+            "Translator comment number %d, long enough to be wrapped on several "
+            "lines like xgettext does" % i
+        )
+        entry.occurrences = [("src/sub-module%d/file-name.py" % j, i) for j in range(6)]
+        if not entry.msgid_plural:
+            entry.msgstr = (
+                "A well-known, self-explanatory translation -- number %d -- that "
+                'is "wrapped" on its spaces and on its hyphens' % i
+            )
+    return po
+
+
+@benchmark
+def bench_wrap(module, fpath):
+    po = wrapped_catalog(module, fpath)
+    return rerender(po, lambda: str(po))
+
+
+@benchmark
+def bench_roundtrip(module, fpath):
+    po = wrapped_catalog(module, fpath)
+
+    def roundtrip():
+        po.wrapwidth = 157 - po.wrapwidth
+        content = str(po)
+        if str(module.pofile(content, wrapwidth=po.wrapwidth)) != content:
+            raise AssertionError("the catalog changed when parsed again")
+
+    return roundtrip
+
+
+@benchmark
+def bench_save(module, fpath):
+    po = module.pofile(fpath)
+    return rerender(po, lambda: po.save(os.devnull))
+
+
+@benchmark
+def bench_resave(module, fpath):
+    po = module.pofile(fpath)
+    po.save(os.devnull)
+    step = len(po) // 10
+
+    def resave():
+        # like an editor saving the catalog after a few changes
+        for entry in po[::step]:
+            entry.msgstr += "!"
+        po.save(os.devnull)
+
+    return resave
+
+
+@benchmark
+def bench_to_binary(module, fpath):
+    po = module.pofile(fpath)
+    return po.to_binary
+
+
+def compile_catalog(module, fpath):
+    mopath = os.path.splitext(fpath)[0] + ".mo"
+    if not os.path.exists(mopath):
+        module.pofile(fpath).save_as_mofile(mopath)
+    return mopath
+
+
+@benchmark
+def bench_mofile(module, fpath):
+    mopath = compile_catalog(module, fpath)
+    return lambda: module.mofile(mopath)
+
+
+@benchmark
+def bench_mofile_mmap(module, fpath):
+    mopath = compile_catalog(module, fpath)
+    return lambda: module.mofile(mopath, mmap=True)
+
+
+@benchmark
+def bench_mo_lookup(module, fpath):
+    # looked up first, the reference module may not have it
+    mo_lookup = module.mo_lookup
+    mopath = compile_catalog(module, fpath)
+    return lambda: mo_lookup(mopath, "Message number 10012")
+
+
+@benchmark
+def bench_read_metadata(module, fpath):
+    # looked up here, the reference module may not have it
+    read_metadata = module.read_metadata
+    return lambda: read_metadata(fpath)
+
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location("polib_reference", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timeit(func, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def memory(func):
+    """
+    Return the number of bytes allocated per entry by the catalog returned by
+    ``func``, or None if ``func`` does not return a catalog.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        catalog = func()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    if not hasattr(catalog, "metadata") or not len(catalog):
+        return None
+    return size / len(catalog)
+
+
+def main():
+    global WORKERS
+
+    parser = argparse.ArgumentParser(description="Run polib benchmarks.")
+    parser.add_argument("names", nargs="*", metavar="NAME", help="benchmarks to run")
+    parser.add_argument("-n", "--entries", type=int, default=20000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--reference", help="path to a reference polib module")
+    parser.add_argument(
+        "--memory", action="store_true", help="report the memory used per entry"
+    )
+    args = parser.parse_args()
+    WORKERS = args.workers
+
+    names = args.names or sorted(BENCHMARKS)
+    reference = load_module(args.reference) if args.reference else None
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fpath = os.path.join(tmpdir, "benchmark.po")
+        generate_catalog(fpath, args.entries)
+        if args.memory:
+            for name in names:
+                size = memory(BENCHMARKS[name](polib, fpath))
+                if size is None:
+                    continue
+                line = "%-20s %8d bytes/entry" % (name, size)
+                if reference is not None:
+                    try:
+                        func = BENCHMARKS[name](reference, fpath)
+                    except AttributeError:
+                        func = None
+                    if func is not None:
+                        ref_size = memory(func)
+                        line += "   reference %8d bytes/entry   saving %d%%" % (
+                            ref_size,
+                            100 - 100 * size / ref_size,
+                        )
+                print(line)
+            return
+        for name in names:
+            elapsed = timeit(BENCHMARKS[name](polib, fpath), args.repeat)
+            line = "%-20s %8.3fs" % (name, elapsed)
+            if reference is not None:
+                try:
+                    func = BENCHMARKS[name](reference, fpath)
+                except AttributeError:
+                    func = None
+                if func is not None:
+                    ref_elapsed = timeit(func, args.repeat)
+                    line += "   reference %8.3fs   speedup x%.2f" % (
+                        ref_elapsed,
+                        ref_elapsed / elapsed,
+                    )
+            print(line)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
 #!/usr/bin/env python
 
 import codecs
+import copy
+import io
 import os
+import pickle
+import shutil
+import struct
 import subprocess
 import sys
 import tempfile
+import textwrap
 import unittest
+from unittest import mock
 
 sys.path.insert(1, os.path.abspath("."))
 
@@ -30,6 +37,197 @@ msgstr "bar"
         self.assertEqual(po.encoding, "utf-8")
         self.assertEqual(po[0].msgstr, "bar")
 
+    def test_iter_pofile1(self):
+        """
+        Test that iter_pofile yields the header first, then all the entries.
+        """
+        po = polib.pofile("tests/test_utf8.po")
+        it = polib.iter_pofile("tests/test_utf8.po")
+        header = next(it)
+        self.assertTrue(isinstance(header, polib.POFile))
+        self.assertEqual(len(header), 0)
+        self.assertEqual(header.header, po.header)
+        self.assertEqual(header.metadata, po.metadata)
+        self.assertEqual(header.encoding, "UTF-8")
+        entries = list(it)
+        self.assertEqual(len(entries), len(po))
+        for e1, e2 in zip(entries, po):
+            self.assertEqual(str(e1), str(e2))
+            self.assertEqual(e1.linenum, e2.linenum)
+
+    def test_iter_pofile2(self):
+        """
+        Test that iter_pofile only uses the first entry as metadata.
+        """
+        it = polib.iter_pofile("tests/test_unusual_metadata_location.po")
+        self.assertEqual(next(it).metadata, {})
+        self.assertEqual([e.msgid for e in it], ["foo", ""])
+
+    def test_lazy_pofile1(self):
+        """
+        Test that a lazily parsed file is the same as a fully parsed one.
+        """
+        for fpath in ("tests/test_utf8.po", "tests/test_iso-8859-15.po"):
+            po = polib.pofile(fpath)
+            lazy = polib.pofile(fpath, lazy=True)
+            self.assertEqual(lazy.header, po.header)
+            self.assertEqual(lazy.metadata, po.metadata)
+            self.assertEqual(len(lazy), len(po))
+            for e1, e2 in zip(lazy, po):
+                self.assertEqual(e1.linenum, e2.linenum)
+                self.assertEqual(e1.msgctxt, e2.msgctxt)
+                self.assertEqual(e1.msgid, e2.msgid)
+                self.assertEqual(e1.obsolete, e2.obsolete)
+                self.assertEqual(e1.msgstr_plural, e2.msgstr_plural)
+                self.assertEqual(e1.previous_msgid, e2.previous_msgid)
+                self.assertEqual(e1.occurrences, e2.occurrences)
+            self.assertEqual(str(lazy), str(po))
+            self.assertEqual(lazy.to_binary(), po.to_binary())
+
+    def test_lazy_pofile2(self):
+        """
+        Test that lazy entries are only parsed when needed.
+        """
+        po = polib.pofile("tests/test_utf8.po", lazy=True)
+        entry = po.find("test context", msgctxt="@context2")
+        self.assertEqual(entry.linenum, 30)
+        self.assertTrue(hasattr(entry, "_lazy"))
+        entry.msgstr = "changed"
+        self.assertEqual(entry.tcomment, "test context 2")
+        self.assertFalse(hasattr(entry, "_lazy"))
+        self.assertEqual(entry.msgstr, "changed")
+
+    def test_lazy_pofile_syntax_error(self):
+        """
+        Test that syntax errors are raised when the faulty entry is used.
+        """
+        data = 'msgid "a"\nmsgstr "b"\n\nmsgid "c"\nmsgstr "d" "e"\n'
+        po = polib.pofile(data, lazy=True)
+        self.assertEqual(po[0].msgstr, "b")
+        with self.assertRaises(polib.POParseError) as cm:
+            po[1].msgstr
+        self.assertEqual(cm.exception.lineno, 5)
+
+    def test_parallel_pofile(self):
+        """
+        Test that parsing a file in parallel gives the same result.
+        """
+        min_chunk_size = polib._PO_MIN_CHUNK_SIZE
+        polib._PO_MIN_CHUNK_SIZE = 100
+        try:
+            for fpath in ("tests/test_utf8.po", "tests/test_iso-8859-15.po"):
+                po = polib.pofile(fpath)
+                parser = polib._ParallelPOFileParser(
+                    fpath, encoding=po.encoding, workers=2
+                )
+                self.assertTrue(len(parser.tasks) > 1)
+                po2 = polib.pofile(fpath, workers=2)
+                self.assertEqual(po2.header, po.header)
+                self.assertEqual(po2.metadata, po.metadata)
+                self.assertEqual(str(po2), str(po))
+                self.assertEqual([e.linenum for e in po2], [e.linenum for e in po])
+                # the entries are rebuilt from the rows sent by the workers
+                self.assertTrue(all(type(e) is polib.POEntry for e in po2))
+                po2[1].flags.append("fuzzy")
+                self.assertIn("#, fuzzy", str(po2[1]))
+                # strings are split in the charset of the file
+                with open(fpath, encoding=po.encoding) as fhandle:
+                    po3 = polib.pofile(fhandle.read(), workers=2)
+                self.assertEqual(po3.encoding, po.encoding)
+                self.assertEqual(str(po3), str(po))
+        finally:
+            polib._PO_MIN_CHUNK_SIZE = min_chunk_size
+
+    def test_parallel_pofile_syntax_error(self):
+        """
+        Test that syntax errors are reported with the right line number when
+        parsing a file in parallel.
+        """
+        min_chunk_size = polib._PO_MIN_CHUNK_SIZE
+        polib._PO_MIN_CHUNK_SIZE = 10
+        try:
+            data = 'msgid "a"\nmsgstr "b"\n\nmsgid "c"\nmsgstr "d" "e"\n'
+            with self.assertRaises(polib.POParseError) as cm:
+                polib.pofile(data * 4, workers=2)
+            self.assertEqual(cm.exception.lineno, 5)
+        finally:
+            polib._PO_MIN_CHUNK_SIZE = min_chunk_size
+
+    def test_pofile_opens_file_once(self):
+        """
+        Test that the encoding is detected while parsing, without reading
+        the file twice.
+        """
+        with mock.patch("builtins.open", wraps=open) as mocked_open:
+            po = polib.pofile("tests/test_iso-8859-15.po")
+        self.assertEqual(mocked_open.call_count, 1)
+        self.assertEqual(po.encoding, "ISO_8859-15")
+        with mock.patch("builtins.open", wraps=open) as mocked_open:
+            mo = polib.mofile("tests/test_iso-8859-15.mo")
+        self.assertEqual(mocked_open.call_count, 1)
+        self.assertEqual(mo.encoding, "ISO_8859-15")
+
+    def test_pofile_charset_after_first_block(self):
+        """
+        Test that the charset is only looked for at the beginning of files.
+        """
+        fd, tmpfile = tempfile.mkstemp(suffix=".po")
+        os.close(fd)
+        try:
+            with open(tmpfile, "w", encoding="latin-1") as f:
+                f.write('msgid "a"\nmsgstr "\xe9"\n\n' * 10000)
+                f.write('msgid ""\nmsgstr ""\n')
+                f.write('"Content-Type: text/plain; charset=latin-1\\n"\n')
+            self.assertEqual(polib.detect_encoding(tmpfile), "latin-1")
+            with self.assertRaises(UnicodeDecodeError):
+                polib.pofile(tmpfile)
+            po = polib.pofile(tmpfile, encoding="latin-1")
+            self.assertEqual(po[0].msgstr, "\xe9")
+        finally:
+            os.remove(tmpfile)
+
+    def test_pofile_fields(self):
+        """
+        Test that only the given fields are parsed.
+        """
+        po = polib.pofile("tests/test_utf8.po")
+        fields = ["msgctxt", "msgid", "msgstr", "flags"]
+        for kwargs in (
+            {"fields": fields},
+            {"fields": fields, "lazy": True},
+            {"skip": ["occurrences", "comment", "tcomment", "previous_msgid"]},
+        ):
+            po2 = polib.pofile("tests/test_utf8.po", **kwargs)
+            self.assertEqual(po2.header, po.header)
+            self.assertEqual(po2.metadata, po.metadata)
+            self.assertEqual(len(po2), len(po))
+            for e1, e2 in zip(po2, po):
+                self.assertEqual(e1.msgid, e2.msgid)
+                self.assertEqual(e1.msgstr, e2.msgstr)
+                self.assertEqual(e1.msgstr_plural, e2.msgstr_plural)
+                self.assertEqual(e1.flags, e2.flags)
+                self.assertEqual(e1.occurrences, [])
+                self.assertEqual(e1.comment, "")
+                self.assertEqual(e1.tcomment, "")
+                self.assertEqual(e1.previous_msgid, None)
+        po2 = polib.pofile("tests/test_utf8.po", skip=["previous_msgid"])
+        self.assertEqual(po2[0].previous_msgctxt, "@previous_context")
+        self.assertEqual(po2[0].previous_msgid, None)
+
+    def test_pofile_fields_errors(self):
+        """
+        Test that skipped lines are checked and that invalid fields are
+        rejected.
+        """
+        data = 'msgid "a"\nmsgstr "b"\n\n#| foo "c"\nmsgid "d"\nmsgstr "e"\n'
+        with self.assertRaises(polib.POParseError) as cm:
+            polib.pofile(data, fields=["msgid", "msgstr"])
+        self.assertEqual(cm.exception.lineno, 4)
+        with self.assertRaises(ValueError):
+            polib.pofile(data, fields=["msgid", "foo"])
+        with self.assertRaises(ValueError):
+            polib.pofile(data, skip=["msgstr"])
+
     def test_indented_pofile(self):
         """
         Test that an indented pofile returns a POFile instance.
@@ -98,6 +296,33 @@ msgstr "bar"
         po = polib.pofile("tests/test_obsolete_previousmsgid.po")
         self.assertTrue(isinstance(po, polib.POFile))
 
+    def test_pofile_multibyte_encodings(self):
+        """
+        Test that files in encodings where characters may contain ascii
+        bytes, and lines ending with non ascii whitespace, are parsed.
+        """
+        data = (
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Content-Type: text/plain; charset=%s\\n"\n\n'
+            "# \u8868\u3000\n"
+            'msgid "\u8868 \u30bd"\u3000\n'
+            'msgstr "\u8868\\"\u30bd\\""\r\n'
+        )
+        fd, tmpfile = tempfile.mkstemp(suffix=".po")
+        os.close(fd)
+        try:
+            for encoding in ("shift_jis", "utf-16", "euc-jp", "utf-8"):
+                with open(tmpfile, "wb") as f:
+                    f.write((data % encoding).encode(encoding))
+                for kwargs in ({}, {"lazy": True}):
+                    po = polib.pofile(tmpfile, encoding=encoding, **kwargs)
+                    entry = po.find("\u8868 \u30bd")
+                    self.assertEqual(entry.tcomment, "\u8868")
+                    self.assertEqual(entry.msgstr, '\u8868"\u30bd"')
+        finally:
+            os.remove(tmpfile)
+
     def test_previous_msgid_1(self):
         """
         Test previous msgid multiline.
@@ -196,6 +421,36 @@ msgstr ""
             msg = "unescaped double quote found: (line 4)"
             self.assertEqual(str(exc), msg)
 
+    def test_syntax_error_location(self):
+        """
+        Test that syntax errors report the path of the file and the line.
+        """
+        fd, tmpfile = tempfile.mkstemp(suffix=".po")
+        os.close(fd)
+        try:
+            with open(tmpfile, "w") as f:
+                f.write('msgid "foo"\n"bar"\n#. comment\n"baz"\n')
+            try:
+                polib.pofile(tmpfile)
+                self.fail("Syntax error not detected")
+            except polib.POParseError:
+                exc = sys.exc_info()[1]
+                self.assertEqual(exc.fpath, tmpfile + " ")
+                self.assertEqual(exc.lineno, 4)
+        finally:
+            os.remove(tmpfile)
+
+    def test_long_wrapped_entries(self):
+        """
+        Test parsing an entry wrapped on many lines, see the
+        ``parse_long_wrapped`` benchmark for the time it takes.
+        """
+        data = 'msgid ""\n"%s"\nmsgstr ""\n' % ("x" * 60)
+        data += '"%s\\n"\n' % ("word " * 15) * 20000
+        po = polib.pofile(data)
+        self.assertEqual(po[0].msgid, "x" * 60)
+        self.assertEqual(po[0].msgstr, ("word " * 15 + "\n") * 20000)
+
     def test_detect_encoding1(self):
         """
         Test that given encoding is returned when file has no encoding defined.
@@ -222,6 +477,13 @@ msgstr ""
             data = str(f.read(), "utf-8")
             self.assertEqual(polib.detect_encoding(data), "UTF-8")
 
+    def test_detect_encoding_bytes(self):
+        """
+        Test with utf8 data as bytes (no file).
+        """
+        with open("tests/test_utf8.po", "rb") as f:
+            self.assertEqual(polib.detect_encoding(f.read()), "UTF-8")
+
     def test_detect_encoding5(self):
         """
         Test with utf8 .mo file.
@@ -244,6 +506,119 @@ msgstr ""
             polib.detect_encoding("tests/test_iso-8859-15.mo"), "ISO_8859-15"
         )
 
+    def test_pofile_cache(self):
+        """
+        Test that parsed files are loaded from the cache when unchanged.
+        """
+        cachedir = tempfile.mkdtemp()
+        fd, tmpfile = tempfile.mkstemp(suffix=".po")
+        os.close(fd)
+        try:
+            with open("tests/test_utf8.po", "rb") as src:
+                with open(tmpfile, "wb") as dst:
+                    dst.write(src.read())
+            ref = polib.pofile(tmpfile)
+            with mock.patch.object(
+                polib._POFileParser,
+                "parse",
+                autospec=True,
+                side_effect=polib._POFileParser.parse,
+            ) as parse:
+                po1 = polib.pofile(tmpfile, cache=cachedir)
+                po2 = polib.pofile(tmpfile, cache=cachedir)
+                self.assertEqual(parse.call_count, 1)
+                for po in (po1, po2):
+                    self.assertEqual(str(po), str(ref))
+                    self.assertEqual(po.fpath, tmpfile)
+                    self.assertEqual(po.encoding, ref.encoding)
+                    self.assertEqual(po.metadata, ref.metadata)
+                    self.assertEqual(po.header, ref.header)
+                    self.assertEqual([e.linenum for e in po], [e.linenum for e in ref])
+                # other options are cached separately
+                polib.pofile(tmpfile, cache=cachedir, skip=["occurrences"])
+                self.assertEqual(parse.call_count, 2)
+                # changed file
+                with open(tmpfile, "a") as f:
+                    f.write('\nmsgid "new"\nmsgstr "nouveau"\n')
+                po = polib.pofile(tmpfile, cache=cachedir)
+                self.assertEqual(parse.call_count, 3)
+                self.assertEqual(po[-1].msgstr, "nouveau")
+                # corrupted cache
+                for fname in os.listdir(cachedir):
+                    with open(os.path.join(cachedir, fname), "r+b") as f:
+                        f.seek(100)
+                        f.write(b"garbage")
+                po = polib.pofile(tmpfile, cache=cachedir)
+                self.assertEqual(parse.call_count, 4)
+                self.assertEqual(po[-1].msgstr, "nouveau")
+                po = polib.pofile(tmpfile, cache=cachedir)
+                self.assertEqual(parse.call_count, 4)
+                # other polib version
+                with mock.patch("polib.__version__", "0.0.0"):
+                    polib.pofile(tmpfile, cache=cachedir)
+                self.assertEqual(parse.call_count, 5)
+        finally:
+            os.remove(tmpfile)
+            shutil.rmtree(cachedir)
+
+    def test_mofile_cache(self):
+        """
+        Test the cache with mo files.
+        """
+        cachedir = tempfile.mkdtemp()
+        try:
+            ref = polib.mofile("tests/test_utf8.mo")
+            polib.mofile("tests/test_utf8.mo", cache=cachedir)
+            with mock.patch.object(polib._MOFileParser, "parse") as parse:
+                mo = polib.mofile("tests/test_utf8.mo", cache=cachedir)
+                self.assertEqual(parse.call_count, 0)
+            self.assertTrue(isinstance(mo, polib.MOFile))
+            self.assertEqual(mo, ref)
+            self.assertEqual(mo.metadata, ref.metadata)
+            self.assertEqual(mo.magic_number, ref.magic_number)
+        finally:
+            shutil.rmtree(cachedir)
+
+    def test_read_metadata(self):
+        """
+        Test that read_metadata() returns the metadata of po and mo files.
+        """
+        for fname in (
+            "tests/test_utf8.po",
+            "tests/test_iso-8859-15.po",
+            "tests/test_fuzzy_header.po",
+            "tests/test_unusual_metadata_location.po",
+            "tests/test_merge.pot",
+        ):
+            po = polib.pofile(fname)
+            self.assertEqual(polib.read_metadata(fname), po.metadata)
+        for fname in (
+            "tests/test_utf8.mo",
+            "tests/test_iso-8859-15.mo",
+            "tests/test_no_header.mo",
+            "tests/test_version_1.1.mo",
+        ):
+            mo = polib.mofile(fname)
+            self.assertEqual(polib.read_metadata(fname), mo.metadata)
+        with self.assertRaises(polib.MOParseError):
+            polib.read_metadata("tests/test_invalid_version.mo")
+
+    def test_read_metadata_header_only(self):
+        """
+        Test that read_metadata() does not parse the entries of po files.
+        """
+        fd, tmpfile = tempfile.mkstemp(suffix=".po")
+        os.close(fd)
+        try:
+            with open(tmpfile, "w", encoding="utf-8") as f:
+                f.write('msgid ""\nmsgstr ""\n"Language: fr\\n"\n\n')
+                f.write('msgid "a"\nmsgstr "b"\nfoo\n')
+            with self.assertRaises(polib.POParseError):
+                polib.pofile(tmpfile)
+            self.assertEqual(polib.read_metadata(tmpfile), {"Language": "fr"})
+        finally:
+            os.remove(tmpfile)
+
     def test_escape(self):
         """
         Tests the escape function.
@@ -262,6 +637,116 @@ msgstr ""
             '\\t and \\n and \\r and \\" and \\\\',
         )
 
+    def test_escape_control_characters(self):
+        """
+        Tests that escape() and unescape() handle the C escape sequences.
+        """
+        self.assertEqual(polib.escape("a\ab\bc\fd\ve"), "a\\ab\\bc\\fd\\ve")
+        self.assertEqual(polib.escape("no special chars"), "no special chars")
+        self.assertEqual(polib.unescape("a\\ab\\bc\\fd\\ve"), "a\ab\bc\fd\ve")
+        self.assertEqual(polib.unescape("\\101\\x42\\0"), "AB\0")
+        self.assertEqual(polib.unescape("\\1012"), "A2")
+        self.assertEqual(polib.unescape("\\\\101"), "\\101")
+        # unknown escape sequences are left as is
+        self.assertEqual(polib.unescape("\\q \\x \\8"), "\\q \\x \\8")
+        st = "".join(chr(i) for i in range(128)) + "\\n\\x41\\101"
+        self.assertEqual(polib.unescape(polib.escape(st)), st)
+
+    def test_unescape_non_ascii(self):
+        """
+        Tests that the non ASCII octal and hexadecimal escapes are decoded as
+        bytes in the encoding of the file.
+        """
+        self.assertEqual(polib.unescape("\\303\\251t\\xc3\\xa9"), "\u00e9t\u00e9")
+        self.assertEqual(polib.unescape("\\351t\\xe9", "iso-8859-15"), "\u00e9t\u00e9")
+        self.assertEqual(polib.unescape("\\101\\303\\251"), "A\u00e9")
+        # invalid bytes are left as is
+        self.assertEqual(polib.unescape("\\303 \\x100"), "\\303 \\x100")
+        data = 'msgid "caf\\303\\251"\nmsgstr "\\303\\251t\\303\\251"\n'
+        po = polib.pofile(data)
+        self.assertEqual(po[0].msgid, "caf\u00e9")
+        self.assertEqual(po[0].msgstr, "\u00e9t\u00e9")
+        self.assertIn('msgstr "\u00e9t\u00e9"', str(po))
+        po = polib.pofile(data.replace("\\303\\251", "\\351"), encoding="iso-8859-15")
+        self.assertEqual(po[0].msgstr, "\u00e9t\u00e9")
+
+    def test_control_characters_roundtrip(self):
+        """
+        Tests that control characters are written escaped and read back.
+        """
+        po = polib.POFile()
+        po.append(polib.POEntry(msgid="a\vb", msgstr="\a\x01 \f"))
+        data = str(po)
+        self.assertIn('"a\\v"', data)
+        self.assertIn('msgstr "\\a\x01 \\f"', data)
+        po2 = polib.pofile(data)
+        self.assertEqual(po2[0].msgid, "a\vb")
+        self.assertEqual(po2[0].msgstr, "\a\x01 \f")
+        po3 = polib.pofile('msgid "\\x41\\102"\nmsgstr "\\t"\n')
+        self.assertEqual(po3[0].msgid, "AB")
+        self.assertEqual(po3[0].msgstr, "\t")
+
+    def test_wrap(self):
+        """
+        Tests that _wrap() returns the lines of textwrap.wrap().
+        """
+        texts = [
+            "",
+            " ",
+            "word",
+            "  leading and trailing spaces  ",
+            "a few words that need to be wrapped on several lines",
+            "averyveryverylongwordthatdoesnotfit and short words",
+            "a well-known, self-explanatory text -- with em-dashes--and hyphens",
+            "long-hyphenated-words-are-split-after-their-hyphens-like-this",
+            'x-y 1-2 ab- -ab a--b --- \\"escaped\\" \\\\ sequences\\n',
+            "tabs\tand\nnew lines are replaced by spaces",
+            "non\xa0breaking spaces are not spaces for textwrap",
+        ]
+        for text in texts:
+            for width in (1, 5, 10, 20, 78):
+                for indent in ("", "#: "):
+                    for drop_whitespace in (True, False):
+                        for break_on_hyphens in (True, False):
+                            expected = textwrap.wrap(
+                                text,
+                                width,
+                                initial_indent=indent,
+                                subsequent_indent=indent,
+                                drop_whitespace=drop_whitespace,
+                                break_long_words=False,
+                                break_on_hyphens=break_on_hyphens,
+                            )
+                            self.assertEqual(
+                                polib._wrap(
+                                    text,
+                                    width,
+                                    indent,
+                                    drop_whitespace,
+                                    break_on_hyphens,
+                                ),
+                                expected,
+                            )
+        self.assertRaises(ValueError, polib._wrap, "some text", 0)
+
+    def test_wrap_occurrences(self):
+        """
+        Tests that occurrences are wrapped on spaces only.
+        """
+        entry = polib.POEntry(
+            msgid="foo",
+            occurrences=[("src/some-module/file-%d*.py" % i, "") for i in range(4)],
+        )
+        self.assertEqual(
+            entry.__str__(40).splitlines()[:4],
+            [
+                "#: src/some-module/file-0*.py",
+                "#: src/some-module/file-1*.py",
+                "#: src/some-module/file-2*.py",
+                "#: src/some-module/file-3*.py",
+            ],
+        )
+
     def test_pofile_with_subclass(self):
         """
         Test that the pofile function correctly returns an instance of the
@@ -393,6 +878,137 @@ class TestBaseFile(unittest.TestCase):
         self.assertEqual(entry1.msgstr, "une cha\u00eene sans contexte")
         self.assertEqual(entry2.msgstr, "une cha\u00eene avec contexte")
 
+    def test_find_after_changes(self):
+        pofile = polib.pofile("tests/test_msgctxt.po")
+        pofile.find("some string")
+        pofile.append(polib.POEntry(msgid="some string", msgstr="appended"))
+        pofile.insert(0, polib.POEntry(msgid="some string", msgstr="inserted"))
+        # the last entry without context is returned
+        self.assertEqual(pofile.find("some string").msgstr, "appended")
+        pofile.pop()
+        self.assertEqual(
+            pofile.find("some string").msgstr, "une cha\u00eene sans contexte"
+        )
+        pofile.append(polib.POEntry(msgid="new", msgstr="appended"))
+        self.assertEqual(pofile.find("new").msgstr, "appended")
+        del pofile[-1]
+        self.assertEqual(pofile.find("new"), None)
+        pofile[:] = [polib.POEntry(msgid="a"), polib.POEntry(msgid="b")]
+        self.assertEqual(pofile.find("some string"), None)
+        self.assertEqual(pofile.find("b").msgid, "b")
+        pofile.extend([polib.POEntry(msgid="c")])
+        pofile += [polib.POEntry(msgid="d")]
+        self.assertEqual(pofile.find("d").msgid, "d")
+        pofile.remove(pofile.find("d"))
+        self.assertEqual(pofile.find("d"), None)
+        # entries edited in place
+        pofile[0].msgid = "c"
+        pofile[2].msgid = "z"
+        self.assertEqual(pofile.find("a"), None)
+        self.assertIs(pofile.find("c"), pofile[0])
+        self.assertIs(pofile.find("z"), pofile[2])
+        pofile[0].obsolete = True
+        self.assertEqual(pofile.find("c"), None)
+        self.assertIs(pofile.find("c", include_obsolete_entries=True), pofile[0])
+        pofile.clear()
+        self.assertEqual(pofile.find("b"), None)
+
+    def test_find_after_msgid_changes(self):
+        pofile1 = polib.POFile()
+        pofile2 = polib.POFile()
+        entries = [polib.POEntry(msgid=msgid) for msgid in ("a", "b", "c")]
+        pofile1.extend(entries)
+        pofile2.extend(entries[:2])
+        pofile1.find("a")
+        pofile2.find("a")
+        # the entry is moved in the index of both files
+        entries[0].msgid = "x"
+        self.assertIs(pofile1.find("x"), entries[0])
+        self.assertIs(pofile2.find("x"), entries[0])
+        self.assertEqual(pofile1.find("a"), None)
+        # the key of another entry, the order of the file is kept
+        entries[2].msgid = "b"
+        self.assertEqual(pofile1.find_all("b"), [entries[1], entries[2]])
+        self.assertEqual(pofile2.find_all("b"), [entries[1]])
+        # removed entries no longer change the index
+        pofile2.remove(entries[0])
+        pofile2.find("b")
+        entries[0].msgid = "y"
+        self.assertEqual(pofile2.find("y"), None)
+        self.assertIs(pofile1.find("y"), entries[0])
+        # copies don't change the index
+        clone = copy.copy(entries[1])
+        clone.msgid = "z"
+        self.assertEqual(pofile1.find("z"), None)
+        self.assertEqual(pofile1.find_all("b"), [entries[1], entries[2]])
+
+    def test_find_copy(self):
+        pofile = polib.pofile("tests/test_pofile_helpers.po")
+        self.assertEqual(pofile.find("and").msgstr, "y")
+        clone = copy.copy(pofile)
+        clone.append(polib.POEntry(msgid="Foo"))
+        self.assertEqual(pofile.find("Foo"), None)
+        self.assertEqual(clone.find("Foo").msgid, "Foo")
+
+    def test_find_all(self):
+        pofile = polib.pofile("tests/test_msgctxt.po")
+        entries = pofile.find_all("some string")
+        self.assertEqual([e.msgctxt for e in entries], ["Some message context", None])
+        entries = pofile.find_all("some string", msgctxt=None)
+        self.assertEqual([e.msgctxt for e in entries], [None])
+        self.assertEqual(pofile.find_all("unknown"), [])
+        pofile = polib.pofile("tests/test_pofile_helpers.po")
+        self.assertEqual(pofile.find_all("fuzzy", by="flags"), pofile.fuzzy_entries())
+        self.assertEqual([e.msgid for e in pofile.find_all("pacote", by="msgstr")], [])
+        self.assertEqual(
+            [
+                e.msgid
+                for e in pofile.find_all(
+                    "pacote", by="msgstr", include_obsolete_entries=True
+                )
+            ],
+            ["package"],
+        )
+
+    def test_create_index(self):
+        pofile = polib.pofile("tests/test_pofile_helpers.po")
+        expected = pofile.find_all("fuzzy", by="flags")
+        pofile.create_index("flags")
+        pofile.create_index("msgstr")
+        self.assertEqual(pofile.find_all("fuzzy", by="flags"), expected)
+        self.assertEqual(pofile.find("y", by="msgstr").msgid, "and")
+        entry = polib.POEntry(msgid="Foo", msgstr="y", flags=["fuzzy"])
+        pofile.insert(0, entry)
+        self.assertIs(pofile.find_all("fuzzy", by="flags")[0], entry)
+        self.assertIs(pofile.find_all("y", by="msgstr")[0], entry)
+        pofile.remove(entry)
+        self.assertEqual(pofile.find_all("fuzzy", by="flags"), expected)
+        # changes of the entries
+        pofile[0].flags.append("c-format")
+        self.assertIs(pofile.find("c-format", by="flags"), None)
+        self.assertIs(pofile.find_all("c-format", by="flags")[0], pofile[0])
+        pofile[0].flags = ["python-format"]
+        self.assertEqual(pofile.find_all("c-format", by="flags"), [])
+        self.assertIs(pofile.find_all("python-format", by="flags")[0], pofile[0])
+        pofile[3].msgstr = "brand new"
+        self.assertIs(pofile.find("brand new", by="msgstr"), pofile[3])
+        pofile[3].msgstr = "y"
+        self.assertEqual(pofile.find("brand new", by="msgstr"), None)
+        self.assertEqual(pofile.find_all("y", by="msgstr")[-1], pofile[3])
+        pofile.create_index("msgctxt")
+        self.assertEqual(pofile.find("ctx", by="msgctxt"), None)
+        pofile[1].msgctxt = "ctx"
+        self.assertIs(pofile.find("ctx", by="msgctxt"), pofile[1])
+
+    def test_check_for_duplicates_after_changes(self):
+        pofile = polib.pofile("tests/test_pofile_helpers.po", check_for_duplicates=True)
+        entry = polib.POEntry(msgid="Foo")
+        pofile.append(entry)
+        self.assertRaises(ValueError, pofile.insert, 0, polib.POEntry(msgid="Foo"))
+        entry.msgid = "Bar"
+        pofile.append(polib.POEntry(msgid="Foo"))
+        self.assertRaises(ValueError, pofile.append, polib.POEntry(msgid="Bar"))
+
     def test_save1(self):
         pofile = polib.POFile()
         self.assertRaises(TypeError, pofile.save)
@@ -450,6 +1066,87 @@ class TestBaseFile(unittest.TestCase):
         f.close()
         self.assertEqual(str(pofile), expected)
 
+    def test_iter_lines(self):
+        """
+        Test that iter_lines() yields the lines of the string representation.
+        """
+        for fpath in ("tests/test_iso-8859-15.po", "tests/test_previous_msgid.po"):
+            pofile = polib.pofile(fpath)
+            lines = list(pofile.iter_lines())
+            self.assertEqual("".join(lines), str(pofile))
+            self.assertEqual(lines, str(pofile).splitlines(True))
+        mofile = polib.mofile("tests/test_utf8.mo")
+        self.assertEqual("".join(mofile.iter_lines()), str(mofile))
+
+    def test_write(self):
+        """
+        Test that write() writes the string representation to text and binary
+        streams, even when it is written in several blocks.
+        """
+        pofile = polib.pofile("tests/test_iso-8859-15.po")
+        output = io.StringIO()
+        pofile.write(output)
+        self.assertEqual(output.getvalue(), str(pofile))
+        output = io.BytesIO()
+        pofile.write(output)
+        self.assertEqual(output.getvalue(), str(pofile).encode("iso-8859-15"))
+        # text streams that are not io.TextIOBase instances
+        output = io.BytesIO()
+        pofile.write(codecs.getwriter("utf-8")(output))
+        self.assertEqual(output.getvalue(), str(pofile).encode("utf-8"))
+
+        class TextWriter:
+            def __init__(self):
+                self.chunks = []
+
+            def write(self, data):
+                self.chunks.append(data + "")
+
+        output = TextWriter()
+        pofile.write(output)
+        self.assertEqual("".join(output.chunks), str(pofile))
+        fd, tmpfile = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with codecs.open(tmpfile, "w", "utf-8") as fhandle:
+                pofile.write(fhandle)
+            with open(tmpfile, encoding="utf-8") as fhandle:
+                self.assertEqual(fhandle.read(), str(pofile))
+            # binary streams that are not io.BufferedIOBase instances
+            with open(tmpfile, "wb") as fhandle:
+                pofile.write(mock.Mock(wraps=fhandle, mode="wb"))
+            with open(tmpfile, "rb") as fhandle:
+                self.assertEqual(fhandle.read(), str(pofile).encode("iso-8859-15"))
+        finally:
+            os.remove(tmpfile)
+        pofile = polib.POFile()
+        for i in range(5000):
+            pofile.append(polib.POEntry(msgid="Message %d" % i, msgstr="\u00e9%d" % i))
+        self.assertTrue(len(str(pofile)) > 2 * polib._WRITE_SIZE)
+        output = io.BytesIO()
+        pofile.write(output)
+        self.assertEqual(output.getvalue(), str(pofile).encode("utf-8"))
+
+    def test_save_str_override(self):
+        """
+        Test that save() uses the __str__() method of subclasses overriding it.
+        """
+
+        class CustomPOFile(polib.POFile):
+            def __str__(self):
+                return "# custom\n" + polib.POFile.__str__(self)
+
+        fd, tmpfile = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            pofile = CustomPOFile()
+            pofile.append(polib.POEntry(msgid="Foo", msgstr="Bar"))
+            pofile.save(tmpfile)
+            with open(tmpfile, encoding="utf-8") as f:
+                self.assertEqual(f.read(), str(pofile))
+        finally:
+            os.remove(tmpfile)
+
     def test_wrapping(self):
         pofile = polib.pofile("tests/test_wrap.po", wrapwidth=50)
         expected = r"""# test wrapping
@@ -524,6 +1221,93 @@ msgstr ""
 
         self.assertEqual(pofile.__str__(), expected)
 
+    def test_eq(self):
+        pofile1 = polib.pofile("tests/test_pofile_helpers.po")
+        pofile2 = polib.pofile("tests/test_pofile_helpers.po")
+        self.assertTrue(pofile1 == pofile2)
+        self.assertFalse(pofile1 != pofile2)
+        pofile2[0].msgstr = "changed"
+        self.assertFalse(pofile1 == pofile2)
+        self.assertTrue(pofile1 != pofile2)
+        pofile2[0].msgstr = pofile1[0].msgstr
+        pofile2.metadata["Language"] = "fr"
+        self.assertNotEqual(pofile1, pofile2)
+        pofile2 = polib.pofile("tests/test_pofile_helpers.po")
+        pofile2.header = "changed"
+        self.assertNotEqual(pofile1, pofile2)
+        # obsolete entries are written at the end of the file
+        pofile2 = polib.pofile("tests/test_pofile_helpers.po")
+        obsolete = pofile2.obsolete_entries()[0]
+        pofile2.remove(obsolete)
+        pofile2.insert(0, obsolete)
+        self.assertEqual(pofile1, pofile2)
+        self.assertEqual(str(pofile1), str(pofile2))
+        self.assertNotEqual(pofile1, str(pofile1))
+        self.assertRaises(TypeError, hash, pofile1)
+
+    def test_entry_eq(self):
+        entry1 = polib.POEntry(msgid="a", msgstr="b", occurrences=[("a.py", "1")])
+        entry2 = polib.POEntry(msgid="a", msgstr="b", occurrences=[("a.py", "1")])
+        self.assertEqual(entry1, entry2)
+        self.assertEqual(hash(entry1), hash(entry2))
+        self.assertEqual(len({entry1, entry2}), 1)
+        entry2.linenum = 12
+        self.assertEqual(entry1, entry2)
+        for name, value in [
+            ("msgstr", "c"),
+            ("msgctxt", "context"),
+            ("flags", ["fuzzy"]),
+            ("tcomment", "comment"),
+            ("occurrences", [("b.py", "1")]),
+            ("msgstr_plural", {0: "b"}),
+        ]:
+            entry2 = polib.POEntry(msgid="a", msgstr="b", occurrences=[("a.py", "1")])
+            setattr(entry2, name, value)
+            self.assertNotEqual(entry1, entry2)
+            self.assertFalse(entry1 == entry2)
+        # the order of the occurrences does not matter
+        occurrences = [("a.py", "1"), ("b.py", "2")]
+        entry3 = polib.POEntry(msgid="a", occurrences=occurrences)
+        entry4 = polib.POEntry(msgid="a", occurrences=occurrences[::-1])
+        self.assertEqual(entry3, entry4)
+        # the occurrences of obsolete entries are not written
+        entry2 = polib.POEntry(msgid="a", msgstr="b", obsolete=True)
+        entry1.obsolete = True
+        self.assertEqual(entry1, entry2)
+        self.assertNotEqual(entry1, "a")
+        self.assertEqual(polib.MOEntry(msgid="a"), polib.MOEntry(msgid="a"))
+
+    def test_entry_containers(self):
+        # empty containers are shared until they are modified
+        entry1 = polib.POEntry(msgid="a")
+        entry2 = polib.POEntry(msgid="b")
+        entry1.occurrences.append(("a.py", "1"))
+        entry1.flags.append("fuzzy")
+        entry1.msgstr_plural[0] = "a"
+        self.assertEqual(entry1.occurrences, [("a.py", "1")])
+        self.assertEqual(entry1.flags, ["fuzzy"])
+        self.assertEqual(entry1.msgstr_plural, {0: "a"})
+        self.assertEqual(entry2.occurrences, [])
+        self.assertEqual(entry2.flags, [])
+        self.assertEqual(entry2.msgstr_plural, {})
+        self.assertEqual(polib.MOEntry(msgid="c").occurrences, [])
+        self.assertRaises(AttributeError, setattr, entry1, "foo", "bar")
+        # paths and flags are shared by the parsed entries
+        po = polib.pofile(
+            'msgid "a"\nmsgstr ""\n\n'
+            '#: a.py:1\n#, fuzzy\nmsgid "b"\nmsgstr ""\n\n'
+            '#: a.py:2\n#, fuzzy\nmsgid "c"\nmsgstr ""\n'
+        )
+        self.assertIs(po[1].occurrences[0][0], po[2].occurrences[0][0])
+        self.assertIs(po[1].flags[0], po[2].flags[0])
+        po[1].occurrences.append(("b.py", "3"))
+        self.assertEqual(po[0].occurrences, [])
+        self.assertEqual(po[2].occurrences, [("a.py", "2")])
+        for entry in po:
+            self.assertEqual(pickle.loads(pickle.dumps(entry)), entry)
+            self.assertEqual(copy.copy(entry), entry)
+            self.assertEqual(copy.deepcopy(entry), entry)
+
     def test_trailing_comment(self):
         pofile = polib.pofile("tests/test_trailing_comment.po")
         expected = r"""#
@@ -562,7 +1346,7 @@ class TestPoFile(unittest.TestCase):
             os.close(fd)
             po = polib.pofile(reffile, autodetect_encoding=False, encoding=encoding)
             po.save_as_mofile(tmpfile1)
-            subprocess.call([msgfmt, "--no-hash", "-o", tmpfile2, reffile])
+            subprocess.call([msgfmt, "-o", tmpfile2, reffile])
             try:
                 f = open(tmpfile1, "rb")
                 s1 = f.read()
@@ -575,6 +1359,138 @@ class TestPoFile(unittest.TestCase):
                 os.remove(tmpfile1)
                 os.remove(tmpfile2)
 
+    def test_to_binary_hash_table(self):
+        """
+        Test the hash table of the mo files against files generated by
+        msgfmt and a reference lookup.
+        """
+
+        def read_table(data):
+            n, msgids, msgstrs, size, offset = struct.unpack_from("<5I", data, 8)
+            keys = struct.unpack_from("<%dI" % (2 * n), data, msgids)
+            values = struct.unpack_from("<%dI" % (2 * n), data, msgstrs)
+            table = struct.unpack_from("<%dI" % size, data, offset)
+            return keys, values, table
+
+        def lookup(data, msgid):
+            # the lookup of gettext (see dcigettext.c)
+            keys, values, table = read_table(data)
+            hval = polib._hashpjw(msgid)
+            idx = hval % len(table)
+            incr = 1 + hval % (len(table) - 2)
+            while table[idx]:
+                index = table[idx] - 1
+                length, offset = keys[2 * index : 2 * index + 2]
+                if data[offset : offset + length].split(b"\0")[0] == msgid:
+                    length, offset = values[2 * index : 2 * index + 2]
+                    return data[offset : offset + length]
+                if idx >= len(table) - incr:
+                    idx -= len(table) - incr
+                else:
+                    idx += incr
+            return None
+
+        # same table as msgfmt
+        with open("tests/test_msgctxt.mo", "rb") as f:
+            data = f.read()
+        self.assertEqual(polib.pofile("tests/test_msgctxt.po").to_binary(), data)
+        for fname in ("tests/test_utf8.mo", "tests/test_iso-8859-15.mo"):
+            with open(fname, "rb") as f:
+                data = f.read()
+            keys, values, table = read_table(data)
+            msgids = [
+                data[offset : offset + length].split(b"\0")[0]
+                for length, offset in zip(keys[::2], keys[1::2])
+            ]
+            self.assertEqual(polib._mo_hash_table(msgids), list(table))
+        # all the msgids are found
+        po = polib.pofile("tests/test_utf8.po")
+        data = po.to_binary()
+        self.assertTrue(lookup(data, b"").startswith(b"Project-Id-Version"))
+        for entry in po.translated_entries():
+            msgid = entry.msgid.encode("utf-8")
+            if entry.msgctxt:
+                msgid = entry.msgctxt.encode("utf-8") + b"\x04" + msgid
+            msgstr = lookup(data, msgid)
+            if entry.msgid_plural:
+                msgstr = msgstr.split(b"\0")[0]
+                self.assertEqual(msgstr, entry.msgstr_plural[0].encode("utf-8"))
+            else:
+                self.assertEqual(msgstr, entry.msgstr.encode("utf-8"))
+        self.assertIsNone(lookup(data, b"not in the catalog"))
+        self.assertEqual(polib._next_prime(2 * 4 // 3), 5)
+        self.assertEqual(polib._next_prime(727 * 4 // 3), 971)
+
+    def test_write_binary(self):
+        """
+        Test that write_binary() writes the output of to_binary().
+        """
+        po = polib.pofile("tests/test_utf8.po")
+        output = io.BytesIO()
+        po.write_binary(output)
+        self.assertEqual(output.getvalue(), po.to_binary())
+        entry = po.find("Some msgid", msgctxt="@context")
+        self.assertEqual(
+            polib.mo_lookup(output.getvalue(), entry.msgid, entry.msgctxt),
+            entry.msgstr,
+        )
+
+    def test_compile_tree(self):
+        """
+        Test for the compile_tree() function.
+        """
+        src = tempfile.mkdtemp()
+        dst = tempfile.mkdtemp()
+        try:
+            for lang, fname in (("fr", "test_utf8.po"), ("de", "test_msgctxt.po")):
+                os.makedirs(os.path.join(src, lang))
+                shutil.copy(os.path.join("tests", fname), os.path.join(src, lang))
+            bad = os.path.join(src, "de", "bad.po")
+            with open(bad, "w") as f:
+                f.write('msgid "a"\nfoo\n')
+            results = polib.compile_tree(src, dst, workers=2)
+            self.assertEqual(
+                [(r[0], r[1], r[2]) for r in results],
+                [
+                    (bad, os.path.join(dst, "de", "bad.mo"), "failed"),
+                    (
+                        os.path.join(src, "de", "test_msgctxt.po"),
+                        os.path.join(dst, "de", "test_msgctxt.mo"),
+                        "compiled",
+                    ),
+                    (
+                        os.path.join(src, "fr", "test_utf8.po"),
+                        os.path.join(dst, "fr", "test_utf8.mo"),
+                        "compiled",
+                    ),
+                ],
+            )
+            self.assertIn("POParseError", results[0][4])
+            with open(results[1][1], "rb") as f:
+                self.assertEqual(f.read(), polib.pofile(results[1][0]).to_binary())
+            # unchanged files are skipped
+            results = polib.compile_tree(src, dst)
+            self.assertEqual([r[2] for r in results], ["failed", "skipped", "skipped"])
+            os.utime(results[1][0], ns=(0, os.stat(results[1][1]).st_mtime_ns + 1))
+            results = polib.compile_tree(src, dst)
+            self.assertEqual([r[2] for r in results], ["failed", "skipped", "skipped"])
+            with open(results[1][0], "a") as f:
+                f.write('\nmsgid "new"\nmsgstr "neu"\n')
+            os.utime(results[1][0], ns=(0, os.stat(results[1][1]).st_mtime_ns + 1))
+            os.remove(bad)
+            results = polib.compile_tree(src, dst)
+            self.assertEqual([r[2] for r in results], ["compiled", "skipped"])
+            self.assertEqual(polib.mo_lookup(results[0][1], "new"), "neu")
+            results = polib.compile_tree(src, dst, force=True)
+            self.assertEqual([r[2] for r in results], ["compiled", "compiled"])
+            # command line
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                self.assertEqual(polib.main([src, dst, "-w", "1", "-f"]), 0)
+            self.assertIn("2 compiled, 0 skipped, 0 failed", stdout.getvalue())
+        finally:
+            shutil.rmtree(src)
+            shutil.rmtree(dst)
+
     def test_merge(self):
         refpot = polib.pofile("tests/test_merge.pot")
         po = polib.pofile("tests/test_merge_before.po")
@@ -604,6 +1520,184 @@ class TestPoFile(unittest.TestCase):
         po = polib.pofile("tests/test_pofile_helpers.po")
         self.assertEqual(len(po.obsolete_entries()), 4)
 
+    def test_entries_status_changes(self):
+        po = polib.pofile("tests/test_pofile_helpers.po")
+        self.assertEqual(po.percent_translated(), 53)
+        untranslated = po.untranslated_entries()
+        untranslated[0].msgstr = "traduit"
+        self.assertEqual(len(po.translated_entries()), 8)
+        self.assertEqual(len(po.untranslated_entries()), 3)
+        entry = po.translated_entries()[0]
+        entry.flags.append("fuzzy")
+        self.assertIn(entry, po.fuzzy_entries())
+        self.assertNotIn(entry, po.translated_entries())
+        entry.flags.remove("fuzzy")
+        entry.obsolete = True
+        self.assertIn(entry, po.obsolete_entries())
+        plural = polib.POEntry(msgid="file", msgid_plural="files")
+        plural.msgstr_plural = {0: "fichier", 1: ""}
+        po.append(plural)
+        self.assertIn(plural, po.untranslated_entries())
+        plural.msgstr_plural[1] = "fichiers"
+        self.assertIn(plural, po.translated_entries())
+        po.remove(plural)
+        self.assertNotIn(plural, po.translated_entries())
+        # the returned lists are copies
+        po.obsolete_entries().clear()
+        self.assertEqual(len(po.obsolete_entries()), 5)
+
+    def test_entries_status_files(self):
+        po1 = polib.pofile("tests/test_pofile_helpers.po")
+        po2 = polib.POFile()
+        po2.extend(po1[:4])
+        self.assertEqual(len(po2.translated_entries()), 4)
+        translated = po1.translated_entries()
+        status = po1._status
+        # the status of the files holding the entry is updated in place, in
+        # the order of the files
+        po1[0].flags.append("fuzzy")
+        self.assertEqual(len(po2.translated_entries()), 3)
+        po1[0].flags.remove("fuzzy")
+        self.assertEqual(po1.translated_entries(), translated)
+        self.assertEqual(po2.translated_entries(), po1[:4])
+        po1.insert(0, polib.POEntry(msgid="new", msgstr="nouveau"))
+        self.assertEqual(po1.translated_entries(), [po1[0]] + translated)
+        self.assertIs(po1._status, status)
+        # entries in no file or removed from a file don't change it
+        entry = po2.pop()
+        self.assertEqual(len(po2.translated_entries()), 3)
+        status = po2._status
+        po1.metadata_as_entry()
+        polib.POEntry(msgid="a", flags=["fuzzy"]).flags.remove("fuzzy")
+        entry.msgstr = ""
+        self.assertIs(po2._status, status)
+        self.assertEqual(len(po2.untranslated_entries()), 0)
+        self.assertEqual(po1.untranslated_entries()[0], entry)
+        # an entry in the file twice is counted twice
+        po2.append(po2[0])
+        self.assertEqual(len(po2.translated_entries()), 4)
+        self.assertEqual(po2.percent_translated(), 100)
+
+    def test_entries_rendered(self):
+        """
+        Test that the entries keep their rendered text until they change.
+        """
+        po = polib.pofile("tests/test_previous_msgid.po")
+        str(po)
+        entry = po[0]
+        self.assertIs(entry.__str__(78), entry.__str__(78))
+        self.assertEqual(entry.__str__(20), entry._render(20))
+        changes = [
+            lambda: setattr(entry, "msgstr", "changed"),
+            lambda: setattr(entry, "comment", "a comment"),
+            lambda: setattr(entry, "tcomment", "a translator comment"),
+            lambda: setattr(entry, "msgctxt", "context"),
+            lambda: setattr(entry, "previous_msgid", "previous"),
+            lambda: entry.flags.append("c-format"),
+            lambda: entry.occurrences.append(("file.py", "12")),
+            lambda: entry.msgstr_plural.update({0: "fichier", 1: "fichiers"}),
+            lambda: setattr(entry, "obsolete", True),
+        ]
+        for change in changes:
+            before = str(entry)
+            change()
+            self.assertNotEqual(str(entry), before)
+            self.assertEqual(str(entry), entry._render(78))
+            self.assertIn(str(entry), str(po))
+        # the lists given to the entries are copied so that their changes are
+        # seen
+        occurrences = [("file.py", "1")]
+        entry = polib.POEntry(msgid="foo", occurrences=occurrences)
+        before = str(entry)
+        occurrences.append(("other.py", "2"))
+        self.assertEqual(str(entry), before)
+        entry.occurrences = occurrences
+        self.assertIn("other.py", str(entry))
+
+    def test_columnar(self):
+        for fpath in ("tests/test_pofile_helpers.po", "tests/test_utf8.po"):
+            po = polib.pofile(fpath)
+            col = polib.pofile(fpath, klass=polib.ColumnarPOFile)
+            self.assertIsInstance(col, polib.ColumnarPOFile)
+            self.assertEqual(col, po)
+            self.assertEqual(po, col)
+            self.assertEqual(len(col), len(po))
+            self.assertEqual(col.metadata, po.metadata)
+            self.assertEqual(str(col), str(po))
+            self.assertEqual(col.to_binary(), po.to_binary())
+            self.assertEqual(col.percent_translated(), po.percent_translated())
+            for method in (
+                "translated_entries",
+                "untranslated_entries",
+                "fuzzy_entries",
+                "obsolete_entries",
+            ):
+                self.assertEqual(getattr(col, method)(), getattr(po, method)())
+            for e1, e2 in zip(col, po):
+                self.assertIsInstance(e1, polib.POEntry)
+                self.assertEqual(e1, e2)
+                self.assertEqual(e1.linenum, e2.linenum)
+                for kwargs in ({}, {"include_obsolete_entries": True}):
+                    self.assertEqual(
+                        col.find(e2.msgid, msgctxt=e2.msgctxt, **kwargs),
+                        po.find(e2.msgid, msgctxt=e2.msgctxt, **kwargs),
+                    )
+                self.assertEqual(e2 in col, e2 in po)
+            self.assertEqual(
+                col.find_all("fuzzy", by="flags"), po.find_all("fuzzy", by="flags")
+            )
+        self.assertIsNone(col.find("does not exist"))
+        self.assertEqual(col[-1], po[-1])
+        self.assertEqual(col[1:3], po[1:3])
+
+    def test_columnar_changes(self):
+        po = polib.pofile("tests/test_pofile_helpers.po")
+        col = polib.pofile("tests/test_pofile_helpers.po", klass=polib.ColumnarPOFile)
+        # the changes of the entries are stored in the catalog
+        for entries in (po, col):
+            entry = entries.untranslated_entries()[0]
+            entry.msgstr = "traduit"
+            entry.flags.append("c-format")
+            entry.occurrences.append(("b.py", "2"))
+            entries[0].obsolete = True
+            entries.translated_entries()[0].flags.append("fuzzy")
+            plural = polib.POEntry(msgid="file", msgid_plural="files")
+            plural.msgstr_plural = {0: "fichier", 1: ""}
+            entries.insert(2, plural)
+            entries[2].msgstr_plural[1] = "fichiers"
+            del entries[3]
+            entries[4] = polib.POEntry(msgid="replaced", msgstr="remplacé")
+            entries.append(polib.POEntry(msgid="appended"))
+        self.assertEqual(col, po)
+        self.assertEqual(str(col), str(po))
+        self.assertEqual(col.to_binary(), po.to_binary())
+        self.assertEqual(col.fuzzy_entries(), po.fuzzy_entries())
+        self.assertEqual(
+            col.find("traduit", by="msgstr"), po.find("traduit", by="msgstr")
+        )
+        self.assertEqual(col.find("replaced").msgstr, "remplacé")
+        # copies of the entries are detached from the catalog
+        entry = copy.copy(col[0])
+        self.assertEqual(type(entry), polib.POEntry)
+        entry.msgid = "copy"
+        self.assertNotEqual(col[0].msgid, "copy")
+        col = pickle.loads(pickle.dumps(col))
+        self.assertEqual(col, po)
+        col = polib.ColumnarPOFile(check_for_duplicates=True)
+        col.append(polib.POEntry(msgid="a"))
+        col.append(polib.POEntry(msgid="a", msgctxt="b"))
+        self.assertRaises(ValueError, col.append, polib.POEntry(msgid="a"))
+        self.assertRaises(AttributeError, setattr, col[0], "encoding", "latin-1")
+
+    def test_columnar_merge(self):
+        expected_po = polib.pofile("tests/test_merge_after.po")
+        for klass in (polib.POFile, polib.ColumnarPOFile):
+            refpot = polib.pofile("tests/test_merge.pot", klass=klass)
+            po = polib.pofile("tests/test_merge_before.po", klass=polib.ColumnarPOFile)
+            po.merge(refpot)
+            self.assertEqual(po, expected_po)
+            self.assertEqual(str(po), str(expected_po))
+
     def test_unusual_metadata_location(self):
         po = polib.pofile("tests/test_unusual_metadata_location.po")
         self.assertNotEqual(po.metadata, {})
@@ -655,6 +1749,20 @@ class TestMoFile(unittest.TestCase):
         finally:
             os.remove(tmpfile)
 
+    def test_save(self):
+        """
+        Test for the MOFile.save() method.
+        """
+        fd, tmpfile = tempfile.mkstemp(suffix=".mo")
+        os.close(fd)
+        try:
+            mo = polib.mofile("tests/test_msgctxt.mo")
+            mo.save(tmpfile)
+            with open(tmpfile, "rb") as f1, open("tests/test_msgctxt.mo", "rb") as f2:
+                self.assertEqual(f1.read(), f2.read())
+        finally:
+            os.remove(tmpfile)
+
     def test_msgctxt(self):
         # import pdb; pdb.set_trace()
         mo = polib.mofile("tests/test_msgctxt.mo")
@@ -695,6 +1803,116 @@ msgstr "oof"
 """
         self.assertEqual(mo.__str__(), expected)
 
+    def test_mmap(self):
+        """
+        Test that memory mapped mo files give the same entries, decoded when
+        they are first used.
+        """
+        for fname in (
+            "tests/test_utf8.mo",
+            "tests/test_iso-8859-15.mo",
+            "tests/test_msgctxt.mo",
+            "tests/test_no_header.mo",
+        ):
+            mo = polib.mofile(fname)
+            mo2 = polib.mofile(fname, mmap=True)
+            self.assertTrue(hasattr(mo2[-1], "_lazy"))
+            self.assertEqual(mo2.encoding, mo.encoding)
+            self.assertEqual(mo2.metadata, mo.metadata)
+            self.assertEqual(mo2.magic_number, mo.magic_number)
+            self.assertEqual(str(mo2), str(mo))
+            self.assertFalse(hasattr(mo2[-1], "_lazy"))
+        mo = polib.mofile("tests/test_msgctxt.mo", mmap=True)
+        mo[0].msgstr = "changed"
+        self.assertEqual(mo[0].msgctxt, "Some message context")
+        self.assertEqual(mo[0].msgstr, "changed")
+        # copies are decoded
+        ref = polib.mofile("tests/test_msgctxt.mo")
+        ref[0].msgstr = "changed"
+        mo = polib.mofile("tests/test_msgctxt.mo", mmap=True)
+        mo[0].msgstr = "changed"
+        self.assertEqual(copy.deepcopy(mo), ref)
+        mo = polib.mofile("tests/test_msgctxt.mo", mmap=True)
+        mo[0].msgstr = "changed"
+        self.assertEqual(pickle.loads(pickle.dumps(mo)), ref)
+        self.assertEqual(copy.copy(mo[1]), ref[1])
+        self.assertRaises(
+            polib.MOParseError,
+            polib.mofile,
+            "tests/test_invalid_version.mo",
+            mmap=True,
+        )
+
+    def test_mo_lookup(self):
+        """
+        Test mo_lookup() with and without hash table.
+        """
+        with open("tests/test_msgctxt.mo", "rb") as f:
+            data = f.read()
+        no_hash = bytearray(data)
+        struct.pack_into("<I", no_hash, 20, 0)
+        ctxt = "Some other message context"
+        for mofile in ("tests/test_msgctxt.mo", data, no_hash):
+            lookup = polib.mo_lookup
+            self.assertEqual(
+                lookup(mofile, "some string"), "une cha\u00eene sans contexte"
+            )
+            self.assertEqual(
+                lookup(mofile, "some string", msgctxt="Some message context"),
+                "une cha\u00eene avec contexte",
+            )
+            self.assertEqual(lookup(mofile, "singular", msgctxt=ctxt), "singulier")
+            self.assertEqual(lookup(mofile, "singular", ctxt, n=1), "singulier")
+            self.assertEqual(lookup(mofile, "singular", ctxt, n=0), "pluriel")
+            self.assertEqual(lookup(mofile, "singular", ctxt, n=2), "pluriel")
+            self.assertIsNone(lookup(mofile, "singular"))
+            self.assertIsNone(lookup(mofile, "not translated"))
+        # a file with a standard Plural-Forms header
+        data = polib.pofile("tests/test_utf8.po").to_binary()
+        self.assertEqual(polib.mo_lookup(data, "year", n=1), "a\u00f1o")
+        self.assertEqual(polib.mo_lookup(data, "year", n=2), "a\u00f1os")
+        self.assertEqual(polib.mo_lookup(data, "year", n=0), "a\u00f1os")
+        self.assertEqual(polib.mo_lookup(data, "year"), "a\u00f1o")
+        mo = polib.mofile("tests/test_iso-8859-15.mo")
+        for entry in mo:
+            msgstr = polib.mo_lookup(
+                "tests/test_iso-8859-15.mo", entry.msgid, entry.msgctxt
+            )
+            if entry.msgid_plural:
+                self.assertEqual(msgstr, entry.msgstr_plural[0])
+            else:
+                self.assertEqual(msgstr, entry.msgstr)
+        self.assertRaises(
+            polib.MOParseError,
+            polib.mo_lookup,
+            "tests/test_invalid_version.mo",
+            "foo",
+        )
+
+    def test_big_endian(self):
+        """
+        Test mo files written in big endian byte order.
+        """
+        with open("tests/test_msgctxt.mo", "rb") as f:
+            data = bytearray(f.read())
+        # swap the header and the two string tables
+        count, msgids, msgstrs = struct.unpack_from("<3I", data, 8)
+        ints = [(0, 7), (msgids, 2 * count), (msgstrs, 2 * count)]
+        for offset, n in ints:
+            values = struct.unpack_from("<%dI" % n, data, offset)
+            struct.pack_into(">%dI" % n, data, offset, *values)
+        fd, tmpfile = tempfile.mkstemp(suffix=".mo")
+        os.close(fd)
+        try:
+            with open(tmpfile, "wb") as f:
+                f.write(data)
+            ref = polib.mofile("tests/test_msgctxt.mo")
+            for mo in (polib.mofile(tmpfile), polib.mofile(tmpfile, mmap=True)):
+                self.assertEqual(mo.magic_number, polib.MOFile.MAGIC_SWAPPED)
+                self.assertEqual(str(mo), str(ref))
+        finally:
+            os.remove(tmpfile)
+
 
 if __name__ == "__main__":
     unittest.main()